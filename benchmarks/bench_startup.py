@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+""" benchmarks/bench_startup.py
+
+Measures the startup cost (interpreter + imports) of the chaikin3d entry points.
+
+Each entry point runs in a fresh interpreter several times; the best and median
+wall times are reported, along with the slowest imports from 'python -X importtime'.
+
+Usage:
+    python benchmarks/bench_startup.py [-r REPEAT] [-t TOP]
+"""
+
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CUBE = os.path.join(ROOT, "example-meshes", "cube.obj")
+
+ENTRY_POINTS = {
+    "python (baseline)": "pass",
+    "chaikin3d (library API)": "import chaikin3d",
+    "chaikin3d.managers (CLI)": "import chaikin3d.managers",
+    "headless CLI run (-p none)": (
+        "from chaikin3d.managers import ChaikinMGR; "
+        "ChaikinMGR(cmd_args='-i {cube} -cg 1 -p none -o {output}')(plot=True)"
+    ),
+    "chaikin3d.plotly_renderer": "import chaikin3d.plotly_renderer",
+}
+
+
+def run(code: str, *flags: str) -> tuple:
+    """
+    Runs the code in a fresh interpreter.
+
+    Args:
+        code  (str): Python code to run.
+        flags (str): Extra interpreter flags.
+
+    Returns:
+        tuple: (wall time in seconds, stderr)
+
+    """
+
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, *flags, "-c", code], cwd=ROOT, capture_output=True, text=True
+    )
+    elapsed = time.perf_counter() - start
+    if proc.returncode != 0:
+        raise RuntimeError(f"{code!r} failed:\n{proc.stderr}")
+    return elapsed, proc.stderr
+
+
+def slowest_imports(code: str, top: int) -> list:
+    """
+    Returns the 'top' slowest third-party/stdlib packages (cumulative time) imported by the code.
+
+    Args:
+        code (str): Python code to run.
+        top  (int): Number of imports to return.
+
+    Returns:
+        list: [(cumulative time in ms, module name), ...]
+
+    """
+
+    _, stderr = run(code, "-X", "importtime")
+    imports = []
+    for line in stderr.splitlines():
+        match = re.match(r"import time:\s+\d+\s+\|\s+(\d+)\s+\|\s*(\S+)", line)
+        # only keep packages (not their submodules), chaikin3d modules only re-export their cost
+        if match and "." not in match.group(2) and not match.group(2).startswith("chaikin3d"):
+            imports.append((int(match.group(1)) / 1000, match.group(2)))
+    return sorted(imports, reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="chaikin3d startup benchmark")
+    parser.add_argument("-r", "--repeat", type=int, default=5, help="runs per entry point")
+    parser.add_argument("-t", "--top", type=int, default=3, help="number of slowest imports to show")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        output = os.path.join(tmp, "out.obj")
+        print(f"{'entry point':<30} {'best (ms)':>10} {'median (ms)':>12}   slowest imports")
+        for name, code in ENTRY_POINTS.items():
+            code = code.format(cube=CUBE, output=output)
+            try:
+                times = [run(code)[0] * 1000 for _ in range(args.repeat)]
+            except RuntimeError as err:
+                print(f"{name:<30} {'failed':>10}   {str(err).splitlines()[-1]}")
+                continue
+            imports = ", ".join(f"{module} {ms:.0f}ms" for ms, module in slowest_imports(code, args.top))
+            print(f"{name:<30} {min(times):>10.1f} {statistics.median(times):>12.1f}   {imports}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,15 @@
+# the library api (see 'chaikin3d.api') is only imported when one of its functions
+# is used, so that 'import chaikin3d' stays cheap for the command-line program
+__all__ = [
+    'limit_surface',
+    'subdivide',
+    'subdivision_operator',
+]
+
+
+def __getattr__(name: str):
+    if name in __all__:
+        from chaikin3d import api
+
+        return getattr(api, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,260 @@
+# -*- coding: utf-8 -*-
+""" chaikin3d/api.py """
+
+from __future__ import annotations
+from collections import OrderedDict
+from collections.abc import Sequence
+import threading
+
+import numpy as np
+
+from chaikin3d import limit
+from chaikin3d.polyhedron import ChaikinOptions, Polyhedron
+from chaikin3d.sparse import CSRMatrix
+
+
+__all__ = [
+    'subdivide',
+    'subdivision_operator',
+    'limit_surface',
+]
+
+
+# number of topologies whose operators are kept (see 'subdivision_operator')
+OPERATOR_CACHE_SIZE = 8
+# topology key -> _TopologyOperators
+_operator_cache: OrderedDict = OrderedDict()
+_operator_cache_lock = threading.Lock()
+
+
+class _TopologyOperators:
+    """
+    Composed operators of the generations of one topology, and what is needed
+    to compute the next generation. The generations are computed under the
+    lock of the topology, so concurrent calls never compute one twice.
+
+    """
+
+    __slots__ = ("operators", "faces", "snapshot", "options", "lock")
+
+    def __init__(self, polyhedron: Polyhedron, options: ChaikinOptions):
+        # operators[g]: generation 0 -> generation g
+        self.operators: list[CSRMatrix] = [CSRMatrix.identity(len(polyhedron))]
+        self.faces: list[tuple[np.ndarray, np.ndarray]] = [polyhedron.face_arrays()]
+        self.snapshot: dict = polyhedron.snapshot()
+        self.options = options
+        self.lock = threading.Lock()
+
+    def extend(self, generations: int) -> None:
+        with self.lock:
+            while len(self.operators) <= generations:
+                polyhedron = Polyhedron.from_arrays(**self.snapshot).Chaikin3D(
+                    self.options, parent_pairs=True
+                )
+                self.operators.append(polyhedron.generation_operator() @ self.operators[-1])
+                self.faces.append(polyhedron.face_arrays())
+                self.snapshot = polyhedron.snapshot()
+
+
+def _check_arguments(
+    vertices: np.ndarray,
+    faces: np.ndarray | Sequence[Sequence[int]],
+    generations: int,
+    coef: float,
+    order_edges: str,
+) -> tuple[np.ndarray, list[np.ndarray]]:
+    """
+    Returns the vertices and the faces as arrays (see 'subdivide').
+
+    Raises:
+        ValueError: Invalid arguments.
+
+    """
+
+    vertices = np.asarray(vertices)
+    if vertices.ndim != 2 or vertices.shape[1] != 3:
+        raise ValueError(f"Invalid vertices shape: {vertices.shape} (expected (N, 3))")
+    if generations < 0:
+        raise ValueError(f"Number of generations must be positive ({generations} >= 0)")
+    if coef <= 2:
+        raise ValueError(f"Chaikin coefficient must be greater than 2 ({coef} > 2)")
+    if order_edges not in ("none", "first", "all"):
+        raise ValueError(f'Invalid value for "order_edges": {order_edges}')
+    face_list = [np.asarray(face, dtype=np.int64) for face in faces]
+    for face in face_list:
+        if face.ndim != 1 or len(face) < 3:
+            raise ValueError(f"Invalid face: {face} (expected at least 3 vertex indices)")
+    return vertices, face_list
+
+
+def subdivide(
+    vertices: np.ndarray,
+    faces: np.ndarray | Sequence[Sequence[int]],
+    generations: int = 1,
+    coef: float = 4.0,
+    order_edges: str = "none",
+    triangulate: bool = False,
+    verbose: bool = False,
+    dtype: np.dtype = None,
+) -> tuple[np.ndarray, list[np.ndarray] | np.ndarray]:
+    """
+    Apply the Chaikin3D algorithm to a mesh given as arrays.
+
+    No command-line parsing nor plotting module is involved: this is the
+    entry point for the programs that use chaikin3d as a library.
+
+    Usage:
+        vertices, faces = chaikin3d.subdivide(vertices, faces, generations=2, coef=4.0)
+
+    Args:
+        vertices    (np.ndarray)                  : (N, 3) array of vertex positions.
+        faces       (np.ndarray | Sequence[Sequence[int]]):
+            Vertex indices (starting at 0) of each face, as a (F, k) array or
+            as a sequence of (ordered) faces of any size.
+        generations (int)  : Number of chaikin generations.
+        coef        (float): Chaikin coefficient (must be greater than 2).
+        order_edges (str)  : Order edges ["none", "first", "all"].
+        triangulate (bool) : Return triangles instead of polygonal faces.
+        verbose     (bool) : Verbose.
+        dtype       (np.dtype): Precision of the computations (np.float32 or
+                                np.float64). Default: the one of 'vertices'.
+
+    Returns:
+        tuple[np.ndarray, list[np.ndarray] | np.ndarray]:
+            (vertices, faces): (M, 3) vertex positions, and the vertex
+            indices of the faces (a list of 1D arrays, or a (T, 3) array
+            if 'triangulate' is True).
+
+    Raises:
+        ValueError: Invalid arguments.
+
+    """
+
+    vertices, face_list = _check_arguments(vertices, faces, generations, coef, order_edges)
+    if dtype is not None:
+        vertices = vertices.astype(dtype, copy=False)
+
+    options = ChaikinOptions(coef, order_edges, int(verbose))
+    poly = Polyhedron.from_standard_vertex_lists(vertices, face_list, verbose)
+    for _ in range(generations):
+        poly = poly.Chaikin3D(options)
+
+    if triangulate:
+        return poly.vertex_array(), poly.triangles
+    face_offsets, face_indices = poly.face_arrays()
+    return poly.vertex_array(), np.split(face_indices, face_offsets[1:-1])
+
+
+def subdivision_operator(
+    vertices: np.ndarray,
+    faces: np.ndarray | Sequence[Sequence[int]],
+    generations: int = 1,
+    coef: float = 4.0,
+    order_edges: str = "none",
+) -> tuple[CSRMatrix, list[np.ndarray]]:
+    """
+    Returns the sparse matrix that maps the input vertices to the vertices of
+    the given Chaikin generation, with the faces of that generation.
+
+    Every generation is a fixed affine combination of the vertices of the
+    previous one (see 'Polyhedron.generation_operator'), so once the operator
+    of a topology is known, moving the base vertices (animation, deformation)
+    only costs a sparse product instead of a full subdivision:
+
+        operator, faces = chaikin3d.subdivision_operator(vertices, faces, generations=3)
+        for frame_vertices in frames:
+            new_vertices = operator @ frame_vertices
+
+    The composed operators are cached per topology (number of vertices, faces,
+    coef and order_edges): asking for more generations of a cached topology
+    only computes the missing ones. The vertices of the first call are the
+    ones used to build the topology, the operator is valid for the
+    deformations that keep the same structure. The cache can be shared by
+    several threads.
+
+    Args:
+        vertices    (np.ndarray)                  : (N, 3) array of vertex positions.
+        faces       (np.ndarray | Sequence[Sequence[int]]): See 'subdivide'.
+        generations (int)  : Number of chaikin generations.
+        coef        (float): Chaikin coefficient (must be greater than 2).
+        order_edges (str)  : Order edges ["none", "first", "all"].
+
+    Returns:
+        tuple[CSRMatrix, list[np.ndarray]]:
+            (operator, faces): (M, N) sparse matrix, and the vertex indices of
+            the faces of the generation (in the rows of the operator).
+
+    Raises:
+        ValueError: Invalid arguments.
+
+    """
+
+    vertices, face_list = _check_arguments(vertices, faces, generations, coef, order_edges)
+    key = (
+        len(vertices),
+        b"".join(np.append(face, -1).tobytes() for face in face_list),
+        float(coef),
+        order_edges,
+    )
+    with _operator_cache_lock:
+        topology = _operator_cache.pop(key, None)
+        if topology is None:
+            options = ChaikinOptions(coef, order_edges)
+            topology = _TopologyOperators(
+                Polyhedron.from_standard_vertex_lists(vertices, face_list), options
+            )
+        _operator_cache[key] = topology
+        while len(_operator_cache) > OPERATOR_CACHE_SIZE:
+            _operator_cache.popitem(last=False)
+
+    topology.extend(generations)
+    face_offsets, face_indices = topology.faces[generations]
+    return topology.operators[generations], np.split(face_indices, face_offsets[1:-1])
+
+
+def limit_surface(
+    vertices: np.ndarray,
+    faces: np.ndarray | Sequence[Sequence[int]],
+    *,
+    density: int = 4,
+    coef: float = 4.0,
+    generations: int = 1,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Returns a triangulation of the limit surface of the Chaikin3D algorithm
+    (the surface the generations converge to), sampled at the given density.
+
+    The size of the output is chosen with the density instead of a number of
+    generations, so a smooth surface does not cost the exponential growth of
+    the generations (see 'limit.limit_surface'):
+
+        vertices, triangles = chaikin3d.limit_surface(vertices, faces, density=8)
+
+    The mesh must be a consistently oriented manifold (open borders are
+    supported).
+
+    Args:
+        vertices    (np.ndarray)                  : (N, 3) array of vertex positions.
+        faces       (np.ndarray | Sequence[Sequence[int]]): See 'subdivide'.
+        density     (int)  : Number of limit points per face corner (rounded up
+                             to a power of two).
+        coef        (float): Chaikin coefficient (must be greater than 2).
+        generations (int)  : Number of generations computed before sampling
+                             (at least one, more is more accurate).
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: (M, 3) vertex positions and (T, 3) triangles.
+
+    Raises:
+        ValueError: Invalid arguments, or the mesh is not a consistently
+                    oriented manifold.
+
+    """
+
+    vertices, face_list = _check_arguments(vertices, faces, generations, coef, "none")
+    face_offsets = np.zeros(len(face_list) + 1, dtype=np.int64)
+    np.cumsum([len(face) for face in face_list], out=face_offsets[1:])
+    face_indices = np.concatenate(face_list) if face_list else np.empty(0, dtype=np.int64)
+    return limit.limit_surface(
+        vertices, face_offsets, face_indices, density=density, coef=coef, generations=generations
+    )
@@ -8,6 +8,19 @@ from argparse import ArgumentParser
 
 ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
 DEFAULT_ARGS_JSON_FILE_PATH = "default-args.json"
+# wavefront files, optionally compressed
+OBJ_EXTENSIONS = (".obj", ".obj.gz", ".obj.xz")
+INPUT_EXTENSIONS = OBJ_EXTENSIONS + (".c3m",)
+RENDERERS = ("plotly", "mpl")
+OUTPUT_EXTENSIONS = (".obj", ".obj.gz", ".obj.xz", ".c3m", ".ply", ".stl", ".glb", ".html")
+# outputs written from the memory-mapped arrays, one chunk at a time
+OUT_OF_CORE_EXTENSIONS = (".obj", ".obj.gz", ".obj.xz", ".c3m", ".ply")
+# triangle mesh outputs
+LIMIT_SURFACE_EXTENSIONS = (".obj", ".obj.gz", ".obj.xz", ".ply", ".stl", ".glb")
+# --until-converged option without a value (see 'convergence.subdivide_until_converged')
+DEFAULT_TOLERANCE = 1e-3
+# generation cap of --until-converged when no number of generations is given
+DEFAULT_MAX_GENERATIONS = 6
 
 
 class ArgumentError(Exception):
@@ -33,13 +46,57 @@ def gen_arg_parser() -> ArgumentParser:
     )
 
     # polyhedron
-    parser.add_argument("-i", "--input", type=str, help="input file", required=True)
+    parser.add_argument(
+        "-i",
+        "--input",
+        type=str,
+        help="input file (wavefront '.obj', '.obj.gz', '.obj.xz' or chaikin3d binary '.c3m' format)",
+        required=True,
+    )
     parser.add_argument(
         "-rm",
         "--rotate-mesh",
         help="Rotate the mesh when loading a file",
         action="store_true",
     )
+    parser.add_argument(
+        "-wv",
+        "--weld-vertices",
+        type=float,
+        default=None,
+        help="Merge the vertices closer than the given tolerance when loading a '.obj' file (0: exact duplicates)",
+    )
+    parser.add_argument(
+        "-mc",
+        "--merge-coplanar",
+        help="Merge the adjacent coplanar faces of the input '.obj' mesh into polygons before any chaikin generation",
+        action="store_true",
+    )
+    parser.add_argument(
+        "-pr",
+        "--precision",
+        type=int,
+        default=32,
+        help="Precision of the vertex coordinates [32, 64] (float32 halves the memory of the vertices)",
+    )
+    parser.add_argument(
+        "-prr",
+        "--precision-report",
+        help="Print the error of float32 against float64 vertices at each chaikin generation",
+        action="store_true",
+    )
+    parser.add_argument(
+        "-val",
+        "--validate",
+        help="Check the input mesh before any chaikin generation (abort if it cannot be subdivided)",
+        action="store_true",
+    )
+    parser.add_argument(
+        "-rep",
+        "--repair",
+        help="Repair the input '.obj' mesh (exact duplicate vertices, degenerate/duplicate faces, winding, isolated vertices), then validate it",
+        action="store_true",
+    )
     # chaikin algorithm
     parser.add_argument(
         "-cg",
@@ -51,6 +108,51 @@ def gen_arg_parser() -> ArgumentParser:
     parser.add_argument(
         "-cc", "--chaikin-coef", type=float, default=4.0, help="Chaikin coefficient"
     )
+    parser.add_argument(
+        "-uc",
+        "--until-converged",
+        type=float,
+        nargs="?",
+        const=DEFAULT_TOLERANCE,
+        default=None,
+        help=f"Stop the chaikin generations when the relative changes of the area, of the volume and the displacement of the surface are below this tolerance (default: {DEFAULT_TOLERANCE:g}). '-cg' is then the maximum number of generations (default: {DEFAULT_MAX_GENERATIONS})",
+    )
+    parser.add_argument(
+        "-ccs",
+        "--chaikin-coef-sweep",
+        type=float,
+        nargs="+",
+        default=None,
+        help="Chaikin coefficients of a sweep, separated by spaces (e.g. '-ccs 3 5'): the generations are computed once, then evaluated for each coefficient (one output per coefficient, suffixed with '_cc<coef>')",
+    )
+    parser.add_argument(
+        "-so",
+        "--split-objects",
+        type=str,
+        default=None,
+        help='Split the input \'.obj\' scene ["objects": "o"/"g" statements, "components": connected parts of each object] and subdivide each part in a worker process (\'.obj\' output, with the object names)',
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=None,
+        help="Number of worker processes for the split objects (default: number of CPUs)",
+    )
+    parser.add_argument(
+        "-ooc",
+        "--out-of-core",
+        type=str,
+        default=None,
+        help="Directory of the memory-mapped generations: apply the chaikin generations out-of-core, one chunk at a time (no plot, '.obj', '.ply' or '.c3m' output)",
+    )
+    parser.add_argument(
+        "-ls",
+        "--limit-surface",
+        type=int,
+        default=None,
+        help="Number of points per face corner: sample the limit surface of the chaikin generations instead of computing them ('-cg': generations computed before sampling, default: 1; no plot, '.obj', '.ply', '.stl' or '.glb' output)",
+    )
     parser.add_argument(
         "-oe",
         "--order-edges",
@@ -60,6 +162,12 @@ def gen_arg_parser() -> ArgumentParser:
     )
     parser.add_argument("-v", "--verbose", help="verbose mode", action="store_true")
     parser.add_argument("-vv", "--vverbose", help="very-verbose", action="store_true")
+    parser.add_argument(
+        "-co",
+        "--count-operations",
+        help="Count the linear scans of the VirtualSet/VirtualDict containers and the Node/Edge/Triangle comparisons, per call site, and print a ranked report at the end (also enabled by the CHAIKIN3D_COUNT_OPERATIONS environment variable)",
+        action="store_true",
+    )
     # what to plot
     parser.add_argument(
         "-r",
@@ -87,6 +195,12 @@ def gen_arg_parser() -> ArgumentParser:
         help='Show the graphical edges (for plots: "simple", "full" and "evolution")',
         action="store_true",
     )
+    parser.add_argument(
+        "-pe",
+        "--pipelined-evolution",
+        help='Compute the next generation in a worker process while the current one is drawn (for plot: "evolution")',
+        action="store_true",
+    )
     # how to plot
     parser.add_argument(
         "-a",
@@ -121,7 +235,19 @@ def gen_arg_parser() -> ArgumentParser:
         "--output",
         type=str,
         default=None,
-        help="Output file path (wavefront '.obj' or '.html' format)",
+        help="Output file path (wavefront '.obj', '.obj.gz', '.obj.xz', chaikin3d binary '.c3m', binary '.ply', binary '.stl', '.glb' or '.html' format)",
+    )
+    parser.add_argument(
+        "-gg",
+        "--glb-generations",
+        help="Store every chaikin generation in the '.glb' output (one mesh primitive per generation)",
+        action="store_true",
+    )
+    parser.add_argument(
+        "-gn",
+        "--glb-normals",
+        help="Compute the vertex normals for the '.glb' output",
+        action="store_true",
     )
 
     return parser
@@ -168,11 +294,102 @@ def read_args(arg_parser: ArgumentParser, /, *,  cmd_args: str = '') -> dict[str
         f'Invalid value for "order-edges" option: {args["order edges"]}'
     )
 
+    # input file
+    assert args["input"].endswith(
+        INPUT_EXTENSIONS
+    ), f"Invalid file extension: '{args['input']}'. Must end with one of {INPUT_EXTENSIONS}"
+    assert not args["repair"] or args["input"].endswith(OBJ_EXTENSIONS), ArgumentError(
+        "Only the '.obj' input files can be repaired"
+    )
+    assert not args["merge coplanar"] or args["input"].endswith(OBJ_EXTENSIONS), ArgumentError(
+        "Only the coplanar faces of the '.obj' input files can be merged"
+    )
+
+    # precision
+    assert args["precision"] in (32, 64), ArgumentError(
+        f'Invalid value for "precision" option: {args["precision"]}'
+    )
+
     # output file
     if args["output"] is not None:
-        assert args["output"].endswith(".obj") or args["output"].endswith(
-            ".html"
-        ), f"Invalid file extension: '{args['output']}'. Must end with '.obj' or '.html'"
+        assert args["output"].endswith(
+            OUTPUT_EXTENSIONS
+        ), f"Invalid file extension: '{args['output']}'. Must end with one of {OUTPUT_EXTENSIONS}"
+
+    # chaikin coefficient sweep
+    if args["chaikin coef sweep"]:
+        assert all(coef > 2 for coef in args["chaikin coef sweep"]), ArgumentError(
+            f'Chaikin coefficients must be greater than 2: {args["chaikin coef sweep"]}'
+        )
+        assert args["plot"] in ("none", "simple"), ArgumentError(
+            'A chaikin coefficient sweep can only be used with the "none" and "simple" plots'
+        )
+        assert not args["glb generations"], ArgumentError(
+            "A chaikin coefficient sweep only saves the last generation"
+        )
+
+    # convergence-based number of generations
+    if args["until converged"] is not None:
+        assert args["until converged"] > 0, ArgumentError(
+            f'Invalid value for "until-converged" option: {args["until converged"]} (must be positive)'
+        )
+        assert args["plot"] not in ("evolution", "animation"), ArgumentError(
+            'The convergence-based generations cannot be used with the "evolution" and "animation" plots'
+        )
+        assert not (
+            args["chaikin coef sweep"] or args["out of core"] is not None or args["precision report"]
+        ), ArgumentError("The convergence-based generations cannot be used with -ccs, -ooc or -prr")
+
+    # limit surface
+    if args["limit surface"] is not None:
+        assert args["limit surface"] > 0, ArgumentError(
+            f'Invalid value for "limit-surface" option: {args["limit surface"]} (must be positive)'
+        )
+        assert args["plot"] == "none", ArgumentError('The limit surface can only be used with the "none" plot')
+        assert args["output"] is None or args["output"].endswith(LIMIT_SURFACE_EXTENSIONS), ArgumentError(
+            f"Invalid output for the limit surface: '{args['output']}'. Must end with one of {LIMIT_SURFACE_EXTENSIONS}"
+        )
+        assert not (
+            args["chaikin coef sweep"]
+            or args["out of core"] is not None
+            or args["until converged"] is not None
+            or args["precision report"]
+            or args["glb generations"]
+        ), ArgumentError("The limit surface cannot be used with -ccs, -ooc, -uc, -prr or -gg")
+
+    # out-of-core generations
+    if args["out of core"] is not None:
+        assert args["plot"] == "none", ArgumentError(
+            'The out-of-core generations can only be used with the "none" plot'
+        )
+        assert args["output"] is None or args["output"].endswith(OUT_OF_CORE_EXTENSIONS), ArgumentError(
+            f"Invalid output for the out-of-core generations: '{args['output']}'. Must end with one of {OUT_OF_CORE_EXTENSIONS}"
+        )
+        assert not args["chaikin coef sweep"] and not args["glb generations"], ArgumentError(
+            "The out-of-core generations only save the last generation"
+        )
+
+    # split objects
+    if args["split objects"] is not None:
+        assert args["split objects"] in ("objects", "components"), ArgumentError(
+            f'Invalid value for "split-objects" option: {args["split objects"]}'
+        )
+        assert args["input"].endswith(OBJ_EXTENSIONS), ArgumentError("Only the '.obj' input files can be split")
+        assert args["plot"] == "none", ArgumentError('The split objects can only be used with the "none" plot')
+        assert args["output"] is None or args["output"].endswith(OBJ_EXTENSIONS), ArgumentError(
+            f"Invalid output for the split objects: '{args['output']}'. Must be a '.obj' file (object names)"
+        )
+        assert not (
+            args["chaikin coef sweep"]
+            or args["out of core"]
+            or args["precision report"]
+            or args["glb generations"]
+            or args["until converged"] is not None
+            or args["limit surface"] is not None
+        ), ArgumentError("The split objects cannot be used with -ccs, -ooc, -prr, -gg, -uc or -ls")
+    assert args["jobs"] is None or args["jobs"] > 0, ArgumentError(
+        f'Invalid value for "jobs" option: {args["jobs"]}'
+    )
 
     # verbosity level
     if args["vverbose"]:
@@ -186,18 +403,46 @@ def read_args(arg_parser: ArgumentParser, /, *,  cmd_args: str = '') -> dict[str
     # add 'show-main-edges' value, based on 'hide-main-edges'
     args["show main edges"] = not args["hide main edges"]
 
-    # renderer
-    if args["renderer"] == "plotly":
-        from chaikin3d.plotly_renderer import Renderer
-    elif args["renderer"] == "mpl":
-        from chaikin3d.mpl_renderer import Renderer
-    else:
+    # renderer (only imported when something is drawn, see 'get_renderer_class')
+    if args["renderer"] not in RENDERERS:
         raise ArgumentError(f'Unkown renderer: {args["renderer"]}')
-    args["renderer class"] = Renderer
 
     A = type(
         "A",
         (),
-        {**{"__getitem__": lambda self, value: args[value]}, **dict((k.replace(" ", "_"), v) for k, v in args.items())}
+        {
+            **{
+                "__getitem__": lambda self, value: args[value],
+                "renderer_class": property(lambda self: get_renderer_class(args["renderer"])),
+            },
+            **dict((k.replace(" ", "_"), v) for k, v in args.items()),
+        }
     )
     return A()
+
+
+def get_renderer_class(renderer: str) -> type:
+    """
+    Import and return the Renderer class of the given renderer.
+
+    The renderer modules import heavy plotting libraries (plotly, matplotlib),
+    so they are only imported when a renderer is actually needed.
+
+    Args:
+        renderer (str): Renderer name ("plotly", "mpl").
+
+    Returns:
+        type: Renderer class.
+
+    Raises:
+        ArgumentError: The specified renderer is not known
+
+    """
+
+    if renderer == "plotly":
+        from chaikin3d.plotly_renderer import Renderer
+    elif renderer == "mpl":
+        from chaikin3d.mpl_renderer import Renderer
+    else:
+        raise ArgumentError(f"Unkown renderer: {renderer}")
+    return Renderer
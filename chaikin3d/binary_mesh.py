@@ -0,0 +1,195 @@
+# -*- coding: utf-8 -*-
+""" chaikin3d/binary_mesh.py """
+
+from __future__ import annotations
+import mmap
+import struct
+from typing import IO
+
+import numpy as np
+
+from chaikin3d.polyhedron import Polyhedron
+
+
+__all__ = [
+    'EXTENSION',
+    'BinaryMeshError',
+    'write_binary_mesh',
+    'load_binary_mesh',
+    'save_polyhedron',
+    'load_polyhedron',
+]
+
+
+EXTENSION = ".c3m"
+MAGIC = b"C3DMESH\x00"
+VERSION = 1
+# alignment of the data blocks in the file (in bytes)
+ALIGNMENT = 64
+# header: magic, version, number of blocks, flags
+_HEADER = struct.Struct("<8sIIQ")
+# block directory entry: name, dtype, rows, columns, offset
+_BLOCK = struct.Struct("<32s8sQQQ")
+# header flags
+FLAG_EDGES_ORDERED = 1
+
+# the only blocks that are always present
+REQUIRED_BLOCKS = ("vertices", "face_offsets", "face_indices")
+OPTIONAL_BLOCKS = ("edges", "edge_types", "edge_order_offsets", "edge_order_indices")
+
+
+class BinaryMeshError(Exception):
+    """
+    Simple class, representing an invalid binary mesh file.
+
+    """
+
+
+def _align(position: int) -> int:
+    return -(-position // ALIGNMENT) * ALIGNMENT
+
+
+def write_binary_mesh(stream: IO, blocks: dict[str, np.ndarray], flags: int = 0) -> None:
+    """
+    Write arrays to a binary stream, using the chaikin3d binary mesh format.
+
+    The file is made of a header, a directory of blocks (name, dtype, shape,
+    offset), then the raw little-endian data of each block, aligned on
+    'ALIGNMENT' bytes so that it can be memory-mapped.
+
+    Args:
+        stream (IO)                   : Binary stream.
+        blocks (dict[str, np.ndarray]): 1D or 2D arrays, by block name.
+        flags  (int)                  : Header flags (e.g. FLAG_EDGES_ORDERED).
+
+    """
+
+    arrays = {
+        name: np.ascontiguousarray(array, dtype=array.dtype.newbyteorder("<"))
+        for name, array in blocks.items()
+    }
+    position = _align(_HEADER.size + _BLOCK.size * len(arrays))
+    directory = []
+    for name, array in arrays.items():
+        assert array.ndim in (1, 2), f"Invalid block shape: {name} {array.shape}"
+        assert len(name) <= 32, f"Block name is too long: {name}"
+        rows, cols = array.shape[0], (array.shape[1] if array.ndim == 2 else 0)
+        directory.append(
+            _BLOCK.pack(name.encode(), array.dtype.str.encode(), rows, cols, position)
+        )
+        position = _align(position + array.nbytes)
+
+    stream.write(_HEADER.pack(MAGIC, VERSION, len(arrays), flags))
+    stream.write(b"".join(directory))
+    position = _HEADER.size + _BLOCK.size * len(arrays)
+    for entry, array in zip(directory, arrays.values()):
+        offset = _BLOCK.unpack(entry)[-1]
+        stream.write(b"\x00" * (offset - position))
+        stream.write(array.data)
+        position = offset + array.nbytes
+
+
+def load_binary_mesh(path: str, use_mmap: bool = True) -> tuple[dict[str, np.ndarray], int]:
+    """
+    Load the arrays of a binary mesh file, without copying them.
+
+    Args:
+        path     (str) : Path to the binary mesh file.
+        use_mmap (bool): Memory-map the file (read-only arrays). Otherwise, the
+                         file is read at once and the arrays are views of its bytes.
+
+    Returns:
+        tuple[dict[str, np.ndarray], int]: (arrays by block name, header flags).
+
+    Raises:
+        BinaryMeshError: Invalid or unsupported file.
+
+    """
+
+    with open(path, "rb") as f:
+        if use_mmap:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            buffer = f.read()
+    if len(buffer) < _HEADER.size:
+        raise BinaryMeshError(f"Truncated file: {path!r}")
+    magic, version, num_blocks, flags = _HEADER.unpack_from(buffer, 0)
+    if magic != MAGIC:
+        raise BinaryMeshError(f"Not a chaikin3d binary mesh: {path!r}")
+    if version > VERSION:
+        raise BinaryMeshError(f"Unsupported binary mesh version: {version} > {VERSION}")
+
+    blocks: dict[str, np.ndarray] = dict()
+    for i in range(num_blocks):
+        name, dtype, rows, cols, offset = _BLOCK.unpack_from(
+            buffer, _HEADER.size + i * _BLOCK.size
+        )
+        dtype = np.dtype(dtype.rstrip(b"\x00").decode())
+        array = np.frombuffer(buffer, dtype=dtype, count=rows * max(cols, 1), offset=offset)
+        blocks[name.rstrip(b"\x00").decode()] = array.reshape(rows, cols) if cols else array
+    for name in REQUIRED_BLOCKS:
+        if name not in blocks:
+            raise BinaryMeshError(f"Missing block {name!r} in {path!r}")
+    return blocks, flags
+
+
+def save_polyhedron(
+    poly: Polyhedron, path: str, dtype: np.dtype = None, edges: bool = True
+) -> None:
+    """
+    Save a polyhedron to a binary mesh file.
+
+    Args:
+        poly  (Polyhedron): Polyhedron to save.
+        path  (str)       : Output path.
+        dtype (np.dtype)  : Vertex precision (np.float32 or np.float64).
+                            Default: precision of the node coordinates.
+        edges (bool)      : Also save the edges (types and edge-list order).
+
+    """
+
+    vertices = poly.vertex_array()
+    if dtype is not None:
+        vertices = vertices.astype(dtype, copy=False)
+    face_offsets, face_indices = poly.face_arrays(ordered=edges)
+    blocks = {
+        "vertices": vertices,
+        "face_offsets": face_offsets,
+        "face_indices": face_indices,
+    }
+    flags = 0
+    if edges:
+        blocks.update(zip(OPTIONAL_BLOCKS, poly.edge_arrays()))
+        flags |= FLAG_EDGES_ORDERED if poly.edges_ordered else 0
+    with open(path, "wb") as f:
+        write_binary_mesh(f, blocks, flags)
+
+
+def load_polyhedron(
+    path: str, rotate: bool = False, verbose: bool = False, dtype: np.dtype = None
+) -> Polyhedron:
+    """
+    Load a polyhedron from a binary mesh file.
+
+    Args:
+        path    (str)     : Path to the binary mesh file.
+        rotate  (bool)    : Invert the y and z axes.
+        verbose (bool)    : Verbose.
+        dtype   (np.dtype): Vertex precision (np.float32 or np.float64).
+                            Default: precision stored in the file.
+
+    Returns:
+        Polyhedron: Loaded polyhedron.
+
+    """
+
+    blocks, flags = load_binary_mesh(path)
+    if rotate:
+        blocks["vertices"] = blocks["vertices"][:, [0, 2, 1]]
+    if dtype is not None:
+        blocks["vertices"] = blocks["vertices"].astype(dtype, copy=False)
+    return Polyhedron.from_arrays(
+        **{name: blocks.get(name) for name in REQUIRED_BLOCKS + OPTIONAL_BLOCKS},
+        edges_ordered=bool(flags & FLAG_EDGES_ORDERED),
+        verbose=verbose,
+    )
@@ -1,6 +1,9 @@
 # Chaikin3D - Groups module
 from __future__ import annotations
 from collections.abc import Iterable
+from functools import lru_cache
+
+import numpy as np
 
 import chaikin3d.edge as E
 import chaikin3d.node as N
@@ -31,7 +34,6 @@ class Group:
         self.ogroup = None
         self.ordered = False
         self.size = self.nodes.size
-        self._triangles: list[N.Triangle] = None
         # assert self.size > 2 # >= 3
         if do_order:
             self.order()
@@ -56,19 +58,19 @@ class Group:
         return self.nodes[index]
 
     @property
-    def triangles(self) -> list[N.Triangle]:
-        assert self._triangles is not None, "Group has not been interconnected"
-        return iter(self._triangles)
+    def triangles(self) -> Iterable[N.Triangle]:
+        assert self.ordered, "Group has not been ordered"
+        return (
+            N.Triangle(*(self.ogroup[i] for i in positions))
+            for positions in triangle_pattern(len(self.ogroup))
+        )
 
     def order(self, force: bool = False) -> None:
         """
-        Order a Group.
+        Order a Group (see 'ordered_nodes').
 
-        Order a Group based on node inter-connectivity. We start be taking a
-        node (any node), and looking for nodes in this Group in its main edges.
-        Once such a node/edge is found, we can propagate to this node, until
-        we meet the starting node.
-        Sets the 'ordered' attribute to True.
+        Sets the 'ordered' attribute to True. The 'ogroup' list is only set
+        once complete, so concurrent calls on a shared group are safe.
 
         Args:
             force (bool):
@@ -82,20 +84,38 @@ class Group:
 
         if not force and self.ordered:
             return
+        self.ogroup = self.ordered_nodes()
+        self.ordered = True
+
+    def ordered_nodes(self) -> list[N.Node]:
+        """
+        Returns the nodes of the Group, ordered. The Group is not modified.
+
+        Order the nodes based on node inter-connectivity. We start be taking a
+        node (any node), and looking for nodes in this Group in its main edges.
+        Once such a node/edge is found, we can propagate to this node, until
+        we meet the starting node.
+
+        Returns:
+            list[Node]: Ordered nodes.
+
+        Raises:
+            Exception: Broken Group (the nodes do not form a face).
+
+        """
+
         # trivial case
         if self.size < 3:
-            self.ogroup = self.nodes
-            self.ordered = True
-            return
+            return self.nodes
         # initialize variables
         group_list: list[N.Node] = list(self.nodes)
         current_node = group_list.pop()
-        self.ogroup = [current_node]
+        ogroup: list[N.Node] = [current_node]
         # connect the next ones (don't care if we go 'left' or 'right')
         while group_list:
             for index, remaining_node in enumerate(group_list):
                 if E.Edge.are_connected(current_node, remaining_node, "main"):
-                    self.ogroup.append(remaining_node)
+                    ogroup.append(remaining_node)
                     current_node = remaining_node
                     group_list.pop(index)
                     break
@@ -105,17 +125,16 @@ class Group:
                 print("group_list")
                 _debug_print_full_nodes(group_list)
                 print("ordered group")
-                _debug_print_full_nodes(self.ogroup)
+                _debug_print_full_nodes(ogroup)
                 print("group")
                 _debug_print_full_nodes(self.nodes)
                 # raise Exception('broken group')
                 print(
                     f"Warning: broken group found. attaching remaning nodes: {len(group_list)}"
                 )
-                self.ogroup.extend(group_list)
                 raise Exception("Broken group (see stdout for more info)")
 
-        self.ordered = True
+        return ogroup
 
     def cycle_connect(self, edge_type: str = "main") -> None:
         """
@@ -163,13 +182,75 @@ class Group:
                 prev_node = current_node
             # connect last one to first one
             self.ogroup[0].connect(prev_node, edge_type)
+        # the remaining polygon can still have 4 nodes (e.g. 7 nodes group)
+        core = self.ogroup[:: 2 ** max(num_iter, 0)]
+        for i in range(2, len(core) - 1):
+            core[0].connect(core[i], edge_type)
+
+
+@lru_cache(maxsize=None)
+def triangle_pattern(size: int) -> np.ndarray:
+    """
+    Returns the triangles of an inter-connected ordered group of 'size' nodes.
+
+    The triangles follow the edges created by 'Group.inter_connect': each level
+    of the inter-connection closes one triangle per skipped node, and the
+    remaining polygon is fan-triangulated.
+
+    Args:
+        size (int): Number of nodes in the group.
+
+    Returns:
+        np.ndarray:
+            Array of shape (size - 2, 3), containing the positions of
+            the nodes of each triangle in the ordered group.
+
+    """
+
+    triangles: list[tuple[int, int, int]] = list()
+    if size < 3:
+        return np.empty((0, 3), dtype=np.intp)
+    current: list[int] = list(range(size))
+    for _ in range(int(np.log2(size)) - 1):
+        num_current = len(current)
+        for j in range(1, num_current, 2):
+            triangles.append(
+                (current[j - 1], current[j], current[(j + 1) % num_current])
+            )
+        current = current[::2]
+    for i in range(1, len(current) - 1):
+        triangles.append((current[0], current[i], current[i + 1]))
+    pattern = np.array(triangles, dtype=np.intp).reshape(-1, 3)
+    pattern.flags.writeable = False
+    return pattern
+
+
+def triangulate(face_offsets: np.ndarray, face_indices: np.ndarray) -> np.ndarray:
+    """
+    Triangulate ordered faces given as arrays (see 'Polyhedron.face_arrays').
+
+    The faces are gathered by size, so that each size is triangulated in one
+    go, using the corresponding 'triangle_pattern'.
+
+    Args:
+        face_offsets (np.ndarray): (F + 1,) face offsets.
+        face_indices (np.ndarray): Vertex indices of the (ordered) faces.
+
+    Returns:
+        np.ndarray: (T, 3) array of vertex indices.
+
+    """
 
-    def calc_triangles(self) -> None:
-        assert self._triangles is None, "Triangles already calculated"
-        self._triangles = VirtualSet()
-        for node1 in self.nodes:
-            for node2 in (n for n in node1.partners if n in self.nodes):
-                for node3 in (
-                    n for n in node2.partners if n in self.nodes and n in node1.partners
-                ):
-                    self._triangles.add(N.Triangle(node1, node2, node3))
+    face_offsets = np.asarray(face_offsets)
+    face_indices = np.asarray(face_indices, dtype=np.intp)
+    face_sizes = np.diff(face_offsets)
+    # keep the order in which the sizes first appear
+    sizes, first_faces = np.unique(face_sizes, return_index=True)
+    triangles = []
+    for size in sizes[np.argsort(first_faces)].tolist():
+        starts = face_offsets[:-1][face_sizes == size]
+        faces = face_indices[starts[:, None] + np.arange(size)]
+        triangles.append(faces[:, triangle_pattern(size)].reshape(-1, 3))
+    if not triangles:
+        return np.empty((0, 3), dtype=np.intp)
+    return np.concatenate(triangles)
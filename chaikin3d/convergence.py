@@ -0,0 +1,223 @@
+# -*- coding: utf-8 -*-
+""" chaikin3d/convergence.py """
+
+from __future__ import annotations
+
+import numpy as np
+
+from chaikin3d.arg_utils import DEFAULT_MAX_GENERATIONS, DEFAULT_TOLERANCE
+from chaikin3d.polyhedron import Polyhedron
+from chaikin3d.validation import orient_faces
+
+
+__all__ = [
+    'DEFAULT_TOLERANCE',
+    'DEFAULT_MAX_GENERATIONS',
+    'MeshMeasures',
+    'ConvergenceReport',
+    'corner_displacement',
+    'subdivide_until_converged',
+]
+
+
+class MeshMeasures:
+    """
+    Surface area, enclosed volume and bounding box diagonal of a mesh.
+
+    The faces are triangulated as fans around their first vertex, so the
+    measures of the non-planar faces depend on that vertex. The volume is
+    only defined for closed and consistently oriented meshes (every edge
+    shared by exactly two faces, in opposite directions), it is None otherwise.
+
+    """
+
+    __slots__ = ("area", "volume", "diagonal")
+
+    def __init__(self, vertices: np.ndarray, face_offsets: np.ndarray, face_indices: np.ndarray):
+        vertices = np.asarray(vertices, dtype=np.float64)
+        face_sizes = np.diff(face_offsets)
+        face_of = np.repeat(np.arange(len(face_sizes)), face_sizes)
+        next_positions = np.arange(len(face_indices)) + 1
+        non_empty = face_sizes > 0
+        next_positions[face_offsets[1:][non_empty] - 1] = face_offsets[:-1][non_empty]
+        # fan triangles (first, current, next): the ones touching the first vertex are flat
+        firsts = vertices[face_indices[face_offsets[:-1][face_of]]]
+        currents = vertices[face_indices]
+        nexts = vertices[face_indices[next_positions]]
+        crosses = np.cross(currents - firsts, nexts - firsts)
+        self.area = float(np.linalg.norm(crosses, axis=1).sum() / 2)
+        self.diagonal = float(np.linalg.norm(np.ptp(vertices, axis=0))) if len(vertices) else 0.0
+        self.volume = None
+        a, b = face_indices, face_indices[next_positions]
+        valid = a != b
+        a, b = a[valid], b[valid]
+        _, edge_counts = np.unique(np.minimum(a, b) * len(vertices) + np.maximum(a, b), return_counts=True)
+        if not len(edge_counts) or (edge_counts != 2).any():
+            return
+        # the generations do not keep the winding of the faces
+        signs = np.where(orient_faces(len(vertices), face_offsets, face_indices), -1.0, 1.0)
+        flipped = signs[face_of[valid]] < 0
+        a, b = np.where(flipped, b, a), np.where(flipped, a, b)
+        if len(np.unique(a * len(vertices) + b)) != len(a):
+            # not orientable
+            return
+        # divergence theorem: sum of the signed volumes of the (origin, triangle) tetrahedra
+        volumes = np.einsum("ij,ij->i", firsts, np.cross(currents, nexts)) * signs[face_of]
+        self.volume = float(abs(volumes.sum()) / 6)
+
+    @staticmethod
+    def from_polyhedron(poly: Polyhedron, vertices: np.ndarray = None) -> MeshMeasures:
+        for group in poly.groups:
+            group.order()
+        if vertices is None:
+            vertices = poly.vertex_array()
+        return MeshMeasures(vertices, *poly.face_arrays(ordered=True))
+
+
+def _relative_change(old: float, new: float) -> float:
+    if old is None or new is None:
+        return None
+    return abs(new - old) / old if old else (0.0 if new == old else np.inf)
+
+
+def corner_displacement(
+    parent_pairs: tuple[np.ndarray, ...], old_vertices: np.ndarray, new_vertices: np.ndarray
+) -> float:
+    """
+    Returns an estimate of the Hausdorff distance between two Chaikin generations.
+
+    The new nodes lie on the edges of the previous generation, so the surface
+    only moves where the old nodes were cut off: each old node is replaced by
+    the group of its sub-nodes (see 'Polyhedron.Chaikin3D'). The distance from
+    an old node to the centroid of its sub-nodes is the depth of that cut.
+
+    Args:
+        parent_pairs (tuple[np.ndarray]): Parent pairs of the new generation
+                                          (see 'Polyhedron.parent_pairs').
+        old_vertices (np.ndarray)       : (N, 3) vertices of the previous generation.
+        new_vertices (np.ndarray)       : (M, 3) vertices of the new generation.
+
+    Returns:
+        float: Maximum distance from an old node to the centroid of its sub-nodes.
+
+    """
+
+    rows, currents, _, _ = parent_pairs
+    counts = np.bincount(currents, minlength=len(old_vertices))
+    cut = counts > 0
+    if not cut.any():
+        return 0.0
+    new_vertices = np.asarray(new_vertices, dtype=np.float64)
+    centroids = np.stack(
+        [np.bincount(currents, new_vertices[rows, axis], len(old_vertices)) for axis in range(3)], axis=1
+    )
+    centroids = centroids[cut] / counts[cut, None]
+    return float(np.linalg.norm(centroids - np.asarray(old_vertices, dtype=np.float64)[cut], axis=1).max())
+
+
+class ConvergenceReport:
+    """
+    Geometric changes between the successive generations (see
+    'subdivide_until_converged').
+
+    The changes of the area and of the volume are relative to the previous
+    generation, the displacement (see 'corner_displacement') is relative to
+    the bounding box diagonal.
+
+    """
+
+    __slots__ = ("tolerance", "rows", "converged")
+
+    def __init__(self, tolerance: float):
+        self.tolerance = tolerance
+        # (generation, number of vertices, area, volume, area change, volume change, displacement)
+        self.rows: list[tuple] = []
+        self.converged = False
+
+    def add(
+        self, generation: int, num_vertices: int, measures: MeshMeasures, previous: MeshMeasures, displacement: float
+    ) -> float:
+        """
+        Add a generation to the report.
+
+        Returns:
+            float: Largest change of the generation (None for generation zero).
+
+        """
+
+        if previous is None:
+            changes = (None, None, None)
+        else:
+            changes = (
+                _relative_change(previous.area, measures.area),
+                _relative_change(previous.volume, measures.volume),
+                displacement / previous.diagonal if previous.diagonal else 0.0,
+            )
+        self.rows.append((generation, num_vertices, measures.area, measures.volume) + changes)
+        known = [change for change in changes if change is not None]
+        return max(known) if known else None
+
+    @property
+    def generations(self) -> int:
+        return self.rows[-1][0] if self.rows else 0
+
+    def __str__(self) -> str:
+        def cell(value, width):
+            return f"{'-':>{width}}" if value is None else f"{value:>{width}.3e}"
+
+        lines = [
+            f"Convergence report (tolerance {self.tolerance:g}): "
+            + ("converged" if self.converged else "NOT converged")
+            + f" after {self.generations} generations",
+            f"{'generation':>10} {'vertices':>10} {'area':>12} {'volume':>12} "
+            f"{'area change':>12} {'vol. change':>12} {'displacement':>12}",
+        ]
+        for generation, num_vertices, *values in self.rows:
+            lines.append(
+                f"{generation:>10} {num_vertices:>10} " + " ".join(cell(value, 12) for value in values)
+            )
+        return "\n".join(lines)
+
+
+def subdivide_until_converged(
+    poly: Polyhedron, a: A, tolerance: float, max_generations: int, callback: callable = None
+) -> tuple[Polyhedron, ConvergenceReport]:
+    """
+    Apply the Chaikin3D Algorithm until the surface stops changing.
+
+    After each generation, the relative changes of the surface area, of the
+    enclosed volume (closed meshes only) and the displacement of the surface
+    (see 'corner_displacement') are measured with array operations. The
+    subdivision stops as soon as all of them are below the tolerance, or when
+    'max_generations' generations were computed.
+
+    Args:
+        poly            (Polyhedron): Polyhedron of generation zero.
+        a               (A)         : Chaikin options (see 'ChaikinOptions').
+        tolerance       (float)     : Largest accepted change (relative).
+        max_generations (int)       : Maximum number of chaikin generations.
+        callback        (callable)  : Called with each new generation (optional).
+
+    Returns:
+        tuple[Polyhedron, ConvergenceReport]: Last generation, and the changes
+                                              of all the generations.
+
+    """
+
+    report = ConvergenceReport(tolerance)
+    vertices = poly.vertex_array()
+    measures = MeshMeasures.from_polyhedron(poly, vertices)
+    report.add(0, len(vertices), measures, None, 0.0)
+    for generation in range(1, max_generations + 1):
+        poly = poly.Chaikin3D(a, parent_pairs=True)
+        if callback is not None:
+            callback(poly)
+        new_vertices = poly.vertex_array()
+        new_measures = MeshMeasures.from_polyhedron(poly, new_vertices)
+        displacement = corner_displacement(poly.parent_pairs, vertices, new_vertices)
+        change = report.add(generation, len(new_vertices), new_measures, measures, displacement)
+        vertices, measures = new_vertices, new_measures
+        if change <= tolerance:
+            report.converged = True
+            break
+    return poly, report
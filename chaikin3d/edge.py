@@ -4,6 +4,9 @@ from __future__ import annotations
 import chaikin3d.node as N
 
 
+EDGE_TYPES = ("main", "graphical")
+
+
 class Edge:
     """
     Edge between two Nodes.
@@ -0,0 +1,255 @@
+# -*- coding: utf-8 -*-
+""" chaikin3d/instrumentation.py """
+
+from __future__ import annotations
+import atexit
+import os
+import sys
+
+import chaikin3d.edge as E
+import chaikin3d.node as N
+from chaikin3d import dataholders
+from chaikin3d.dataholders import VirtualDict, VirtualSet
+
+
+__all__ = [
+    'ENVIRONMENT_VARIABLE',
+    'REPORT_ROWS',
+    'OperationReport',
+    'enable',
+    'disable',
+    'is_enabled',
+    'reset',
+    'report',
+    'enable_from_environment',
+]
+
+
+# set to a non-empty value (other than "0"), the operations of the whole process are counted
+ENVIRONMENT_VARIABLE = "CHAIKIN3D_COUNT_OPERATIONS"
+# number of call sites shown in the reports
+REPORT_ROWS = 25
+
+# (operation, call site) -> [calls, items (scanned or compared)]
+_counts: dict[tuple[str, str], list[int]] = dict()
+# (class, method name) -> original method (None: not defined by the class)
+_originals: dict[tuple[type, str], callable] = dict()
+# the call site of an operation is the first frame outside of these files
+_SKIPPED_FILES = frozenset((dataholders.__file__, __file__))
+
+
+def _call_site() -> str:
+    frame = sys._getframe(2)
+    while frame is not None and frame.f_code.co_filename in _SKIPPED_FILES:
+        frame = frame.f_back
+    if frame is None:
+        return "?"
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{frame.f_lineno} ({code.co_name})"
+
+
+def _count(operation: str, items: int) -> None:
+    key = (operation, _call_site())
+    counts = _counts.get(key)
+    if counts is None:
+        _counts[key] = [1, items]
+    else:
+        counts[0] += 1
+        counts[1] += items
+
+
+#
+# Counted versions of the methods. The items of a linear scan are the elements
+# of the container (an upper bound: a scan stops at the first match), an
+# equality call compares one item
+#
+
+
+def _virtual_set_init(self, iterable=None):
+    _originals[(VirtualSet, "__init__")](self, iterable)
+    if iterable:
+        if type(iterable) == VirtualSet or type(iterable) == set:
+            _count("VirtualSet copy", self.size)
+        else:
+            # each element is looked for in the ones already added
+            _count("VirtualSet membership (init)", self.size * (self.size - 1) // 2)
+
+
+def _virtual_set_contains(self, value) -> bool:
+    _count("VirtualSet membership (in)", self.size)
+    return value in self.data
+
+
+def _virtual_set_add(self, value, verify: bool = True) -> None:
+    if verify:
+        _count("VirtualSet membership (add)", self.size)
+    return _originals[(VirtualSet, "add")](self, value, verify)
+
+
+def _virtual_set_eq(self, other: VirtualSet) -> bool:
+    _count("VirtualSet comparison", self.size * len(other.data))
+    return _originals[(VirtualSet, "__eq__")](self, other)
+
+
+def _virtual_set_copy(self) -> VirtualSet:
+    _count("VirtualSet copy", self.size)
+    return _originals[(VirtualSet, "copy")](self)
+
+
+def _virtual_dict_setitem(self, key, value) -> None:
+    _count("VirtualDict membership (set)", self.size)
+    _originals[(VirtualDict, "__setitem__")](self, key, value)
+
+
+def _virtual_dict_getitem(self, key):
+    _count("VirtualDict membership (get)", self.size)
+    return _originals[(VirtualDict, "__getitem__")](self, key)
+
+
+def _virtual_dict_contains_key(self, key) -> bool:
+    _count("VirtualDict membership (key)", self.size)
+    return _originals[(VirtualDict, "contains_key")](self, key)
+
+
+def _virtual_dict_contains_value(self, value) -> bool:
+    _count("VirtualDict membership (value)", self.size)
+    return _originals[(VirtualDict, "contains_value")](self, value)
+
+
+def _equality(cls: type) -> callable:
+    operation = f"{cls.__name__}.__eq__"
+    original = cls.__eq__
+
+    def __eq__(self, other) -> bool:
+        _count(operation, 1)
+        return original(self, other)
+
+    return __eq__
+
+
+def _counted_methods() -> dict[tuple[type, str], callable]:
+    return {
+        (VirtualSet, "__init__"): _virtual_set_init,
+        (VirtualSet, "__contains__"): _virtual_set_contains,
+        (VirtualSet, "add"): _virtual_set_add,
+        (VirtualSet, "__eq__"): _virtual_set_eq,
+        (VirtualSet, "copy"): _virtual_set_copy,
+        (VirtualDict, "__setitem__"): _virtual_dict_setitem,
+        (VirtualDict, "__getitem__"): _virtual_dict_getitem,
+        (VirtualDict, "contains_key"): _virtual_dict_contains_key,
+        (VirtualDict, "contains_value"): _virtual_dict_contains_value,
+        (N.Node, "__eq__"): _equality(N.Node),
+        (E.Edge, "__eq__"): _equality(E.Edge),
+        (N.Triangle, "__eq__"): _equality(N.Triangle),
+    }
+
+
+def enable() -> None:
+    """
+    Start counting the operations of the VirtualSet and VirtualDict containers
+    (membership checks, comparisons and copies) and the equality calls of the
+    Node, Edge and Triangle classes, per call site.
+
+    The methods of these classes are replaced by counted versions, until
+    'disable' is called: the operations cost nothing more while the counters
+    are disabled. Only the operations of the current process are counted
+    (not the ones of the worker processes), and the counts of concurrent
+    threads are approximate.
+
+    """
+
+    if _originals:
+        return
+    for (cls, name), method in _counted_methods().items():
+        _originals[(cls, name)] = cls.__dict__.get(name)
+        setattr(cls, name, method)
+
+
+def disable() -> None:
+    """
+    Restore the original methods (see 'enable'). The counts are kept.
+
+    """
+
+    for (cls, name), original in _originals.items():
+        if original is None:
+            delattr(cls, name)
+        else:
+            setattr(cls, name, original)
+    _originals.clear()
+
+
+def is_enabled() -> bool:
+    return bool(_originals)
+
+
+def reset() -> None:
+    _counts.clear()
+
+
+class OperationReport:
+    """
+    Operations counted per call site (see 'enable'), ranked by the number of
+    items they scanned or compared (their cost), then by the number of calls.
+
+    """
+
+    __slots__ = ("rows", "total_calls", "total_items", "num_sites")
+
+    def __init__(self, counts: dict[tuple[str, str], list[int]], rows: int = REPORT_ROWS):
+        ranked = sorted(counts.items(), key=lambda item: (-item[1][1], -item[1][0], item[0]))
+        # (calls, items, operation, call site)
+        self.rows: list[tuple[int, int, str, str]] = [
+            (calls, items, operation, site) for (operation, site), (calls, items) in ranked[:rows]
+        ]
+        self.total_calls = sum(calls for calls, _ in counts.values())
+        self.total_items = sum(items for _, items in counts.values())
+        self.num_sites = len(counts)
+
+    def __str__(self) -> str:
+        lines = [
+            f"Operation counts: {self.total_calls} calls, {self.total_items} items scanned or compared"
+            f" ({len(self.rows)}/{self.num_sites} call sites)",
+            f"{'calls':>12} {'items':>14}  {'operation':<32} call site",
+        ]
+        for calls, items, operation, site in self.rows:
+            lines.append(f"{calls:>12} {items:>14}  {operation:<32} {site}")
+        return "\n".join(lines)
+
+
+def report(rows: int = REPORT_ROWS) -> OperationReport:
+    """
+    Returns the report of the operations counted so far.
+
+    Args:
+        rows (int): Number of call sites in the report (the most expensive ones).
+
+    Returns:
+        OperationReport: Ranked counts.
+
+    """
+
+    return OperationReport(_counts, rows)
+
+
+def _print_report_at_exit() -> None:
+    if _counts:
+        print(report(), file=sys.stderr)
+
+
+def enable_from_environment() -> bool:
+    """
+    Enable the counters if the CHAIKIN3D_COUNT_OPERATIONS environment
+    variable is set, and print the report to stderr at exit.
+
+    Returns:
+        bool: The counters were enabled.
+
+    """
+
+    if os.environ.get(ENVIRONMENT_VARIABLE, "0") in ("", "0"):
+        return False
+    if not is_enabled():
+        enable()
+        atexit.register(_print_report_at_exit)
+    return True
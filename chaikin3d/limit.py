@@ -0,0 +1,205 @@
+# -*- coding: utf-8 -*-
+""" chaikin3d/limit.py """
+
+from __future__ import annotations
+from functools import lru_cache
+
+import numpy as np
+
+from chaikin3d.out_of_core import chaikin_generation, close_mesh
+from chaikin3d.polyhedron import chaikin_ratios
+
+
+__all__ = [
+    'limit_stencil',
+    'limit_surface',
+]
+
+
+@lru_cache(maxsize=None)
+def limit_stencil(coef: float, levels: int) -> np.ndarray:
+    """
+    Returns the weights of the limit points of a corner of a polygon.
+
+    The Chaikin3D Algorithm cuts the corners of each face (a + (b - a) / coef
+    on each edge), so the faces of the successive generations coming from a
+    face converge to the limit curve of the 1D corner cutting of its polygon.
+    The midpoint of an edge is kept by the cuts (the edge keeps its middle
+    part), so the midpoints of the edges of every refinement are exact points
+    of the limit curve. The part of the curve around the corner B of the
+    polygon (..., A, B, C, ...), from the middle of AB to the middle of BC,
+    only depends on A, B and C: it is sampled by refining (A, B, C) 'levels'
+    times, once for all the corners.
+
+    Args:
+        coef   (float): Chaikin coefficient (must be greater than 2).
+        levels (int)  : Number of refinements of the corner.
+
+    Returns:
+        np.ndarray: (2 ** levels, 3) weights of (A, B, C), from the middle of AB
+                    (included) to the middle of BC (excluded), read-only.
+
+    """
+
+    base_ratio, _ = chaikin_ratios(coef)
+    points = np.eye(3)
+    for _ in range(levels):
+        starts, ends = points[:-1], points[1:]
+        refined = np.empty((2 * len(starts), 3))
+        refined[0::2] = base_ratio * starts + (1 - base_ratio) * ends
+        refined[1::2] = (1 - base_ratio) * starts + base_ratio * ends
+        points = refined
+    stencil = ((points[:-1] + points[1:]) / 2)[:-1]
+    stencil.flags.writeable = False
+    return stencil
+
+
+def limit_surface(
+    vertices: np.ndarray,
+    face_offsets: np.ndarray,
+    face_indices: np.ndarray,
+    *,
+    density: int = 4,
+    coef: float = 4.0,
+    generations: int = 1,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Returns a triangulation of the limit surface of the Chaikin3D Algorithm,
+    sampled at a given density instead of iterating the generations.
+
+    After the first generation (see 'out_of_core.chaikin_generation'), every
+    vertex is shared by three faces, and the faces of all the next generations
+    are cut from these ones: each face converges to the region bounded by the
+    limit curve of its polygon, sampled exactly with 'limit_stencil'. Each
+    region is triangulated as a fan around the centroid of its face. The
+    limit curves of the three faces around a vertex touch at the middle of
+    their common edges, the small region left between them (where the next
+    generations keep cutting) is triangulated as a fan around the centroid
+    of the face that replaces the vertex in the next generation. The limit
+    curves go through the middle of the edges, so the triangulation is
+    watertight.
+
+    The output size is chosen with the density: about 6 * H * density
+    triangles (H: sum of the face sizes of the sampled generation, three times
+    the one of the input mesh per generation), the memory is linear in the
+    output size. The regions between the faces shrink with each generation,
+    'generations' trades the size for the accuracy of their flat triangulation.
+
+    Args:
+        vertices     (np.ndarray): (N, 3) vertices.
+        face_offsets (np.ndarray): (F + 1,) face offsets.
+        face_indices (np.ndarray): Vertex indices of all the faces.
+        density      (int)       : Number of limit points per corner of the sampled
+                                   generation (rounded up to a power of two).
+        coef         (float)     : Chaikin coefficient (must be greater than 2).
+        generations  (int)       : Number of generations computed before sampling
+                                   (at least one).
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: (M, 3) vertices (dtype of the input
+                                       vertices) and (T, 3) triangles.
+
+    Raises:
+        ValueError: Invalid chaikin coefficient or density, or the mesh is not
+                    a consistently oriented manifold (see 'out_of_core.close_mesh').
+
+    """
+
+    if coef <= 2:
+        raise ValueError(f"Chaikin coefficient must be greater than 2 ({coef} > 2)")
+    if density < 1:
+        raise ValueError(f"Density must be positive ({density} >= 1)")
+    if generations < 1:
+        raise ValueError(f"At least one generation is needed ({generations} >= 1)")
+    vertices = np.asarray(vertices)
+    stencil = limit_stencil(float(coef), int(np.ceil(np.log2(density))))
+    num_samples = len(stencil)
+
+    # generations, as closed half-edge meshes
+    closed_offsets, closed_indices, twins = close_mesh(face_offsets, face_indices)
+    generation = {
+        "vertices": vertices.astype(np.float64),
+        "face_offsets": closed_offsets,
+        "face_indices": closed_indices,
+        "twins": twins,
+        "surface_faces": np.array([len(face_offsets) - 1]),
+    }
+    for _ in range(generations):
+        previous_generation, generation = generation, chaikin_generation(generation, None, coef)
+    points, offsets = generation["vertices"], generation["face_offsets"]
+    corners, twins = generation["face_indices"], generation["twins"]
+    num_surface_faces = int(generation["surface_faces"][0])
+    num_faces, num_corners = len(offsets) - 1, len(corners)
+
+    # previous and next corner of each corner, in its face
+    face_sizes = np.diff(offsets)
+    face_of = np.repeat(np.arange(num_faces), face_sizes)
+    positions = np.arange(num_corners) - offsets[face_of]
+    previous = offsets[face_of] + (positions - 1) % face_sizes[face_of]
+    next_ = offsets[face_of] + (positions + 1) % face_sizes[face_of]
+
+    # limit points: the middle of each edge (once per edge), then the other points of each corner
+    canonical = np.minimum(np.arange(num_corners), twins)
+    is_canonical = canonical == np.arange(num_corners)
+    edge_points = np.cumsum(is_canonical) - 1
+    corner_points = np.einsum(
+        "sk,kcd->csd", stencil, np.stack((points[corners[previous]], points[corners], points[corners[next_]]))
+    )
+    samples = np.empty((num_corners, num_samples), dtype=np.int64)
+    samples[:, 0] = edge_points[canonical[previous]]
+    num_edges = int(is_canonical.sum())
+    samples[:, 1:] = num_edges + np.arange(num_corners * (num_samples - 1)).reshape(num_corners, -1)
+    following = np.concatenate((samples[:, 1:], samples[next_, :1]), axis=1)
+
+    # face regions: fans around the face centroids
+    centroids = np.stack(
+        [np.bincount(face_of, points[corners, axis], num_faces) for axis in range(3)], axis=1
+    ) / face_sizes[:, None]
+    first_center = num_edges + num_corners * (num_samples - 1)
+    surface = face_of < num_surface_faces
+    face_triangles = np.stack(
+        (
+            np.broadcast_to((first_center + face_of[surface])[:, None], following[surface].shape),
+            samples[surface],
+            following[surface],
+        ),
+        axis=2,
+    ).reshape(-1, 3)
+
+    # regions between the faces: one per vertex, bounded by its three corners
+    # (k -> next(twin(k)) turns around the vertex, the first corner is in the vertex face)
+    vertex_corners = np.empty(len(points), dtype=np.int64)
+    num_vertex_corners = len(previous_generation["face_indices"])
+    vertex_corners[corners[:num_vertex_corners]] = np.arange(num_vertex_corners)
+    around = [vertex_corners]
+    for _ in range(2):
+        around.append(next_[twins[around[-1]]])
+    around = np.stack(around, axis=1)
+    if np.any(next_[twins[around[:, 2]]] != around[:, 0]):
+        raise ValueError("Invalid generation (vertices shared by more than three faces)")
+    around = around[(face_of[around] < num_surface_faces).all(axis=1)]
+    ring = samples[around].reshape(len(around), -1)
+    first_gap_center = first_center + num_faces
+    gap_triangles = np.stack(
+        (
+            np.broadcast_to((first_gap_center + np.arange(len(around)))[:, None], ring.shape),
+            np.roll(ring, -1, axis=1),
+            ring,
+        ),
+        axis=2,
+    ).reshape(-1, 3)
+
+    new_vertices = np.empty((first_gap_center + len(around), 3))
+    new_vertices[samples[:, 0]] = corner_points[:, 0]
+    new_vertices[num_edges:first_center] = corner_points[:, 1:].reshape(-1, 3)
+    new_vertices[first_center:first_gap_center] = centroids
+    # centroid of the face of the next generation around the vertex
+    gap_vertices = points[corners[around[:, 0]]]
+    neighbors = points[corners[next_[around]]].mean(axis=1)
+    new_vertices[first_gap_center:] = gap_vertices + (neighbors - gap_vertices) / coef
+    # remove the points of the hole faces
+    triangles = np.concatenate((face_triangles, gap_triangles))
+    used = np.zeros(len(new_vertices), dtype=bool)
+    used[triangles] = True
+    new_indices = np.cumsum(used) - 1
+    return new_vertices[used].astype(vertices.dtype), new_indices[triangles]
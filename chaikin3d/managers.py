@@ -1,9 +1,11 @@
 # -*- coding: utf-8 -*-
 """ chaikin3d/managers.py """
 
-from chaikin3d import plotting
-from chaikin3d.arg_utils import gen_arg_parser, read_args
-from chaikin3d.polyhedron import Polyhedron
+import numpy as np
+
+from chaikin3d import binary_mesh, convergence, instrumentation, limit, out_of_core, precision, scene, sweep, validation, writers
+from chaikin3d.arg_utils import OUTPUT_EXTENSIONS, gen_arg_parser, get_renderer_class, read_args
+from chaikin3d.polyhedron import ChaikinOptions, Polyhedron
 from chaikin3d.wavefront_reader import WaveFrontReader
 
 
@@ -36,63 +38,370 @@ class ChaikinMGR:
 
         self.cmd_args = cmd_args
         self.a_args = None
+        # the operations of this run are counted (see 'instrumentation')
+        self.count_operations = False
 
-    def __call__(self, *, plot: bool = False) -> Polyhedron:
+    def __call__(self, *, plot: bool = False) -> Polyhedron | list[scene.SceneObject]:
         assert isinstance(plot, bool), type(plot)
 
-        polyhedron = self.process()
+        try:
+            polyhedron = self.process()
 
-        if plot:
-            self.plot(polyhedron)
+            if plot:
+                self.plot(polyhedron)
+        finally:
+            if self.count_operations:
+                instrumentation.disable()
+                print(instrumentation.report())
+                instrumentation.reset()
 
         return polyhedron
 
-    def process(self) -> Polyhedron:
+    def process(self) -> Polyhedron | list[scene.SceneObject]:
         arg_parser = gen_arg_parser()
         # a : command-line arguments
         self.a_args = read_args(arg_parser, cmd_args=self.cmd_args)
+        # with the environment variable, the report is printed at exit instead
+        instrumentation.enable_from_environment()
+        self.count_operations = self.a_args.count_operations and not instrumentation.is_enabled()
+        if self.count_operations:
+            instrumentation.enable()
+
+        # scene: the objects are prepared and subdivided independently (see 'plot_objects')
+        if self.a_args.split_objects:
+            reader = WaveFrontReader(
+                self.a_args.input,
+                True,
+                self.a_args.rotate_mesh,
+                self.a_args.verbosity,
+                None,
+                precision.PRECISIONS[self.a_args.precision],
+            )
+            objects = reader.split(self.a_args.split_objects)
+            print(f"{len(objects)} objects in {self.a_args.input!r}")
+            return objects
 
         # input file
-        reader = WaveFrontReader(self.a_args.input, True, self.a_args.rotate_mesh, self.a_args.verbosity)
-        poly = reader.to_polyhedron()
+        if self.a_args.input.endswith(binary_mesh.EXTENSION):
+            poly = binary_mesh.load_polyhedron(
+                self.a_args.input,
+                self.a_args.rotate_mesh,
+                self.a_args.verbosity,
+                precision.PRECISIONS[self.a_args.precision],
+            )
+            if self.a_args.validate:
+                self.validate(poly.vertex_array(), *poly.face_arrays(ordered=True))
+        else:
+            reader = WaveFrontReader(
+                self.a_args.input,
+                True,
+                self.a_args.rotate_mesh,
+                self.a_args.verbosity,
+                self.a_args.weld_vertices,
+                precision.PRECISIONS[self.a_args.precision],
+            )
+            if self.a_args.repair:
+                reader.set_arrays(*validation.repair_mesh(*reader.arrays()))
+            if self.a_args.merge_coplanar:
+                reader.merge_coplanar()
+            if self.a_args.validate or self.a_args.repair:
+                self.validate(*reader.arrays())
+            poly = reader.to_polyhedron()
+
+        if self.a_args.precision_report:
+            print(
+                precision.compare_precisions(
+                    poly.snapshot(), self.a_args, self.a_args.chaikin_generations
+                )
+            )
 
         return poly
 
+    def validate(self, vertices, face_offsets, face_indices) -> None:
+        """
+        Validate the input mesh (see 'validation.validate_mesh').
+
+        Raises:
+            MeshValidationError: The mesh cannot be subdivided.
+
+        """
+
+        report = validation.validate_mesh(
+            vertices, face_offsets, face_indices, closed=self.a_args.order_edges != "none"
+        )
+        print(report)
+        if not report.is_valid:
+            raise validation.MeshValidationError(f"Invalid mesh: {self.a_args.input!r}\n{report}")
+
+    def manifold_arrays(self, poly: Polyhedron) -> tuple[np.ndarray, ...]:
+        """
+        Returns the arrays of the polyhedron for the out-of-core and limit-surface
+        modes, which need a consistently oriented manifold mesh (see
+        'out_of_core.close_mesh'). Other meshes are repaired first (see
+        'validation.repair_mesh'), as with -rep.
+
+        Returns:
+            tuple[np.ndarray]: (vertices, face_offsets, face_indices)
+
+        Raises:
+            MeshValidationError: The mesh cannot be repaired (e.g. non-manifold edges).
+
+        """
+
+        vertices = poly.vertex_array()
+        face_offsets, face_indices = poly.face_arrays(ordered=True)
+        try:
+            out_of_core.close_mesh(face_offsets, face_indices)
+        except ValueError as err:
+            if self.a_args.repair:
+                raise validation.MeshValidationError(
+                    f"Not a consistently oriented manifold mesh: {self.a_args.input!r} ({err})"
+                ) from err
+            print("The mesh is not a consistently oriented manifold: repairing it (see -rep)")
+            vertices, face_offsets, face_indices = validation.repair_mesh(vertices, face_offsets, face_indices)
+            try:
+                out_of_core.close_mesh(face_offsets, face_indices)
+            except ValueError as repaired_err:
+                raise validation.MeshValidationError(
+                    f"Not a consistently oriented manifold mesh, even once repaired: {self.a_args.input!r} ({repaired_err})"
+                ) from repaired_err
+        return vertices, face_offsets, face_indices
+
     @staticmethod
-    def save_poly(poly, figure, output):
+    def triangle_mesh(poly: Polyhedron) -> tuple:
+        """
+        Returns the (vertices, triangles) arrays of the polyhedron (see 'writers.write_glb').
+
+        """
+
+        return poly.vertex_array(), poly.triangles
+
+    @staticmethod
+    def save_poly(poly, figure, output, generations=None, *, normals: bool = False):
         # writing to file
         if not output:
             return
         print(f"Saving file to {output!r}")
-        if output.endswith(".obj"):
-            with open(output, "w") as f:
+        if output.endswith((".obj", ".obj.gz", ".obj.xz")):
+            with writers.open_output(output) as f:
                 poly.save(f)
+        elif output.endswith(binary_mesh.EXTENSION):
+            binary_mesh.save_polyhedron(poly, output)
+        elif output.endswith(".ply"):
+            with open(output, "wb") as f:
+                writers.write_ply(f, poly.vertex_array(), *poly.face_arrays())
+        elif output.endswith(".stl"):
+            with open(output, "wb") as f:
+                writers.write_stl(f, poly.vertex_array(), poly.triangles)
+        elif output.endswith(".glb"):
+            if generations:
+                names = [f"Chaikin Gen {i}" for i in range(len(generations))]
+            else:
+                # the polyhedron alone: its generation is not known here
+                # (-uc stops early, a '.c3m' input may already be subdivided)
+                generations = [ChaikinMGR.triangle_mesh(poly)]
+                names = ["Chaikin"]
+            with open(output, "wb") as f:
+                writers.write_glb(f, generations, names, normals=normals)
         elif output.endswith(".html"):
             assert figure is not None, "Must plot the mesh when saving to html"
             figure.write_html(output)
         else:
             raise ValueError(f'Invalid output: "{output}"')
 
-    def plot(self, poly: Polyhedron):
+    def plot(self, poly: Polyhedron | list[scene.SceneObject]):
+        if isinstance(poly, list):
+            self.plot_objects(poly)
+            return
         assert isinstance(poly, Polyhedron), type(poly)
 
         vprint = print if self.a_args.verbose else lambda *args, **kwargs: None
 
-        # create a renderer
-        Renderer = self.a_args.renderer_class
-        renderer = Renderer(verbose=self.a_args.verbose)
+        if self.a_args.chaikin_coef_sweep:
+            self.plot_coef_sweep(poly)
+            return
+
+        if self.a_args.out_of_core is not None:
+            self.save_out_of_core(poly)
+            return
+
+        if self.a_args.limit_surface is not None:
+            self.save_limit_surface(poly)
+            return
 
         # do chaikin generations before any graphics ?
         if self.a_args.plot != "evolution" and self.a_args.plot != "animation":
             assert (
                 self.a_args["chaikin generations"] >= 0
             ), f"Number of generations must be positive ({self.a_args.chaikin_generations} >= 0)"
-            for _ in range(self.a_args.chaikin_generations):
-                vprint(" - 3D Chaikin -")
-                poly = poly.Chaikin3D(self.a_args)
-                vprint("Chaikin done")
+            generations = [self.triangle_mesh(poly)] if self.a_args.glb_generations else None
+            if self.a_args.until_converged is not None:
+                poly = self.subdivide_until_converged(poly, generations)
+            else:
+                for _ in range(self.a_args.chaikin_generations):
+                    vprint(" - 3D Chaikin -")
+                    poly = poly.Chaikin3D(self.a_args)
+                    vprint("Chaikin done")
+                    if generations is not None:
+                        generations.append(self.triangle_mesh(poly))
+        else:
+            generations = [] if self.a_args.glb_generations else None
+
+        self.draw(poly, self.a_args.output, generations)
+
+    def subdivide_until_converged(self, poly: Polyhedron, generations: list = None) -> Polyhedron:
+        """
+        Apply the chaikin generations until the surface stops changing (see
+        'convergence.subdivide_until_converged'), at most '-cg' generations.
+
+        """
+
+        max_generations = self.a_args.chaikin_generations or convergence.DEFAULT_MAX_GENERATIONS
+        poly, report = convergence.subdivide_until_converged(
+            poly,
+            self.a_args,
+            self.a_args.until_converged,
+            max_generations,
+            None if generations is None else lambda new_poly: generations.append(self.triangle_mesh(new_poly)),
+        )
+        print(report)
+        return poly
+
+    def plot_coef_sweep(self, poly: Polyhedron) -> None:
+        """
+        Draw/save the last generation for each chaikin coefficient of the sweep
+        (see 'sweep.coef_sweep'), the output paths are suffixed with the coefficient.
+
+        """
+
+        coefs = self.a_args.chaikin_coef_sweep
+        print(f"Chaikin coefficient sweep: {', '.join(f'{coef:g}' for coef in coefs)}")
+        coef_polys = sweep.coef_sweep(poly, self.a_args, coefs, self.a_args.chaikin_generations)
+        for coef, coef_poly in zip(coefs, coef_polys):
+            output = self.a_args.output
+            if output:
+                output = sweep.coef_output_path(output, coef, OUTPUT_EXTENSIONS)
+            self.draw(coef_poly, output)
+
+    def plot_objects(self, objects: list[scene.SceneObject]) -> None:
+        """
+        Subdivide the objects of a scene in worker processes (see 'scene.subdivide_objects'),
+        then save them to the '.obj' output, one 'o' statement per object. The
+        objects that failed are reported and left out of the output.
+
+        """
+
+        results = scene.subdivide_objects(
+            objects,
+            ChaikinOptions(self.a_args.chaikin_coef, self.a_args.order_edges),
+            self.a_args.chaikin_generations,
+            self.a_args.jobs,
+            weld_tolerance=self.a_args.weld_vertices,
+            repair=self.a_args.repair,
+            merge_coplanar=self.a_args.merge_coplanar,
+            validate=self.a_args.validate,
+        )
+        failed = [obj for obj in results if obj.error]
+        for obj in failed:
+            print(f"Object {obj.name!r} failed: {obj.error}")
+        print(f"{len(results) - len(failed)}/{len(results)} objects subdivided")
+        output = self.a_args.output
+        if not output:
+            return
+        vertices, face_offsets, face_indices, names = scene.merge_objects(
+            [obj for obj in results if not obj.error]
+        )
+        print(f"Saving file to {output!r}")
+        with writers.open_output(output) as f:
+            writers.write_obj(f, vertices, face_offsets, face_indices, objects=names)
+
+    def save_out_of_core(self, poly: Polyhedron) -> None:
+        """
+        Apply the chaikin generations out-of-core (see 'out_of_core.subdivide_out_of_core'),
+        then save the last generation from its memory-mapped arrays.
+
+        """
+
+        arrays = out_of_core.subdivide_out_of_core(
+            *self.manifold_arrays(poly),
+            self.a_args.chaikin_generations,
+            self.a_args.out_of_core,
+            self.a_args.chaikin_coef,
+            verbose=self.a_args.verbose,
+        )
+        output = self.a_args.output
+        if not output:
+            print(f"Last generation written to {self.a_args.out_of_core!r}")
+            return
+        vertices, face_offsets, face_indices = out_of_core.surface_arrays(arrays)
+        print(f"Saving file to {output!r}")
+        if output.endswith((".obj", ".obj.gz", ".obj.xz")):
+            with writers.open_output(output) as f:
+                writers.write_obj(f, vertices, face_offsets, face_indices)
+        elif output.endswith(".ply"):
+            with open(output, "wb") as f:
+                writers.write_ply(f, vertices, face_offsets, face_indices)
+        elif output.endswith(binary_mesh.EXTENSION):
+            with open(output, "wb") as f:
+                binary_mesh.write_binary_mesh(
+                    f, dict(zip(binary_mesh.REQUIRED_BLOCKS, (vertices, face_offsets, face_indices)))
+                )
+        else:
+            raise ValueError(f'Invalid output: "{output}"')
+
+    def save_limit_surface(self, poly: Polyhedron) -> None:
+        """
+        Sample the limit surface of the chaikin generations (see 'limit.limit_surface'),
+        then save the triangles.
+
+        """
+
+        vertices, triangles = limit.limit_surface(
+            *self.manifold_arrays(poly),
+            density=self.a_args.limit_surface,
+            coef=self.a_args.chaikin_coef,
+            generations=max(self.a_args.chaikin_generations, 1),
+        )
+        print(f"Limit surface: {len(vertices)} vertices, {len(triangles)} triangles")
+        output = self.a_args.output
+        if not output:
+            return
+        print(f"Saving file to {output!r}")
+        face_offsets = np.arange(len(triangles) + 1, dtype=np.int64) * 3
+        if output.endswith((".obj", ".obj.gz", ".obj.xz")):
+            with writers.open_output(output) as f:
+                writers.write_obj(f, vertices, face_offsets, triangles.reshape(-1))
+        elif output.endswith(".ply"):
+            with open(output, "wb") as f:
+                writers.write_ply(f, vertices, face_offsets, triangles.reshape(-1))
+        elif output.endswith(".stl"):
+            with open(output, "wb") as f:
+                writers.write_stl(f, vertices, triangles)
+        elif output.endswith(".glb"):
+            with open(output, "wb") as f:
+                writers.write_glb(
+                    f, [(vertices, triangles)], ["Chaikin limit surface"], normals=self.a_args.glb_normals
+                )
+        else:
+            raise ValueError(f'Invalid output: "{output}"')
+
+    def draw(self, poly: Polyhedron, output: str, generations: list = None) -> None:
+        """
+        Draw the polyhedron (plot type) and save it to the output.
+
+        """
 
         # switch the plot type
+        if self.a_args.plot == "none" and not (output or "").endswith(".html"):
+            # headless: nothing to draw, no renderer/plotting module is imported
+            self.save_poly(poly, None, output, generations, normals=self.a_args.glb_normals)
+            return
+
+        # create a renderer
+        from chaikin3d import plotting
+        Renderer = get_renderer_class(self.a_args.renderer)
+        renderer = Renderer(verbose=self.a_args.verbose)
+
         if self.a_args.plot == "simple" or self.a_args.plot == "none":
             poly_dd = renderer.get_polyhedron_draw_data(
                 poly, type_="any", alpha=self.a_args.alpha, color=self.a_args.polygon_color
@@ -116,15 +425,15 @@ class ChaikinMGR:
             else:
                 graphical_conn_dd = list()
             fig = renderer.figure(poly_dd + graphical_conn_dd + main_conn_dd)
-            self.save_poly(poly, fig, self.a_args.output)
+            self.save_poly(poly, fig, output, generations, normals=self.a_args.glb_normals)
             if self.a_args.plot == "simple":
                 fig.show()
         elif self.a_args.plot == "full":
             fig = plotting.draw_full(renderer, poly, self.a_args)
-            self.save_poly(poly, fig, self.a_args.output)
+            self.save_poly(poly, fig, output, generations, normals=self.a_args.glb_normals)
         elif self.a_args.plot == "evolution":
-            fig = plotting.draw_chaikin_evolution(renderer, poly, self.a_args)
-            self.save_poly(poly, fig, self.a_args.output)
+            fig = plotting.draw_chaikin_evolution(renderer, poly, self.a_args, generations)
+            self.save_poly(poly, fig, output, generations, normals=self.a_args.glb_normals)
         elif self.a_args.plot == "animation":
             raise NotImplementedError("Animation plot not implemetned yet")
             plotting.chaikin_animation(renderer, poly, self.a_args)
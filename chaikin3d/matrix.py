@@ -1,7 +1,8 @@
 from __future__ import annotations
 import numpy as np
 
-EPSILON = 10e-17
+# tolerance of the point-on-plane tests (never modified at runtime)
+EPSILON = 10e-6
 
 
 def vector_from_points(u: np.array, v: np.array) -> np.array:
@@ -124,6 +125,146 @@ class Plane:
 
         """
 
-        PQ = vector.vector(P, Q)
-        PR = vector.vector(P, R)
+        PQ = vector_from_points(P, Q)
+        PR = vector_from_points(P, R)
         return Plane.from_vectors(PQ, PR, P)
+
+
+class PlaneBatch:
+    """
+    Batch of 2D planes, stored as a (M, 4) array of (a, b, c, d) coefficients.
+
+    Tests many points against many planes in one vectorized call (see 'Plane'
+    for the single plane version).
+
+    """
+
+    def __init__(self, coefficients: np.ndarray):
+        """a[i]x + b[i]y + c[i]z + d[i] = 0"""
+        self.coefficients = np.asarray(coefficients, dtype=np.float64).reshape(-1, 4)
+
+    def __len__(self):
+        return len(self.coefficients)
+
+    def __getitem__(self, index: int) -> Plane:
+        return Plane(*self.coefficients[index])
+
+    def normal_dist(self, points: np.ndarray, plane_indices: np.ndarray = None) -> np.ndarray:
+        """
+        Return the normal distance of each point to each plane.
+
+        Args:
+            points        (np.ndarray): (N, 3) points to check.
+            plane_indices (np.ndarray): (N,) only check the i-th point against the
+                                        plane 'plane_indices[i]'.
+
+        Returns:
+            np.ndarray: (M, N) normal distances, or (N,) with 'plane_indices'.
+
+        """
+
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+        if plane_indices is not None:
+            coefficients = self.coefficients[plane_indices]
+            return np.abs(
+                np.einsum("ij,ij->i", coefficients[:, :3], points) + coefficients[:, 3]
+            )
+        return np.abs(self.coefficients[:, :3] @ points.T + self.coefficients[:, 3:])
+
+    def dist_with_points(self, points: np.ndarray, plane_indices: np.ndarray = None) -> np.ndarray:
+        """
+        Return the distance of each point to each plane.
+
+        Args:
+            points        (np.ndarray): (N, 3) points to check.
+            plane_indices (np.ndarray): See 'normal_dist'.
+
+        Returns:
+            np.ndarray: (M, N) distances, or (N,) with 'plane_indices'.
+
+        """
+
+        if plane_indices is not None:
+            return self.normal_dist(points, plane_indices) / self.base()[plane_indices]
+        return self.normal_dist(points) / self.base()[:, None]
+
+    def points_on_planes(self, points: np.ndarray, plane_indices: np.ndarray = None) -> np.ndarray:
+        """
+        Which points are on which planes ? (same tolerance as 'Plane.point_on_plane')
+
+        Args:
+            points        (np.ndarray): (N, 3) points to check.
+            plane_indices (np.ndarray): See 'normal_dist'.
+
+        Returns:
+            np.ndarray: (M, N) booleans, True if the point is on the plane, or
+                (N,) with 'plane_indices'.
+
+        """
+
+        return self.normal_dist(points, plane_indices) < EPSILON
+
+    def base(self) -> np.ndarray:
+        """
+        Return the bases of the planes.
+
+        Returns:
+            np.ndarray: (M,) bases.
+
+        """
+
+        return np.linalg.norm(self.coefficients[:, :3], axis=1)
+
+    def normalized(self) -> PlaneBatch:
+        """
+        Return the same planes, with unit normals (the normal distances are then
+        the distances). The planes without normal are left as they are.
+
+        Returns:
+            PlaneBatch: Normalized planes.
+
+        """
+
+        bases = self.base()
+        bases[bases == 0] = 1
+        return PlaneBatch(self.coefficients / bases[:, None])
+
+    @staticmethod
+    def from_vectors(u: np.ndarray, v: np.ndarray, points: np.ndarray) -> PlaneBatch:
+        """
+        Returns the planes defined by the vectors u[i] and v[i], starting from points[i].
+
+        Args:
+            u      (np.ndarray): (M, 3) vectors u.
+            v      (np.ndarray): (M, 3) vectors v.
+            points (np.ndarray): (M, 3) starting points.
+
+        Returns:
+            PlaneBatch: Planes defined by the triplets (points[i], u[i](vect), v[i](vect)).
+
+        """
+
+        normals = np.cross(u, v).reshape(-1, 3)
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+        d = -np.einsum("ij,ij->i", normals, points)
+        return PlaneBatch(np.column_stack((normals, d)))
+
+    @staticmethod
+    def from_points(P: np.ndarray, Q: np.ndarray, R: np.ndarray) -> PlaneBatch:
+        """
+        Returns the planes defined by the point triplets (P[i], Q[i], R[i]).
+
+        Args:
+            P (np.ndarray): (M, 3) first points.
+            Q (np.ndarray): (M, 3) second points.
+            R (np.ndarray): (M, 3) third points.
+
+        Returns:
+            PlaneBatch: Planes defined by those points.
+
+        """
+
+        P, Q, R = (np.asarray(X, dtype=np.float64).reshape(-1, 3) for X in (P, Q, R))
+        return PlaneBatch.from_vectors(
+            vector_from_points(P, Q), vector_from_points(P, R), P
+        )
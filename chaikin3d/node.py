@@ -14,10 +14,11 @@ class Node:
 
     """
 
-    def __init__(self, x: float, y: float, z: float):
+    def __init__(self, x: float, y: float, z: float, dtype: np.dtype = None):
         self.x, self.y, self.z = x, y, z
         self.coords_list = [x, y, z]
-        self.coords = np.array(self.coords_list)
+        # precision of the coordinates (default: the one of x, y and z)
+        self.coords = np.array(self.coords_list, dtype=dtype)
         self.num_edges: int = 0
         self.edge_list: list[E.Edge] = list()
 
@@ -162,19 +163,39 @@ class Node:
 
     def order_edges(self, duplicate_triangles: VirtualSet = None) -> VirtualSet:
         """
-        Order all the edges this node is part of.
+        Order all the edges this node is part of (see 'ordered_edges').
+
+        Args:
+            duplicate_triangles (VirtualSet): Triangles removed by the previous nodes.
+
+        Returns:
+            VirtualSet[Triangle]: Set of removed triangles during reduction.
+
+        """
+
+        self.edge_list, duplicate_triangles = self.ordered_edges(duplicate_triangles)
+        return duplicate_triangles
+
+    def ordered_edges(
+        self, duplicate_triangles: VirtualSet = None
+    ) -> tuple[list[Edge], VirtualSet]:
+        """
+        Returns all the edges this node is part of, ordered.
 
         The edges can be ordered such that when iterating over them in pairs,
         you directly get the pairs of edges per triangle this node is connected to.
         This is achieved by getting all the triangles this node is connected to
         (all those triangles must form a cycled mesh part) and ordering those.
         Once ordered, the edges can be read in an ordered way.
+        This node is left untouched.
 
         Args:
-            type_ (str): Tye of the edges.
+            duplicate_triangles (VirtualSet): Triangles removed by the previous nodes.
 
         Returns:
-            VirtualSet[Triangle]: Set of removed triangles during reduction.
+            tuple[list[Edge], VirtualSet[Triangle]]:
+                (ordered_edge_list, duplicate_triangles): the ordered edges, and
+                the set of removed triangles during reduction.
 
         Raises:
             Exception: Invalid/Corrupted Node/Polyhedron.
@@ -262,14 +283,71 @@ class Node:
                     print(f"    {edge = }")
                 print()
                 raise Exception(f"Corrupt node found. Aborting. node = {self}")
-        # replace class edge_list with ordered one
+        return ordered_edge_list, duplicate_triangles
+
+    def order_edges_from_groups(self, group_positions: list[tuple[Group, int]]) -> None:
+        """
+        Order all the edges this node is part of, using the groups it belongs to.
+
+        Same result as 'order_edges', but linear in the number of edges: each
+        ordered group gives a wedge of partner nodes (from one neighbour of this
+        node in the group to the other one). The wedges are then chained
+        together by their end nodes.
+
+        Args:
+            group_positions (list[tuple[Group, int]]):
+                Ordered groups this node is part of, with the position of
+                this node in their 'ogroup' list.
+
+        """
+
+        wedges: list[list[Node]] = list()
+        for group, position in group_positions:
+            ogroup = group.ogroup
+            size = len(ogroup)
+            wedges.append([ogroup[(position + i) % size] for i in range(1, size)])
+        if not wedges:
+            return
+
+        # chain the wedges together
+        ring: list[Node] = wedges.pop()
+        while wedges:
+            for index, wedge in enumerate(wedges):
+                if wedge[0] is ring[-1]:
+                    ring.extend(wedge[1:])
+                elif wedge[-1] is ring[-1]:
+                    ring.extend(reversed(wedge[:-1]))
+                elif wedge[-1] is ring[0]:
+                    ring[:0] = wedge[:-1]
+                elif wedge[0] is ring[0]:
+                    ring[:0] = reversed(wedge[1:])
+                else:
+                    continue
+                wedges.pop(index)
+                break
+            else:
+                # not a closed fan (border of the mesh ?)
+                for wedge in wedges:
+                    ring.extend(wedge)
+                break
+
+        # partner nodes -> edges
+        edge_per_partner = {
+            id(edge.B if edge.A is self else edge.A): edge for edge in self.edge_list
+        }
+        ordered_edge_list: list[E.Edge] = list()
+        for partner_node in ring:
+            edge = edge_per_partner.pop(id(partner_node), None)
+            if edge is not None:
+                ordered_edge_list.append(edge)
+        # keep the edges that are not part of any group at the end
+        ordered_edge_list.extend(edge_per_partner.values())
         self.edge_list = ordered_edge_list
-        return duplicate_triangles
 
     @staticmethod
     def from_point(point: np.array) -> Node:
         """
-        Return the Node at 'point'.
+        Return the Node at 'point', with the precision of the point.
 
         Args:
             point (np.array): Point in space.
@@ -285,7 +363,7 @@ class Node:
         assert (
             len(point) == 3
         ), f"The number of scalar values in the vector are not 3 ({len(point)} != 3)"
-        return Node(point[0], point[1], point[2])
+        return Node(point[0], point[1], point[2], getattr(point, "dtype", None))
 
 
 class Triangle:
@@ -296,6 +374,8 @@ class Triangle:
 
     def __init__(self, A: Node, B: Node, C: Node):
         self.nodes = [A, B, C]
+        # canonical key: the same three nodes give the same key, in any order
+        self.key: tuple[int, int, int] = tuple(sorted((id(A), id(B), id(C))))
 
     def __str__(self) -> str:
         return (
@@ -327,13 +407,6 @@ class Triangle:
     def __iter__(self):
         return iter(self.nodes)
 
-    @property
-    def sim_hash(self):
-        # Give a NON-UNIQUE hash for this triangle
-        # The goal is to return a value that is as unique as possible
-        # This is used for optimization.
-        return sum(sum(node.coords + i + 1) for i, node in enumerate(self.nodes))
-
     @property
     def iter_coords(self):
         return iter(map(lambda node: node.coords_list, self))
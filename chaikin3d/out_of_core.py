@@ -0,0 +1,434 @@
+# -*- coding: utf-8 -*-
+""" chaikin3d/out_of_core.py """
+
+from __future__ import annotations
+import os
+
+import numpy as np
+
+from chaikin3d.polyhedron import chaikin_ratios
+
+
+__all__ = [
+    'DEFAULT_CHUNK_SIZE',
+    'MESH_ARRAYS',
+    'close_mesh',
+    'generation_sizes',
+    'create_generation',
+    'load_generation',
+    'surface_arrays',
+    'chaikin_generation',
+    'subdivide_out_of_core',
+]
+
+
+# number of faces/vertices processed per chunk (bounds the resident working set)
+DEFAULT_CHUNK_SIZE = 1 << 18
+# arrays of a generation, one '.npy' file each ('surface_faces': number of faces
+# before the hole faces, see 'close_mesh')
+MESH_ARRAYS = ("vertices", "face_offsets", "face_indices", "twins", "surface_faces")
+# scratch arrays of the kernel, removed once the generation is written
+_SCRATCH_ARRAYS = ("valences", "first_half_edges", "previous", "ranks")
+INDEX_DTYPE = np.int64
+
+
+def close_mesh(face_offsets: np.ndarray, face_indices: np.ndarray) -> tuple[np.ndarray, ...]:
+    """
+    Returns the half-edge structure of a consistently oriented manifold mesh,
+    with its holes filled by 'hole faces'.
+
+    The half-edge j goes from the vertex face_indices[j] to the next vertex of
+    its face, its twin is the half-edge going the other way (in the adjacent
+    face). The half-edges without twin (boundary edges) are paired with the
+    half-edges of the hole faces, which are appended after the faces: the
+    surface is made of the first F faces only.
+
+    Args:
+        face_offsets (np.ndarray): (F + 1,) array of face offsets.
+        face_indices (np.ndarray): Vertex indices of all the faces.
+
+    Returns:
+        tuple[np.ndarray, ...]: (face offsets, face indices, twins) of the closed mesh.
+
+    Raises:
+        ValueError: The mesh has non-manifold or inconsistently oriented edges
+                    (see 'validation.repair_mesh'), or non-manifold boundary vertices.
+
+    """
+
+    face_offsets = np.asarray(face_offsets, dtype=INDEX_DTYPE)
+    starts = np.asarray(face_indices, dtype=INDEX_DTYPE)
+    face_sizes = np.diff(face_offsets)
+    # next corner of each corner, in its face
+    next_corners = np.arange(len(starts)) + 1
+    next_corners[face_offsets[1:][face_sizes > 0] - 1] = face_offsets[:-1][face_sizes > 0]
+    ends = starts[next_corners]
+    num_vertices = int(starts.max()) + 1 if len(starts) else 0
+    keys = starts * num_vertices + ends
+    order = np.argsort(keys, kind="stable")
+    sorted_keys = keys[order]
+    if np.any(sorted_keys[1:] == sorted_keys[:-1]) or np.any(starts == ends):
+        raise ValueError(
+            "Non-manifold, degenerate or inconsistently oriented edges (duplicate half-edges), "
+            "see 'validation.repair_mesh'"
+        )
+    twin_keys = ends * num_vertices + starts
+    positions = np.minimum(np.searchsorted(sorted_keys, twin_keys), max(len(sorted_keys) - 1, 0))
+    twins = np.where(sorted_keys[positions] == twin_keys, order[positions], -1)
+
+    # hole faces: the reversed boundary half-edges, chained around each hole
+    boundary = np.flatnonzero(twins < 0)
+    if not len(boundary):
+        return face_offsets, starts, twins
+    boundary_ends = ends[boundary]
+    if len(np.unique(boundary_ends)) != len(boundary) or len(np.unique(starts[boundary])) != len(boundary):
+        raise ValueError("Non-manifold boundary vertices (several holes meet at a vertex)")
+    ending_at = dict(zip(boundary_ends.tolist(), boundary.tolist()))
+    starts_list = starts.tolist()
+    visited = set()
+    loops: list[int] = []
+    hole_sizes: list[int] = []
+    for half_edge in boundary.tolist():
+        size = 0
+        while half_edge not in visited:
+            visited.add(half_edge)
+            loops.append(half_edge)
+            size += 1
+            half_edge = ending_at.get(starts_list[half_edge])
+            if half_edge is None:
+                raise ValueError("Invalid boundary (open hole loop)")
+        if size:
+            hole_sizes.append(size)
+    loops = np.array(loops, dtype=INDEX_DTYPE)
+    twins[loops] = len(starts) + np.arange(len(loops))
+    return (
+        np.concatenate((face_offsets, face_offsets[-1] + np.cumsum(hole_sizes))),
+        np.concatenate((starts, ends[loops])),
+        np.concatenate((twins, loops)),
+    )
+
+
+def generation_sizes(num_vertices: int, num_faces: int, num_half_edges: int) -> tuple[int, int, int]:
+    """
+    Returns the exact sizes of the next generation.
+
+    Each half-edge gives a new vertex, each vertex gives a face (its valence is
+    the size of the face) and each face gives a face (twice as big), so the sum
+    of the face sizes is the sum of the valences (H) plus twice the sum of the
+    face sizes (2H).
+
+    Args:
+        num_vertices   (int): Number of vertices (N).
+        num_faces      (int): Number of faces (F).
+        num_half_edges (int): Sum of the face sizes (H).
+
+    Returns:
+        tuple[int, int, int]: (vertices, faces, half-edges) = (H, N + F, 3H).
+
+    """
+
+    return num_half_edges, num_vertices + num_faces, 3 * num_half_edges
+
+
+def _open_array(directory: str, name: str, shape: tuple, dtype) -> np.memmap | np.ndarray:
+    if directory is None:
+        return np.empty(shape, dtype=dtype)
+    return np.lib.format.open_memmap(
+        os.path.join(directory, f"{name}.npy"), mode="w+", dtype=dtype, shape=shape
+    )
+
+
+def create_generation(
+    directory: str, num_vertices: int, num_faces: int, num_half_edges: int, num_surface_faces: int, dtype
+) -> dict[str, np.memmap]:
+    """
+    Preallocate the memory-mapped arrays of a generation.
+
+    Args:
+        directory         (str)     : Directory of the '.npy' files (created if
+                                      needed), None for in-memory arrays.
+        num_vertices      (int)     : Number of vertices.
+        num_faces         (int)     : Number of faces (hole faces included).
+        num_half_edges    (int)     : Sum of the face sizes.
+        num_surface_faces (int)     : Number of faces before the hole faces.
+        dtype             (np.dtype): Dtype of the vertex coordinates.
+
+    Returns:
+        dict[str, np.memmap]: Arrays, by name (see 'MESH_ARRAYS').
+
+    """
+
+    if directory is not None:
+        os.makedirs(directory, exist_ok=True)
+    arrays = {
+        "vertices": _open_array(directory, "vertices", (num_vertices, 3), dtype),
+        "face_offsets": _open_array(directory, "face_offsets", (num_faces + 1,), INDEX_DTYPE),
+        "face_indices": _open_array(directory, "face_indices", (num_half_edges,), INDEX_DTYPE),
+        "twins": _open_array(directory, "twins", (num_half_edges,), INDEX_DTYPE),
+        "surface_faces": _open_array(directory, "surface_faces", (1,), INDEX_DTYPE),
+    }
+    arrays["surface_faces"][0] = num_surface_faces
+    return arrays
+
+
+def load_generation(directory: str, mode: str = "r") -> dict[str, np.memmap]:
+    """
+    Memory-map the arrays of a generation written by 'create_generation'.
+
+    Args:
+        directory (str): Directory of the '.npy' files.
+        mode      (str): Memory-map mode ('r' or 'r+').
+
+    Returns:
+        dict[str, np.memmap]: Arrays, by name (see 'MESH_ARRAYS').
+
+    """
+
+    return {name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode=mode) for name in MESH_ARRAYS}
+
+
+def surface_arrays(arrays: dict[str, np.ndarray]) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Returns the (vertices, face offsets, face indices) of the surface of a
+    generation, without the hole faces (views of the memory-mapped arrays).
+
+    Args:
+        arrays (dict[str, np.ndarray]): Arrays of a generation (see 'MESH_ARRAYS').
+
+    Returns:
+        tuple[np.ndarray, np.ndarray, np.ndarray]: Arrays of the surface (see 'writers.write_obj').
+
+    """
+
+    num_faces = int(arrays["surface_faces"][0])
+    face_offsets = arrays["face_offsets"][: num_faces + 1]
+    return arrays["vertices"], face_offsets, arrays["face_indices"][: int(face_offsets[-1])]
+
+
+def _face_chunks(face_offsets: np.ndarray, chunk_size: int):
+    """
+    Yields (half-edges, previous corners, next corners) for each
+    chunk of faces.
+
+    """
+
+    num_faces = len(face_offsets) - 1
+    for start in range(0, num_faces, chunk_size):
+        offsets = np.asarray(face_offsets[start : min(start + chunk_size, num_faces) + 1])
+        sizes = np.diff(offsets)
+        half_edges = np.arange(offsets[0], offsets[-1], dtype=INDEX_DTYPE)
+        positions = half_edges - np.repeat(offsets[:-1], sizes)
+        repeated_sizes = np.repeat(sizes, sizes)
+        face_starts = half_edges - positions
+        previous = face_starts + (positions - 1) % repeated_sizes
+        next_ = face_starts + (positions + 1) % repeated_sizes
+        yield half_edges, previous, next_
+
+
+def chaikin_generation(
+    source: dict[str, np.ndarray], directory: str, coef: float, chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> dict[str, np.memmap]:
+    """
+    Apply one generation of the Chaikin3D Algorithm to a half-edge mesh, from
+    arrays (possibly memory-mapped) to memory-mapped arrays.
+
+    The new vertex of the half-edge j (from the vertex a to the vertex b) is
+    a + (b - a) / coef. The new faces are the vertex faces (the new vertices
+    of the outgoing half-edges of each vertex, in cyclic order) followed by the
+    face faces (the new vertices of each face, two per corner): the face faces
+    of the hole faces are the hole faces of the next generation. The output
+    sizes are known in advance (see 'generation_sizes'), the arrays are
+    preallocated and filled one chunk at a time: only the chunks (and a few
+    scratch memory-maps) are accessed, so the resident working set is bounded
+    by 'chunk_size'.
+
+    Args:
+        source     (dict)  : Arrays of the current generation (see 'MESH_ARRAYS' and 'close_mesh').
+        directory  (str)   : Directory of the '.npy' files of the next generation
+                             (None: in-memory arrays).
+        coef       (float) : Chaikin coefficient.
+        chunk_size (int)   : Number of faces/vertices processed per chunk.
+
+    Returns:
+        dict[str, np.memmap]: Arrays of the next generation (see 'MESH_ARRAYS').
+
+    Raises:
+        ValueError: The mesh is not a manifold.
+
+    """
+
+    vertices = source["vertices"]
+    face_offsets = source["face_offsets"]
+    face_indices = source["face_indices"]
+    twins = source["twins"]
+    num_vertices, num_faces, num_half_edges = len(vertices), len(face_offsets) - 1, len(face_indices)
+    new_num_vertices, new_num_faces, new_num_half_edges = generation_sizes(
+        num_vertices, num_faces, num_half_edges
+    )
+    target = create_generation(
+        directory,
+        new_num_vertices,
+        new_num_faces,
+        new_num_half_edges,
+        num_vertices + int(source["surface_faces"][0]),
+        vertices.dtype,
+    )
+    new_vertices, new_offsets = target["vertices"], target["face_offsets"]
+    new_indices, new_twins = target["face_indices"], target["twins"]
+    scratch = {
+        name: _open_array(directory, name, (size,), INDEX_DTYPE)
+        for name, size in zip(_SCRATCH_ARRAYS, (num_vertices, num_vertices, num_half_edges, num_half_edges))
+    }
+    valences, first_half_edges, previous_corners, ranks = scratch.values()
+    base_ratio, _ = chaikin_ratios(coef)
+    base_ratio = vertices.dtype.type(base_ratio)
+
+    # new vertices (one per half-edge), valences and previous corners
+    valences[:] = 0
+    for half_edges, previous, next_ in _face_chunks(face_offsets, chunk_size):
+        if not len(half_edges):
+            continue
+        lo, hi = half_edges[0], half_edges[-1] + 1
+        starts = np.asarray(face_indices[lo:hi])
+        new_vertices[lo:hi] = base_ratio * vertices[starts] + (1 - base_ratio) * vertices[face_indices[next_]]
+        previous_corners[lo:hi] = previous
+        np.add.at(valences, starts, 1)
+        first_half_edges[starts] = half_edges
+
+    # face offsets: the vertex faces (valences), then the face faces (twice the face sizes)
+    new_offsets[0] = 0
+    total = 0
+    for start in range(0, num_vertices, chunk_size):
+        cumulated = np.cumsum(valences[start : start + chunk_size]) + total
+        new_offsets[start + 1 : start + 1 + len(cumulated)] = cumulated
+        total = int(cumulated[-1])
+    if total != num_half_edges:
+        raise ValueError("Invalid half-edge mesh (the valences do not sum to the number of half-edges)")
+    for start in range(0, num_faces, chunk_size):
+        stop = min(start + chunk_size, num_faces) + 1
+        new_offsets[num_vertices + 1 + start : num_vertices + stop] = (
+            num_half_edges + 2 * np.asarray(face_offsets[start + 1 : stop])
+        )
+
+    # vertex faces: turn around each vertex (h -> twin(previous(h)))
+    for start in range(0, num_vertices, chunk_size):
+        stop = min(start + chunk_size, num_vertices)
+        positions = np.asarray(new_offsets[start:stop])
+        firsts = np.asarray(first_half_edges[start:stop])
+        chunk_valences = np.asarray(valences[start:stop])
+        if np.any(chunk_valences == 0):
+            raise ValueError("The mesh must not have isolated vertices")
+        current = firsts.copy()
+        active = np.arange(stop - start)
+        rank = 0
+        while len(active):
+            if np.any(rank >= chunk_valences[active]):
+                raise ValueError("The mesh must be a manifold (open vertex fan)")
+            half_edges = current[active]
+            new_indices[positions[active] + rank] = half_edges
+            new_twins[positions[active] + rank] = num_half_edges + 2 * half_edges
+            ranks[half_edges] = rank
+            current[active] = twins[previous_corners[half_edges]]
+            rank += 1
+            closed = current[active] == firsts[active]
+            if np.any(chunk_valences[active[closed]] != rank):
+                raise ValueError("The mesh must be a manifold (several fans around a vertex)")
+            active = active[~closed]
+
+    # face faces: [twin(previous(j)), j] for each corner j
+    for half_edges, previous, _ in _face_chunks(face_offsets, chunk_size):
+        if not len(half_edges):
+            continue
+        lo, hi = half_edges[0], half_edges[-1] + 1
+        chunk_twins = np.asarray(twins[lo:hi])
+        slots = np.empty(2 * (hi - lo), dtype=INDEX_DTYPE)
+        slots[0::2] = twins[previous]
+        slots[1::2] = half_edges
+        new_indices[num_half_edges + 2 * lo : num_half_edges + 2 * hi] = slots
+        # the twins of the even slots are in the vertex faces, the odd ones in the adjacent face faces
+        slots[0::2] = new_offsets[face_indices[lo:hi]] + ranks[lo:hi]
+        slots[1::2] = num_half_edges + 2 * chunk_twins + 1
+        new_twins[num_half_edges + 2 * lo : num_half_edges + 2 * hi] = slots
+
+    del scratch, valences, first_half_edges, previous_corners, ranks
+    if directory is not None:
+        for array in target.values():
+            array.flush()
+        for name in _SCRATCH_ARRAYS:
+            os.remove(os.path.join(directory, f"{name}.npy"))
+    return target
+
+
+def subdivide_out_of_core(
+    vertices: np.ndarray,
+    face_offsets: np.ndarray,
+    face_indices: np.ndarray,
+    generations: int,
+    directory: str,
+    coef: float = 4.0,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    verbose: bool = False,
+) -> dict[str, np.memmap]:
+    """
+    Apply the Chaikin3D Algorithm out-of-core: each generation is read from
+    memory-mapped '.npy' files and written to new ones (see 'chaikin_generation').
+
+    Generation k is written to '<directory>/gen<k>', the previous generation
+    is removed once the next one is written, so at most two generations are on
+    the disk. Only consistently oriented manifold meshes are supported (the
+    faces around each vertex are found with the half-edge twins, see 'close_mesh').
+
+    Usage:
+        arrays = subdivide_out_of_core(vertices, face_offsets, face_indices, 5, "/tmp/girl")
+        with open("girl.ply", "wb") as f:
+            writers.write_ply(f, *surface_arrays(arrays))
+
+    Args:
+        vertices     (np.ndarray): (N, 3) vertices of generation zero.
+        face_offsets (np.ndarray): (F + 1,) face offsets of generation zero.
+        face_indices (np.ndarray): Vertex indices of all the faces of generation zero.
+        generations  (int)       : Number of chaikin generations.
+        directory    (str)       : Directory of the generations (created if needed).
+        coef         (float)     : Chaikin coefficient (must be greater than 2).
+        chunk_size   (int)       : Number of faces/vertices processed per chunk.
+        verbose      (bool)      : Print the sizes of each generation.
+
+    Returns:
+        dict[str, np.memmap]: Arrays of the last generation (see 'MESH_ARRAYS').
+
+    Raises:
+        ValueError: Invalid chaikin coefficient, or the mesh is not a manifold.
+
+    """
+
+    if coef <= 2:
+        raise ValueError(f"Chaikin coefficient must be greater than 2 ({coef} > 2)")
+    if generations < 0:
+        raise ValueError(f"Number of generations must be positive ({generations} >= 0)")
+    vertices = np.asarray(vertices)
+    closed_offsets, closed_indices, twins = close_mesh(face_offsets, face_indices)
+    arrays = create_generation(
+        os.path.join(directory, "gen0"),
+        len(vertices),
+        len(closed_offsets) - 1,
+        len(closed_indices),
+        len(face_offsets) - 1,
+        vertices.dtype,
+    )
+    arrays["vertices"][:] = vertices
+    arrays["face_offsets"][:] = closed_offsets
+    arrays["face_indices"][:] = closed_indices
+    arrays["twins"][:] = twins
+    del closed_offsets, closed_indices, twins
+    for generation in range(1, generations + 1):
+        previous_directory = os.path.join(directory, f"gen{generation - 1}")
+        arrays = chaikin_generation(arrays, os.path.join(directory, f"gen{generation}"), coef, chunk_size)
+        for name in MESH_ARRAYS:
+            os.remove(os.path.join(previous_directory, f"{name}.npy"))
+        os.rmdir(previous_directory)
+        if verbose:
+            print(
+                f"Generation {generation}: {len(arrays['vertices'])} vertices, "
+                f"{int(arrays['surface_faces'][0])} faces"
+            )
+    return arrays
@@ -148,30 +148,38 @@ class Renderer:
     ) -> list[go.Mesh3d]:
         self.vprint("Reading polyhedron data for rendering")
         t1 = time.perf_counter()
-        vertex_list = []
-        vertex_list_length = 0
-        vertex_index_list = []
-        triangle_iterable = (
-            polyhedron if type_ == "any" else polyhedron._iter_triangles(type_)
-        )
-        for triangle in triangle_iterable:
-            index_list = []
-            for vertex in triangle.iter_coords:
-                if vertex not in vertex_list:
-                    vertex_list.append(vertex)
-                    vertex_list_length += 1
-                    index_list.append(vertex_list_length - 1)
-                else:
-                    index_list.append(vertex_list.index(vertex))
-            vertex_index_list.append(index_list)
+        vertices = polyhedron.vertex_array()
+        triangles = polyhedron.triangle_indices(type_)
         self.vprint(f"Total time for processing: {time.perf_counter() - t1:.3}s")
+        return self.get_mesh_draw_data(vertices, triangles, alpha=alpha, color=color)
+
+    def get_mesh_draw_data(
+        self,
+        vertices: np.ndarray,
+        triangles: np.ndarray,
+        alpha: float = 0.8,
+        color: str = "lightblue",
+    ) -> list[go.Mesh3d]:
+        """
+        Returns the draw data of a triangle mesh given as arrays.
 
-        if not vertex_list and not vertex_index_list:
+        Args:
+            vertices  (np.ndarray): (N, 3) vertex positions.
+            triangles (np.ndarray): (T, 3) vertex indices.
+            alpha     (float)     : Opacity.
+            color     (str)       : Mesh color ("random" for a random colorscale).
+
+        Returns:
+            list[go.Mesh3d]: Draw data (empty without triangles).
+
+        """
+
+        if not len(triangles):
             self.vprint("No polyhedron data")
             return []
 
-        X, Y, Z = list(zip(*vertex_list))
-        I, J, K = list(zip(*vertex_index_list))
+        X, Y, Z = np.asarray(vertices).T
+        I, J, K = np.asarray(triangles).T
         if color == "random":
             num_colorscales = 4
             return [
@@ -221,24 +229,51 @@ class Renderer:
         node_color: str = "green",
         width: int = 2,
     ) -> list[go.Scatter3d]:
-        # flatten a list of lists into a list
-        def flatten(l): return list(y for x in l for y in x)
-        # iterative code below
-        xs, ys, zs = map(
-            flatten,
-            zip(
-                *(
-                    [[edge.A.coords[i], edge.B.coords[i], None] for i in range(3)]
-                    for edge in polyhedron.get_edges(type_)
-                )
-            ),
+        node_indices = polyhedron.node_indices
+        edges = np.array(
+            [
+                (node_indices[id(edge.A)], node_indices[id(edge.B)])
+                for edge in polyhedron.get_edges(type_)
+            ],
+            dtype=np.intp,
+        ).reshape(-1, 2)
+        return self.get_edge_lines_draw_data(
+            polyhedron.vertex_array(), edges, line_color, node_color, width
         )
-        # xs, ys, zs = [], [], []
-        # for edge in polyhedron.get_edges(type_):
-        #     A, B = edge.A.coords, edge.B.coords
-        #     xs.extend([A[0], B[0], None])
-        #     ys.extend([A[1], B[1], None])
-        #     zs.extend([A[2], B[2], None])
+
+    def get_edge_lines_draw_data(
+        self,
+        vertices: np.ndarray,
+        edges: np.ndarray,
+        line_color: str = "yellow",
+        node_color: str = "green",
+        width: int = 2,
+    ) -> list[go.Scatter3d]:
+        """
+        Returns the draw data of edges given as arrays.
+
+        All the edges are drawn as a single line, broken (NaN points) between
+        each segment.
+
+        Args:
+            vertices   (np.ndarray): (N, 3) vertex positions.
+            edges      (np.ndarray): (E, 2) vertex indices.
+            line_color (str)       : Line color ("random" for a random color).
+            node_color (str)       : Node color ("random" for a random color).
+            width      (int)       : Line width.
+
+        Returns:
+            list[go.Scatter3d]: Draw data.
+
+        """
+
+        vertices = np.asarray(vertices, dtype=np.float64)
+        edges = np.asarray(edges, dtype=np.intp).reshape(-1, 2)
+        # (E, 3 points, 3 coordinates): A, B, gap
+        points = np.full((len(edges), 3, 3), np.nan)
+        points[:, 0] = vertices[edges[:, 0]]
+        points[:, 1] = vertices[edges[:, 1]]
+        xs, ys, zs = points.reshape(-1, 3).T
         return [
             go.Scatter3d(
                 x=xs,
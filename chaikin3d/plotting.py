@@ -1,6 +1,11 @@
 from __future__ import annotations
+from concurrent.futures import ProcessPoolExecutor
 from math import sqrt
 
+import chaikin3d.edge as E
+from chaikin3d.chaikin_groups import triangulate
+from chaikin3d.polyhedron import ChaikinOptions, Polyhedron, chaikin_snapshot
+
 # functions
 def draw_full(renderer: Renderer, poly: Polyhedron, a: A) -> None:
     """
@@ -110,7 +115,9 @@ def draw_full(renderer: Renderer, poly: Polyhedron, a: A) -> None:
     return renderer.draw_subplots()
 
 
-def draw_chaikin_evolution(renderer: Renderer, poly: Polyhedron, a: A) -> None:
+def draw_chaikin_evolution(
+    renderer: Renderer, poly: Polyhedron, a: A, generations: list = None
+) -> None:
     """
     Draw six different Chaikin generations of the same mesh
 
@@ -119,9 +126,11 @@ def draw_chaikin_evolution(renderer: Renderer, poly: Polyhedron, a: A) -> None:
     end at generation 5.
 
     Args:
-        renderer (Renderer)  : renderer for the mesh
-        poly     (Polyhedron): polyhedron (mesh) to draw
-        a        (A)         : this variable contains all the cmd-line arguments
+        renderer    (Renderer)  : renderer for the mesh
+        poly        (Polyhedron): polyhedron (mesh) to draw
+        a           (A)         : this variable contains all the cmd-line arguments
+        generations (list)      : if given, the (vertices, triangles) arrays of each
+                                  drawn generation are appended to this list
 
     Raises:
         AssertionError: Invalid number of Chaikin generations
@@ -145,6 +154,10 @@ def draw_chaikin_evolution(renderer: Renderer, poly: Polyhedron, a: A) -> None:
             "Chaikin Gen {}".format(i) for i in range(a.chaikin_generations + 1)
         ],
     )
+    if a.pipelined_evolution:
+        _draw_pipelined_evolution(renderer, poly, a, generations)
+        return renderer.draw_subplots()
+
     for i in range(a.chaikin_generations + 1):
         print(f"Generation: [{i}/{a.chaikin_generations}]")
         # get values
@@ -174,14 +187,79 @@ def draw_chaikin_evolution(renderer: Renderer, poly: Polyhedron, a: A) -> None:
         if a.show_graphical_edges:
             for gconn_dd in graphical_conn_dd:
                 renderer.add_to_subplot(gconn_dd)
+        if generations is not None:
+            generations.append((poly.vertex_array(), poly.triangles))
         # go to next plot
         renderer.next_subplot()
-        # Chaikin
-        poly = poly.Chaikin3D(a)
+        # Chaikin (the generation after the last subplot is never drawn)
+        if i < a.chaikin_generations:
+            poly = poly.Chaikin3D(a)
 
     return renderer.draw_subplots()
 
 
+def _draw_pipelined_evolution(
+    renderer: Renderer, poly: Polyhedron, a: A, generations: list = None
+) -> None:
+    """
+    Fill the evolution subplots, computing the next generation in a worker
+    process while the current one is drawn.
+
+    Both stages only exchange snapshot arrays (see 'Polyhedron.snapshot'), so
+    the drawing never touches the nodes and edges that are being subdivided.
+
+    Args:
+        renderer    (Renderer)  : renderer for the mesh (subplots initialized)
+        poly        (Polyhedron): polyhedron (mesh) of generation zero
+        a           (A)         : this variable contains all the cmd-line arguments
+        generations (list)      : if given, the (vertices, triangles) arrays of each
+                                  drawn generation are appended to this list
+
+    """
+
+    options = ChaikinOptions(a.chaikin_coef, a.order_edges, a.verbosity)
+    main_type = E.EDGE_TYPES.index("main")
+    snapshot = poly.snapshot()
+    with ProcessPoolExecutor(max_workers=1) as executor:
+        for i in range(a.chaikin_generations + 1):
+            print(f"Generation: [{i}/{a.chaikin_generations}]")
+            next_snapshot = (
+                executor.submit(chaikin_snapshot, snapshot, options)
+                if i < a.chaikin_generations
+                else None
+            )
+            # draw the current generation meanwhile
+            vertices = snapshot["vertices"]
+            triangles = triangulate(snapshot["face_offsets"], snapshot["face_indices"])
+            is_main = snapshot["edge_types"] == main_type
+            for sub_apoly_dd in renderer.get_mesh_draw_data(
+                vertices, triangles, alpha=a.alpha, color=a.polygon_color
+            ):
+                renderer.add_to_subplot(sub_apoly_dd)
+            if a.show_main_edges:
+                for mconn_dd in renderer.get_edge_lines_draw_data(
+                    vertices,
+                    snapshot["edges"][is_main],
+                    line_color=a.main_edge_color,
+                    node_color=a.node_color,
+                ):
+                    renderer.add_to_subplot(mconn_dd)
+            if a.show_graphical_edges:
+                for gconn_dd in renderer.get_edge_lines_draw_data(
+                    vertices,
+                    snapshot["edges"][~is_main],
+                    line_color=a.graphical_edge_color,
+                    node_color=a.node_color,
+                ):
+                    renderer.add_to_subplot(gconn_dd)
+            if generations is not None:
+                generations.append((vertices, triangles))
+            # go to next plot
+            renderer.next_subplot()
+            if next_snapshot is not None:
+                snapshot = next_snapshot.result()
+
+
 def chaikin_animation(
     renderer: Renderer, poly: Polyhedron, n: int, coef: float, alpha: float = 0.6
 ) -> None:
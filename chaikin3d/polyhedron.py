@@ -1,21 +1,59 @@
 # Chaikin3D - Polyhedron module
 from __future__ import annotations
-import sys
+import threading
 import time
 
 import numpy as np
 
 import chaikin3d.node as N
 import chaikin3d.edge as E
-from chaikin3d import matrix
-from chaikin3d.chaikin_groups import Group
+from chaikin3d import matrix, writers
+from chaikin3d.chaikin_groups import Group, triangulate
 from chaikin3d.dataholders import VirtualDict, VirtualSet
+from chaikin3d.sparse import CSRMatrix
 
 
-matrix.EPSILON = 10e-6
 VERBOSE_STEP = 100
 
 
+def chaikin_ratios(chaikin_coef: float) -> tuple[float, float]:
+    """
+    Returns the ratios used to place the new nodes on the edges.
+
+    Args:
+        chaikin_coef (float): Chaikin coefficient.
+
+    Returns:
+        tuple[float, float]:
+            (base_ratio, special_ratio): the special ratio is used when the
+            edge has already been truncated once.
+
+    """
+
+    return (chaikin_coef - 1) / chaikin_coef, (chaikin_coef - 2) / (chaikin_coef - 1)
+
+
+class ChaikinOptions:
+    """
+    Options of the Chaikin3D algorithm.
+
+    Same attributes as the command-line arguments used by 'Polyhedron.Chaikin3D'
+    (see 'arg_utils.read_args'), for the callers that do not parse any
+    command-line.
+
+    """
+
+    __slots__ = ("chaikin_coef", "order_edges", "verbosity")
+
+    def __init__(self, chaikin_coef: float = 4.0, order_edges: str = "none", verbosity: int = 0):
+        self.chaikin_coef = chaikin_coef
+        self.order_edges = order_edges
+        self.verbosity = verbosity
+
+    def __getitem__(self, key: str):
+        return getattr(self, key.replace(" ", "_"))
+
+
 class Polyhedron:
     """
     A Polyhedron, or mesh / 3D polygon is a set of nodes and vertices that form
@@ -29,18 +67,31 @@ class Polyhedron:
         groups: VirtualSet = None,
         initial_mesh: bool = True,
         verbose=False,
+        edges_ordered: bool = False,
     ):
         self.nodes = nodes
         self.groups = groups
         self.size = len(groups)
         self.initial_mesh = initial_mesh
+        # the edge-lists of the nodes are already ordered (see 'Node.order_edges')
+        self.edges_ordered = edges_ordered
         self.verbose = verbose
         self.vprint = print if verbose else lambda *args, **kwargs: None
-
-        for i, group in enumerate(self.groups):
-            if self.verbose and i % 100 == 0:
-                self.vprint(f"pre-calculted triangles from [{i}/{self.size}] group")
-            group.calc_triangles()
+        # node -> index in the node list
+        self.node_indices: dict[int, int] = {
+            id(node): index for index, node in enumerate(self.nodes)
+        }
+        # guards the caches calculated on demand (the polyhedron can be shared by several threads)
+        self._cache_lock = threading.Lock()
+        # (T, 3) array of node indices, calculated on demand (see 'triangles')
+        self._triangles: np.ndarray = None
+        # same, but for the triangles made of "main" or "graphical" edges only
+        self._typed_triangles: dict[str, np.ndarray] = dict()
+        # (rows, currents, partners, ratios) arrays of a Chaikin generation, see
+        # 'generation_operator' (None for the other polyhedra, and for the
+        # generations computed without 'parent_pairs', see 'Chaikin3D')
+        self.parent_pairs: tuple[np.ndarray, ...] = None
+        self._generation_operator: CSRMatrix = None
 
     def __str__(self):
         return "\n* ".join(map(str, self.nodes))
@@ -52,41 +103,212 @@ class Polyhedron:
         return self.nodes[index]
 
     def __iter__(self):
-        return (tr for group in self.groups for tr in group.triangles)
+        nodes = self.nodes
+        return (
+            N.Triangle(nodes[i], nodes[j], nodes[k]) for i, j, k in self.triangles
+        )
 
-    def _iter_triangles(self, type_: str = "any") -> VirtualSet:
-        triangle_list = list()
-        h_set = set()
-        for node in self.nodes:
-            for triangle in node.get_triangles(type_):
-                h = triangle.sim_hash
-                if h in h_set and triangle in triangle_list:
-                    continue
-                h_set.add(h)
-                yield triangle
-                triangle_list.append(triangle)
-        self.vprint("num triangles (" + str(type_) + ")", len(triangle_list))
-        return triangle_list
+    @property
+    def triangles(self) -> np.ndarray:
+        """
+        (T, 3) array of node indices, one row per triangle.
+
+        The triangles are only calculated when they are needed for the first
+        time (rendering, iteration, etc.), so that the intermediate generations
+        and the meshes that are only saved never get triangulated.
+
+        """
+
+        if self._triangles is None:
+            with self._cache_lock:
+                if self._triangles is None:
+                    self._triangles = self._calc_triangles()
+        return self._triangles
+
+    def invalidate_triangles(self) -> None:
+        """
+        Drop the cached triangles. Must be called when the groups are modified.
+
+        """
+
+        with self._cache_lock:
+            self._triangles = None
+            self._typed_triangles.clear()
+
+    def _calc_triangles(self) -> np.ndarray:
+        """
+        Triangulate all the groups of the polyhedron (see 'triangulate').
+
+        Returns:
+            np.ndarray: (T, 3) array of node indices.
+
+        """
+
+        for group in self.groups:
+            group.order()
+        self.vprint(f"Triangulating {self.size} groups")
+        return triangulate(*self.face_arrays(ordered=True))
+
+    def _iter_triangles(self, type_: str = "any") -> Iterable[N.Triangle]:
+        nodes = self.nodes
+        triangles = self.triangle_indices(type_)
+        self.vprint("num triangles (" + str(type_) + ")", len(triangles))
+        return (N.Triangle(nodes[i], nodes[j], nodes[k]) for i, j, k in triangles)
+
+    def triangle_indices(self, type_: str = "any") -> np.ndarray:
+        """
+        Returns the triangles made of edges of the given type, as node indices.
+
+        For the "any" type, these are the triangles of the groups. For the
+        "main" and "graphical" types, the triangles of all the nodes are
+        collected in a single pass, using their canonical key: the same
+        triangle is only kept once, with the node order of its first occurrence.
+
+        Args:
+            type_ (str): Type of the edges ("main", "graphical", "any").
 
-    def _set_recursion_limit(self):
-        sys.setrecursionlimit(10 ** 6)
+        Returns:
+            np.ndarray: (T, 3) array of node indices.
+
+        """
+
+        if type_ == "any":
+            return self.triangles
+        with self._cache_lock:
+            if type_ not in self._typed_triangles:
+                node_indices = self.node_indices
+                # canonical key -> first occurrence of the triangle
+                triangles: dict[tuple[int, int, int], N.Triangle] = dict()
+                for node in self.nodes:
+                    for triangle in node.get_triangles(type_):
+                        triangles.setdefault(triangle.key, triangle)
+                self._typed_triangles[type_] = np.array(
+                    [
+                        [node_indices[id(node)] for node in triangle]
+                        for triangle in triangles.values()
+                    ],
+                    dtype=np.intp,
+                ).reshape(-1, 3)
+            return self._typed_triangles[type_]
 
     def save(self, stream: _io.TextIOWrapper) -> None:
-        stream.write(
-            "# Mesh file generated by https://github.com/Nicolas-Reyland/Chaikin3D\n"
+        """
+        Write the polyhedron to a text stream, using the wavefront '.obj' format.
+
+        Args:
+            stream (_io.TextIOWrapper): Text stream.
+
+        """
+
+        writers.write_obj(stream, self.vertex_array(), *self.face_arrays())
+
+    def vertex_array(self) -> np.ndarray:
+        """
+        Returns the positions of the nodes.
+
+        Returns:
+            np.ndarray: (N, 3) array, with the precision of the node coordinates.
+
+        """
+
+        if not self.nodes:
+            return np.empty((0, 3))
+        return np.array([node.coords_list for node in self.nodes])
+
+    def face_arrays(self, ordered: bool = False) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Returns the groups (faces) of the polyhedron, as node indices.
+
+        Args:
+            ordered (bool): Use the ordered groups (ogroup) instead of the
+                            group nodes (same nodes, but possibly in another
+                            order and with duplicates).
+
+        Returns:
+            tuple[np.ndarray]:
+                (face_offsets, face_indices): the node indices of the i-th face
+                are face_indices[face_offsets[i]:face_offsets[i + 1]].
+
+        """
+
+        node_indices = self.node_indices
+        faces = [group.ogroup if ordered else group.nodes for group in self.groups]
+        face_sizes = np.fromiter(map(len, faces), dtype=np.int64, count=self.size)
+        face_offsets = np.zeros(self.size + 1, dtype=np.int64)
+        np.cumsum(face_sizes, out=face_offsets[1:])
+        face_indices = np.fromiter(
+            (node_indices[id(node)] for face in faces for node in face),
+            dtype=np.int64,
+            count=face_offsets[-1],
         )
+        return face_offsets, face_indices
 
-        # write vertex positions
-        stream.write("\n")
-        for node in self.nodes:
-            x, y, z = node.coords_list
-            stream.write(f"v {x} {y} {z}\n")
+    def edge_arrays(self) -> tuple[np.ndarray, ...]:
+        """
+        Returns the edges of the polyhedron and the order of the edge-lists.
+
+        Returns:
+            tuple[np.ndarray]:
+                (edges, edge_types, edge_order_offsets, edge_order_indices):
+                 * edges: (E, 2) array of node indices
+                 * edge_types: (E,) array of indices in 'E.EDGE_TYPES'
+                 * the edge-list of the i-th node is made of the edges
+                   edge_order_indices[edge_order_offsets[i]:edge_order_offsets[i + 1]]
+
+        """
+
+        node_indices = self.node_indices
+        edge_list: list[E.Edge] = list(self.get_edges("any"))
+        edge_indices = {id(edge): index for index, edge in enumerate(edge_list)}
+        edges = np.array(
+            [(node_indices[id(edge.A)], node_indices[id(edge.B)]) for edge in edge_list],
+            dtype=np.int64,
+        ).reshape(-1, 2)
+        edge_types = np.fromiter(
+            (E.EDGE_TYPES.index(edge.type_) for edge in edge_list),
+            dtype=np.uint8,
+            count=len(edge_list),
+        )
+        edge_order_offsets = np.zeros(len(self.nodes) + 1, dtype=np.int64)
+        np.cumsum([len(node.edge_list) for node in self.nodes], out=edge_order_offsets[1:])
+        edge_order_indices = np.fromiter(
+            (edge_indices[id(edge)] for node in self.nodes for edge in node.edge_list),
+            dtype=np.int64,
+            count=edge_order_offsets[-1],
+        )
+        return edges, edge_types, edge_order_offsets, edge_order_indices
+
+    def snapshot(self) -> dict[str, np.ndarray | bool]:
+        """
+        Returns the arrays describing the polyhedron.
+
+        The snapshot does not share any state with the polyhedron (nodes, edges,
+        groups), it can be sent to another process and turned back into a
+        polyhedron with 'Polyhedron.from_arrays(**snapshot)'.
+
+        Returns:
+            dict[str, np.ndarray | bool]:
+                The 'vertex_array', the ordered 'face_arrays', the 'edge_arrays'
+                and the 'edges_ordered' and 'initial_mesh' flags, named as the
+                arguments of 'from_arrays'.
+
+        """
 
-        # write faces
-        stream.write("\n")
         for group in self.groups:
-            node_indices = map(lambda n: str(self.nodes.index(n) + 1), group.nodes)
-            stream.write("f " + " ".join(node_indices) + "\n")
+            group.order()
+        face_offsets, face_indices = self.face_arrays(ordered=True)
+        edges, edge_types, edge_order_offsets, edge_order_indices = self.edge_arrays()
+        return {
+            "vertices": self.vertex_array(),
+            "face_offsets": face_offsets,
+            "face_indices": face_indices,
+            "edges": edges,
+            "edge_types": edge_types,
+            "edge_order_offsets": edge_order_offsets,
+            "edge_order_indices": edge_order_indices,
+            "edges_ordered": self.edges_ordered,
+            "initial_mesh": self.initial_mesh,
+        }
 
     def get_edges(self, type_: str = "any") -> Iterable[E.Edge]:
         """
@@ -170,14 +392,99 @@ class Polyhedron:
         # return polyhedron
         return Polyhedron(nodes, groups, initial_mesh=True, verbose=verbose)
 
-    def Chaikin3D(self, a: A) -> Polyhedron:
+    @staticmethod
+    def from_arrays(
+        vertices: np.ndarray,
+        face_offsets: np.ndarray,
+        face_indices: np.ndarray,
+        edges: np.ndarray = None,
+        edge_types: np.ndarray = None,
+        edge_order_offsets: np.ndarray = None,
+        edge_order_indices: np.ndarray = None,
+        edges_ordered: bool = False,
+        initial_mesh: bool = True,
+        verbose: bool = False,
+    ) -> Polyhedron:
+        """
+        Returns a Polyhedron instance based on the arrays from 'vertex_array',
+        'face_arrays' and 'edge_arrays'.
+
+        With edges, the faces are expected to be ordered (see 'face_arrays').
+        Without edges, the main edges are the cycles of the faces and the
+        graphical ones are created by 'Group.inter_connect'.
+
+        Args:
+            vertices           (np.ndarray): (N, 3) vertex positions.
+            face_offsets       (np.ndarray): (F + 1,) face offsets.
+            face_indices       (np.ndarray): Vertex indices of the faces.
+            edges              (np.ndarray): (E, 2) vertex indices (optional).
+            edge_types         (np.ndarray): (E,) edge types (see 'E.EDGE_TYPES').
+            edge_order_offsets (np.ndarray): (N + 1,) edge-list offsets (optional).
+            edge_order_indices (np.ndarray): Edge indices of the edge-lists.
+            edges_ordered      (bool)      : The given edge-lists are ordered.
+            initial_mesh       (bool)      : The polyhedron is not a Chaikin generation.
+            verbose            (bool)      : Verbose.
+
+        Returns:
+            Polyhedron: Generated polyhedron object.
+
+        """
+
+        if edges is None:
+            return Polyhedron.from_standard_vertex_lists(
+                vertices, np.split(face_indices, face_offsets[1:-1]), verbose
+            )
+
+        # build nodes
+        nodes: list[N.Node] = list(map(N.Node.from_point, vertices))
+        # build edges
+        edge_list: list[E.Edge] = [
+            E.Edge(nodes[a], nodes[b], E.EDGE_TYPES[type_index])
+            for (a, b), type_index in zip(edges.tolist(), edge_types.tolist())
+        ]
+        if edge_order_offsets is not None:
+            offsets = edge_order_offsets.tolist()
+            indices = edge_order_indices.tolist()
+            for i, node in enumerate(nodes):
+                node.edge_list = [edge_list[j] for j in indices[offsets[i] : offsets[i + 1]]]
+                node.num_edges = len(node.edge_list)
+        else:
+            edges_ordered = False
+            for edge in edge_list:
+                for node in edge:
+                    node.edge_list.append(edge)
+                    node.num_edges += 1
+        # build (already ordered) groups
+        offsets = face_offsets.tolist()
+        indices = face_indices.tolist()
+        groups: VirtualSet = VirtualSet()
+        for i in range(len(offsets) - 1):
+            group_node_list = [nodes[j] for j in indices[offsets[i] : offsets[i + 1]]]
+            group = Group(group_node_list)
+            group.ordered = True
+            group.ogroup = group_node_list
+            groups.add(group, verify=False)
+
+        return Polyhedron(
+            nodes,
+            groups,
+            initial_mesh=initial_mesh,
+            verbose=verbose,
+            edges_ordered=edges_ordered,
+        )
+
+    def Chaikin3D(self, a: A, *, parent_pairs: bool = False) -> Polyhedron:
         """
         Apply the Chaikin3D Algorithm to this polyhedron and return the new Polyhedron.
 
-        ...
+        This polyhedron is only read (its nodes, edges and groups are not
+        modified, the new main edges are copies of the old ones), so it can be
+        subdivided again, or by several threads at the same time.
 
         Args:
-            a (A): Arguments passed to the program (class holder).
+            a            (A)   : Arguments passed to the program (class holder), or ChaikinOptions.
+            parent_pairs (bool): Also record the parent pairs of the new nodes
+                                 (needed by 'generation_operator').
 
         Returns:
             Polyhedron: Polyhedron which was generated by this algorithm.
@@ -189,36 +496,38 @@ class Polyhedron:
             if a.verbosity == 2
             else (lambda *a, **k: None)
         )
-        # change recursion limit
-        self._set_recursion_limit()
         t1 = time.perf_counter()
         # init
-        base_ratio = (a.chaikin_coef - 1) / a.chaikin_coef
-        special_ratio = (a.chaikin_coef - 2) / (
-            a.chaikin_coef - 1
-        )  # when the vector has already been trunced once
+        base_ratio, special_ratio = chaikin_ratios(a.chaikin_coef)
         node_virt_dict: VirtualDict = VirtualDict()
         new_node_list: list[N.Node] = list()
-        new_edges: list[E.Edge] = []
-
-        self.vprint("Copying polyhedron data...")
-        # old_polyhedron = deepcopy(self)
-        old_nodes = self.nodes  # .copy()#old_polyhedron.nodes
-        old_groups = (
-            self.groups
-        )  # .copy()	#old_polyhedron.groups # if we don't want to make the method static, but return a new polyhedron without modifying this one, should need this !
+        # (sub-node id, current node index, partner node, partner is a sub-node, ratio),
+        # see 'generation_operator' (None: not recorded)
+        pairs: list[tuple[int, int, N.Node, bool, float]] = [] if parent_pairs else None
+        # id(old main edge) -> its copy, connecting the sub-nodes (this polyhedron is left untouched)
+        new_edges: dict[int, E.Edge] = dict()
+
+        old_nodes = self.nodes
+        old_groups = self.groups
         sub_node_count = 0
 
         # set of groups all the groups, one group per 'old' node
         final_group_set: VirtualSet = VirtualSet()
 
-        # First, order all the edge-lists in the nodes
-        if a.order_edges == "all" or (a.order_edges == "first" and self.initial_mesh):
+        # First, order all the edge-lists in the nodes. Generations built with
+        # order_edges == "all" already come with ordered edge-lists, so this
+        # only runs on the input mesh. The ordered lists are kept aside, this
+        # polyhedron is only read (see 'Node.ordered_edges')
+        edge_lists: list[list[E.Edge]] = [node.edge_list for node in self.nodes]
+        if not self.edges_ordered and (
+            a.order_edges == "all" or (a.order_edges == "first" and self.initial_mesh)
+        ):
             self.vprint("Ordering the edge-lists")
             duplicate_triangles = VirtualSet()
-            for node in self.nodes:
+            for i, node in enumerate(self.nodes):
                 # order edges
-                duplicate_triangles &= node.order_edges(duplicate_triangles)
+                edge_lists[i], removed_triangles = node.ordered_edges(duplicate_triangles)
+                duplicate_triangles &= removed_triangles
 
         # count of the nodes
         total_nodes = len(self.nodes)
@@ -232,23 +541,28 @@ class Polyhedron:
             vvprint(f"{current_node = }")
             # create sub-nodes
             group_set: VirtualSet = VirtualSet()
-            for edge in current_node.edge_list:
+            for edge in edge_lists[node_index]:
                 if edge.type_ == "main":
                     vvprint(f"  {edge = }")
-                    partner_node = edge.get_partner_node(current_node)
+                    new_edge = new_edges.get(id(edge))
+                    if new_edge is None:
+                        # first end of the edge: copy it
+                        new_edge = E.Edge(edge.A, edge.B, edge.type_)
+                        new_edges[id(edge)] = new_edge
+                        partner_node = edge.get_partner_node(current_node)
+                        partner_is_new = False
+                        ratio = base_ratio
+                    else:
+                        # partner is one of the new nodes (already has been truncated once)
+                        partner_node = new_edge.get_partner_node(current_node)
+                        partner_is_new = True
+                        ratio = special_ratio
                     vvprint(f"    {partner_node = }")
 
                     # calculate new pos (calculations done from num_edges to current node)
                     u = matrix.vector_from_points(
                         partner_node.coords, current_node.coords
                     )
-                    # get the right coefficient
-                    if (
-                        partner_node not in self.nodes
-                    ):  # partner is one of the new nodes (already has been truncated once)
-                        ratio = special_ratio
-                    else:
-                        ratio = base_ratio
                     # new vector
                     v: list[float] = u * ratio
                     w = partner_node.coords + v
@@ -256,14 +570,28 @@ class Polyhedron:
                     # create new Node
                     sub_node = N.Node.from_point(w)
 
-                    # not creating a new Edge, because modifying the old one is really easier
-                    # re-connect edge to new node & vice-versa
-                    edge.update_node(current_node, sub_node)
-                    sub_node.edge_list = [edge]
+                    # re-connect the copy of the edge to the new node & vice-versa
+                    new_edge.update_node(current_node, sub_node)
+                    sub_node.edge_list = [new_edge]
                     sub_node.num_edges = 1
 
                     # add new Node to (virtual) set
-                    group_set.add(sub_node)
+                    if group_set.add(sub_node):
+                        if pairs is not None:
+                            pairs.append(
+                                (id(sub_node), node_index, partner_node, partner_is_new, ratio)
+                            )
+                    else:
+                        # a sub-node is already at this position (the partners of
+                        # both edges are at the same position): the copy of the
+                        # edge ends on it instead
+                        kept_node = next(node for node in group_set if node == sub_node)
+                        if new_edge.A is sub_node:
+                            new_edge.A = kept_node
+                        else:
+                            new_edge.B = kept_node
+                        kept_node.edge_list.append(new_edge)
+                        kept_node.num_edges += 1
                 elif edge.type_ == "graphical":
                     continue
                 else:
@@ -333,17 +661,17 @@ class Polyhedron:
         # one new group per old group (talking about old-surface-groups !)
         for old_group in old_groups:
             # an old_group should be ordered, but let's make sure of it
-            # if the group is already ordered, it will instantly return anyway
-            old_group.order()
+            # (without ordering it in place: this polyhedron is only read)
+            old_ogroup = old_group.ogroup if old_group.ordered else old_group.ordered_nodes()
             new_group_node_list: list[N.Node] = list()
 
             # iterate over the nodes
             # we start at 1 bc we do them in pairs and we don't want
             # a node to be in 2 pairs (first and last one for example)
-            for i in range(old_group.size):
+            for i in range(len(old_ogroup)):
                 # get two nodes in group that 'follow' each other
-                current_old_node = old_group.ogroup[i - 1]
-                partner_old_node = old_group.ogroup[i]
+                current_old_node = old_ogroup[i - 1]
+                partner_old_node = old_ogroup[i]
                 # get corresponding new node lists (one old node has multiple new nodes -> thx Chaikin)
                 # 'current_old_node' corresponding new nodes
                 current_old_node_corresp_new_nodes = node_virt_dict[current_old_node]
@@ -405,13 +733,140 @@ class Polyhedron:
         # Merge groups together
         final_group_set |= new_group_set
 
+        # Every new node is part of exactly one chaikin group and of the surface
+        # groups around it, all of them ordered: its edge-list can be ordered
+        # right away, instead of running 'Node.order_edges' on the next generation
+        edges_ordered = a.order_edges == "all"
+        if edges_ordered:
+            self.vprint("Ordering the new edge-lists")
+            Polyhedron._order_edges_from_groups(new_node_list, final_group_set)
+
         # return the final polyhedron
         self.vprint(
             f"Chaikin 3D iteration finished {num_new_groups} nodes in {time.perf_counter() - t1:.3} sec"
         )
-        return Polyhedron(
-            new_node_list, final_group_set, initial_mesh=False, verbose=self.verbose
+        new_polyhedron = Polyhedron(
+            new_node_list,
+            final_group_set,
+            initial_mesh=False,
+            verbose=self.verbose,
+            edges_ordered=edges_ordered,
         )
+        if pairs is not None:
+            new_polyhedron.parent_pairs = self._parent_pair_arrays(pairs, new_polyhedron)
+        return new_polyhedron
+
+    def _parent_pair_arrays(
+        self,
+        parent_pairs: list[tuple[int, int, N.Node, bool, float]],
+        new_polyhedron: Polyhedron,
+    ) -> tuple[np.ndarray, ...]:
+        """
+        Turn the nodes of the parent pairs into node indices.
+
+        Args:
+            parent_pairs   (list[tuple]): (sub-node id, current node index, partner
+                                          node, partner is a sub-node, ratio) of
+                                          each sub-node.
+            new_polyhedron (Polyhedron) : Polyhedron made of the sub-nodes.
+
+        Returns:
+            tuple[np.ndarray]:
+                (rows, currents, partners, ratios): the node rows[i] of the new
+                polyhedron is (1 - ratios[i]) * partner + ratios[i] * (node
+                currents[i] of this polyhedron). The partner is the node
+                partners[i] of this polyhedron if partners[i] >= 0, otherwise the
+                node -1 - partners[i] of the new polyhedron (already truncated once).
+
+        """
+
+        old_indices = self.node_indices
+        new_indices = new_polyhedron.node_indices
+        rows = np.fromiter((new_indices[pair[0]] for pair in parent_pairs), dtype=np.int64)
+        currents = np.fromiter((pair[1] for pair in parent_pairs), dtype=np.int64)
+        partners = np.fromiter(
+            (
+                -1 - new_indices[id(pair[2])] if pair[3] else old_indices[id(pair[2])]
+                for pair in parent_pairs
+            ),
+            dtype=np.int64,
+        )
+        ratios = np.fromiter((pair[4] for pair in parent_pairs), dtype=np.float64)
+        return rows, currents, partners, ratios
+
+    def generation_operator(self) -> CSRMatrix:
+        """
+        Returns the sparse matrix that computes the vertices of this Chaikin
+        generation from the vertices of the previous one.
+
+        Every new node is an affine combination of two nodes: its current (old)
+        node and the partner node of the edge, either an old node or a new
+        node that was already truncated once (then itself a combination of two
+        old nodes). So 'operator @ previous.vertex_array()' gives the vertices of
+        this polyhedron, and the operators of several generations compose
+        (see 'CSRMatrix.compose'), as long as the topology does not change.
+
+        Returns:
+            CSRMatrix: (number of nodes, number of nodes of the previous generation) matrix.
+
+        Raises:
+            ValueError: The polyhedron is not a Chaikin generation computed
+                        with 'parent_pairs' (see 'Chaikin3D').
+
+        """
+
+        if self._generation_operator is not None:
+            return self._generation_operator
+        if self.parent_pairs is None:
+            raise ValueError(
+                "The polyhedron is not a Chaikin generation computed with 'parent_pairs'"
+            )
+        rows, currents, partners, ratios = self.parent_pairs
+        num_old_nodes = int(currents.max()) + 1 if len(currents) else 0
+        num_old_nodes = max(num_old_nodes, int(partners.max()) + 1 if len(partners) else 0)
+        shape = (len(self.nodes), num_old_nodes)
+        old_partner = partners >= 0
+        # contributions of the old nodes
+        direct = CSRMatrix.from_coo(
+            np.concatenate((rows, rows[old_partner])),
+            np.concatenate((currents, partners[old_partner])),
+            np.concatenate((ratios, 1 - ratios[old_partner])),
+            shape,
+        )
+        # contributions of the new partner nodes (new -> new matrix, nilpotent)
+        indirect = CSRMatrix.from_coo(
+            rows[~old_partner],
+            -1 - partners[~old_partner],
+            1 - ratios[~old_partner],
+            (len(self.nodes), len(self.nodes)),
+        )
+        operator = term = direct
+        while indirect.nnz:
+            term = indirect @ term
+            if not term.nnz:
+                break
+            operator = operator + term
+        self._generation_operator = operator
+        return operator
+
+    @staticmethod
+    def _order_edges_from_groups(nodes: list[N.Node], groups: VirtualSet) -> None:
+        """
+        Order the edge-lists of the nodes, using the (ordered) groups they are part of.
+
+        Args:
+            nodes  (list[Node])       : Nodes which edge-lists should be ordered.
+            groups (VirtualSet[Group]): Ordered groups these nodes are part of.
+
+        """
+
+        # (group, position) couples for each node
+        memberships: dict[int, list[tuple[Group, int]]] = dict()
+        for group in groups:
+            for position, node in enumerate(group.ogroup):
+                memberships.setdefault(id(node), []).append((group, position))
+        for node in nodes:
+            node.order_edges_from_groups(memberships.get(id(node), []))
 
     @staticmethod
     def _nec_group_cond(group):
@@ -423,85 +878,23 @@ class Polyhedron:
                     return False
         return True
 
-    @staticmethod
-    def _find_chaikin_groups_for_node(chaikin_node: N.Node) -> list[VirtualSet]:
-        chaikin_group_set_list: list[VirtualSet] = []
-        main_edges = chaikin_node.get_edges_by_type("main")
-        num_main_edges = len(main_edges)
-
-        for i in range(num_main_edges):
-            #
-            second_node = main_edges[i].get_partner_node(chaikin_node)
-            for j in range(num_main_edges):
-                if i == j:
-                    continue
-                #
-                end_node = main_edges[j].get_partner_node(chaikin_node)
-                plane = matrix.Plane.from_points(
-                    chaikin_node.coords, second_node.coords, end_node.coords
-                )
-                #
-                for sub_edge in second_node.get_edges_by_type("main"):
-                    partner_node = sub_edge.get_partner_node(second_node)
-                    local_group_set_list: list[
-                        VirtualSet
-                    ] = Polyhedron._rec_find_chaikin_group_with_plane(
-                        chaikin_node,
-                        end_node,
-                        second_node,
-                        partner_node,
-                        VirtualSet([end_node, chaikin_node, second_node]),
-                        plane,
-                    )
-                    for local_group in local_group_set_list:
-                        if local_group not in chaikin_group_set_list:
-                            chaikin_group_set_list.append(local_group)
 
-        return chaikin_group_set_list
+#
 
-    @staticmethod
-    def _rec_find_chaikin_group_with_plane(
-        start_node: N.Node,
-        end_node: N.Node,
-        second_node: N.Node,
-        current_node: N.Node,
-        current_group: VirtualSet,
-        plane: matrix.Plane,
-        depth: int = 0,
-    ) -> list[VirtualSet]:
-
-        # end of group ?
-        if current_node == end_node:
-            return [current_group]
-        # invalid node ?
-        if current_node in current_group or not plane.point_on_plane(
-            current_node.coords
-        ):
-            return []
-
-        # add to group
-        current_group.add(current_node)
-
-        # continue search
-        local_group_set_list: list[VirtualSet] = []
-        for edge in current_node.get_edges_by_type("main"):
-            partner_node = edge.get_partner_node(current_node)
-            # sub_local_group_set_list are the chaikin groups that go through the partner_node (long & complicated name for something very simple)
-            sub_local_group_set_list = Polyhedron._rec_find_chaikin_group_with_plane(
-                start_node,
-                end_node,
-                second_node,
-                partner_node,
-                current_group.copy(),
-                plane,
-                depth + 1,
-            )
-            # add unique groups
-            for group in sub_local_group_set_list:
-                if group not in local_group_set_list:
-                    local_group_set_list.append(group)
 
-        return local_group_set_list
+def chaikin_snapshot(snapshot: dict, a: A) -> dict:
+    """
+    Apply the Chaikin3D Algorithm to a polyhedron snapshot (see 'Polyhedron.snapshot').
+
+    Only arrays go in and out, so this can run in a worker process.
 
+    Args:
+        snapshot (dict): Snapshot of the polyhedron.
+        a        (A)   : Chaikin options (see 'ChaikinOptions').
 
-#
+    Returns:
+        dict: Snapshot of the next generation.
+
+    """
+
+    return Polyhedron.from_arrays(**snapshot).Chaikin3D(a).snapshot()
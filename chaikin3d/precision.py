@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+""" chaikin3d/precision.py """
+
+from __future__ import annotations
+
+import numpy as np
+
+from chaikin3d.polyhedron import Polyhedron
+
+
+__all__ = [
+    'PRECISIONS',
+    'PrecisionReport',
+    'compare_precisions',
+]
+
+
+# --precision option -> vertex dtype
+PRECISIONS = {32: np.float32, 64: np.float64}
+
+
+class PrecisionReport:
+    """
+    Error of the float32 vertices against the float64 ones, per generation
+    (see 'compare_precisions').
+
+    The errors are distances, also given relative to the bounding box diagonal
+    of the float64 mesh.
+
+    """
+
+    __slots__ = ("rows",)
+
+    def __init__(self):
+        # (generation, number of vertices, max error, rms error, relative max error)
+        self.rows: list[tuple[int, int, float, float, float]] = []
+
+    def add(self, generation: int, vertices_32: np.ndarray, vertices_64: np.ndarray) -> None:
+        if vertices_32.shape != vertices_64.shape:
+            # the generations do not have the same structure anymore
+            self.rows.append((generation, len(vertices_64), np.nan, np.nan, np.nan))
+            return
+        errors = np.linalg.norm(vertices_32.astype(np.float64) - vertices_64, axis=1)
+        diagonal = float(np.linalg.norm(np.ptp(vertices_64, axis=0))) if len(vertices_64) else 0.0
+        max_error = float(errors.max()) if len(errors) else 0.0
+        rms_error = float(np.sqrt(np.mean(errors ** 2))) if len(errors) else 0.0
+        self.rows.append(
+            (generation, len(vertices_64), max_error, rms_error, max_error / diagonal if diagonal else 0.0)
+        )
+
+    def __str__(self) -> str:
+        lines = [
+            "Precision report (float32 vs float64 vertices):",
+            f"{'generation':>10} {'vertices':>10} {'max error':>12} {'rms error':>12} {'max / diagonal':>15}",
+        ]
+        for generation, num_vertices, max_error, rms_error, relative_error in self.rows:
+            if np.isnan(max_error):
+                lines.append(f"{generation:>10} {num_vertices:>10}   different structure (not comparable)")
+                continue
+            lines.append(
+                f"{generation:>10} {num_vertices:>10} {max_error:>12.3e} {rms_error:>12.3e} {relative_error:>15.3e}"
+            )
+        return "\n".join(lines)
+
+
+def compare_precisions(snapshot: dict, a: A, generations: int) -> PrecisionReport:
+    """
+    Apply the Chaikin3D Algorithm to the same polyhedron in float32 and in
+    float64, and measure the error of the float32 vertices at each generation.
+
+    Args:
+        snapshot    (dict): Snapshot of the polyhedron (see 'Polyhedron.snapshot').
+        a           (A)   : Chaikin options (see 'ChaikinOptions').
+        generations (int) : Number of chaikin generations.
+
+    Returns:
+        PrecisionReport: Errors, per generation (generation zero included).
+
+    """
+
+    polyhedra = [
+        Polyhedron.from_arrays(**{**snapshot, "vertices": snapshot["vertices"].astype(dtype)})
+        for dtype in (np.float32, np.float64)
+    ]
+    report = PrecisionReport()
+    for generation in range(generations + 1):
+        if generation:
+            polyhedra = [poly.Chaikin3D(a) for poly in polyhedra]
+        report.add(generation, *(poly.vertex_array() for poly in polyhedra))
+    return report
@@ -0,0 +1,462 @@
+# -*- coding: utf-8 -*-
+""" chaikin3d/preprocessing.py """
+
+from __future__ import annotations
+
+import numpy as np
+
+from chaikin3d import matrix
+
+
+__all__ = [
+    'weld_vertices',
+    'merge_coplanar_faces',
+    'face_components',
+    'extract_faces',
+]
+
+
+# number of bits per axis in the packed cell keys (3 * 21 bits fit in an int64)
+_CELL_BITS = 21
+# neighbor cells to visit: the cell itself and half of the 26 others (the other
+# half is visited from the neighbors, as the pairs are symmetric)
+_NEIGHBOR_OFFSETS = np.array(
+    [
+        (dx, dy, dz)
+        for dx in (-1, 0, 1)
+        for dy in (-1, 0, 1)
+        for dz in (-1, 0, 1)
+        if (dx, dy, dz) >= (0, 0, 0)
+    ],
+    dtype=np.int64,
+)
+
+
+def _cell_pairs(
+    starts_a: np.ndarray, counts_a: np.ndarray, starts_b: np.ndarray, counts_b: np.ndarray
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Returns all the (i, j) pairs of (sorted) vertex positions, i in cell a and
+    j in cell b, for each (a, b) pair of cells.
+
+    """
+
+    sizes = counts_a * counts_b
+    total = int(sizes.sum())
+    pair_of = np.repeat(np.arange(len(sizes)), sizes)
+    within = np.arange(total) - np.repeat(np.cumsum(sizes) - sizes, sizes)
+    i = starts_a[pair_of] + within // counts_b[pair_of]
+    j = starts_b[pair_of] + within % counts_b[pair_of]
+    return i, j
+
+
+def _connected_components(num_vertices: int, i: np.ndarray, j: np.ndarray) -> np.ndarray:
+    """
+    Returns the smallest vertex index of the connected component of each vertex
+    (edges: the (i, j) pairs), using label propagation and pointer jumping.
+
+    """
+
+    labels = np.arange(num_vertices)
+    while True:
+        smallest = np.minimum(labels[i], labels[j])
+        new_labels = labels.copy()
+        np.minimum.at(new_labels, i, smallest)
+        np.minimum.at(new_labels, j, smallest)
+        new_labels = new_labels[new_labels]
+        if np.array_equal(new_labels, labels):
+            return labels
+        labels = new_labels
+
+
+def _weld_map(vertices: np.ndarray, tolerance: float) -> np.ndarray:
+    """
+    Returns the index of the vertex that each vertex is merged into (the first
+    one of its cluster of vertices closer than 'tolerance').
+
+    """
+
+    num_vertices = len(vertices)
+    if tolerance <= 0:
+        _, first, inverse = np.unique(vertices, axis=0, return_index=True, return_inverse=True)
+        return first[inverse.reshape(-1)]
+
+    # uniform grid: any two vertices closer than the tolerance are in the same
+    # cell or in neighbor cells (the cells are larger than the tolerance if
+    # needed, so that the packed keys fit in 64 bits)
+    lower = vertices.min(axis=0)
+    extent = float((vertices.max(axis=0) - lower).max())
+    cell_size = max(float(tolerance), extent / (2 ** _CELL_BITS - 3))
+    cells = ((vertices - lower) / cell_size).astype(np.int64) + 1
+    shifts = np.array([2 * _CELL_BITS, _CELL_BITS, 0], dtype=np.int64)
+    keys = (cells << shifts).sum(axis=1)
+
+    # vertices sorted by cell, and the cells as (key, start, count)
+    order = np.argsort(keys, kind="stable")
+    cell_keys, cell_starts, cell_counts = np.unique(
+        keys[order], return_index=True, return_counts=True
+    )
+    cell_coords = cells[order][cell_starts]
+
+    # candidate pairs (positions in the sorted order)
+    pair_i, pair_j = [], []
+    for offset in _NEIGHBOR_OFFSETS:
+        neighbor_keys = ((cell_coords + offset) << shifts).sum(axis=1)
+        positions = np.searchsorted(cell_keys, neighbor_keys)
+        positions[positions == len(cell_keys)] = 0
+        found = np.flatnonzero(cell_keys[positions] == neighbor_keys)
+        if not len(found):
+            continue
+        i, j = _cell_pairs(
+            cell_starts[found],
+            cell_counts[found],
+            cell_starts[positions[found]],
+            cell_counts[positions[found]],
+        )
+        if not offset.any():
+            keep = i < j
+            i, j = i[keep], j[keep]
+        pair_i.append(i)
+        pair_j.append(j)
+    i, j = order[np.concatenate(pair_i)], order[np.concatenate(pair_j)]
+    close = np.linalg.norm(vertices[i] - vertices[j], axis=1) <= tolerance
+    return _connected_components(num_vertices, i[close], j[close])
+
+
+def weld_vertices(
+    vertices: np.ndarray,
+    face_offsets: np.ndarray,
+    face_indices: np.ndarray,
+    tolerance: float = 0.0,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Merge the vertices closer than 'tolerance' and remap the faces.
+
+    Exporters often split the vertices along the UV or normal seams: the faces
+    on each side of the seam are then disconnected. The vertices are hashed in
+    a uniform grid (cells of the size of the tolerance), so that only the
+    vertices of neighbor cells are compared. Each cluster of close vertices is
+    merged into its first vertex. After the merge, the repeated consecutive
+    vertices of a face are removed, and the faces with less than 3 vertices
+    are dropped.
+
+    Args:
+        vertices     (np.ndarray): (N, 3) vertex positions.
+        face_offsets (np.ndarray): (F + 1,) face offsets.
+        face_indices (np.ndarray): Vertex indices of the faces.
+        tolerance    (float)     : Maximum distance between merged vertices
+                                   (0: exact duplicates only).
+
+    Returns:
+        tuple[np.ndarray]:
+            (vertices, face_offsets, face_indices) of the welded mesh (the
+            remaining vertices keep their order).
+
+    Raises:
+        ValueError: Negative tolerance.
+
+    """
+
+    if tolerance < 0:
+        raise ValueError(f"Tolerance must be positive ({tolerance} >= 0)")
+    vertices = np.asarray(vertices)
+    face_offsets = np.asarray(face_offsets, dtype=np.int64)
+    face_indices = np.asarray(face_indices, dtype=np.int64)
+    if not len(vertices):
+        return vertices, face_offsets, face_indices
+
+    merged_into = _weld_map(vertices, tolerance)
+    kept = np.flatnonzero(merged_into == np.arange(len(vertices)))
+    new_indices = np.searchsorted(kept, merged_into)
+    face_indices = new_indices[face_indices]
+
+    # remove the repeated consecutive vertices (cyclic) of the faces
+    face_sizes = np.diff(face_offsets)
+    face_of = np.repeat(np.arange(len(face_sizes)), face_sizes)
+    previous = np.arange(len(face_indices)) - 1
+    firsts = face_offsets[:-1][face_sizes > 0]
+    previous[firsts] = face_offsets[1:][face_sizes > 0] - 1
+    keep = face_indices != face_indices[previous]
+    face_sizes = np.bincount(face_of[keep], minlength=len(face_sizes))
+    # drop the faces that collapsed
+    keep &= face_sizes[face_of] >= 3
+    face_sizes = np.where(face_sizes >= 3, face_sizes, 0)
+    face_sizes = face_sizes[face_sizes > 0]
+    face_offsets = np.zeros(len(face_sizes) + 1, dtype=np.int64)
+    np.cumsum(face_sizes, out=face_offsets[1:])
+    return vertices[kept], face_offsets, face_indices[keep]
+
+
+def _face_planes(
+    vertices: np.ndarray, face_offsets: np.ndarray, face_indices: np.ndarray, next_positions: np.ndarray
+) -> matrix.PlaneBatch:
+    """
+    Returns the (normalized) planes of the faces: Newell normal, through the
+    centroid. The degenerate faces get a null plane.
+
+    """
+
+    face_sizes = np.diff(face_offsets)
+    face_of = np.repeat(np.arange(len(face_sizes)), face_sizes)
+    current, following = vertices[face_indices], vertices[face_indices[next_positions]]
+    crosses = np.cross(current, following)
+    normals = np.stack(
+        [np.bincount(face_of, crosses[:, k], len(face_sizes)) for k in range(3)], axis=1
+    )
+    centroids = np.stack(
+        [np.bincount(face_of, current[:, k], len(face_sizes)) for k in range(3)], axis=1
+    ) / np.maximum(face_sizes, 1)[:, None]
+    d = -np.einsum("ij,ij->i", normals, centroids)
+    return matrix.PlaneBatch(np.column_stack((normals, d))).normalized()
+
+
+def _max_face_dist(
+    planes: matrix.PlaneBatch,
+    vertices: np.ndarray,
+    face_offsets: np.ndarray,
+    face_indices: np.ndarray,
+    faces: np.ndarray,
+    plane_indices: np.ndarray,
+) -> np.ndarray:
+    """
+    Returns the largest distance of the vertices of faces[i] to the plane
+    'plane_indices[i]', for each i.
+
+    """
+
+    sizes = face_offsets[faces + 1] - face_offsets[faces]
+    pair_of = np.repeat(np.arange(len(faces)), sizes)
+    positions = np.arange(int(sizes.sum())) - np.repeat(np.cumsum(sizes) - sizes, sizes)
+    positions += face_offsets[faces][pair_of]
+    dists = planes.normal_dist(vertices[face_indices[positions]], plane_indices[pair_of])
+    max_dists = np.zeros(len(faces))
+    np.maximum.at(max_dists, pair_of, dists)
+    return max_dists
+
+
+def _boundary_loop(half_edges: list[tuple[int, int]]) -> list[int]:
+    """
+    Returns the vertices of the single simple loop made by the half-edges, or
+    None if they do not make a single simple loop (holes, pinched vertices).
+
+    """
+
+    following = dict(half_edges)
+    if len(following) != len(half_edges):
+        return None
+    loop = [half_edges[0][0]]
+    while True:
+        vertex = following.get(loop[-1])
+        if vertex is None:
+            return None
+        if vertex == loop[0]:
+            break
+        loop.append(vertex)
+        if len(loop) > len(half_edges):
+            return None
+    return loop if len(loop) == len(half_edges) else None
+
+
+def _is_convex(points: np.ndarray, normal: np.ndarray, tolerance: float) -> bool:
+    """
+    Is the polygon convex (collinear vertices allowed), winding around 'normal' ?
+
+    """
+
+    edges = np.roll(points, -1, axis=0) - points
+    turns = np.cross(np.roll(edges, 1, axis=0), edges) @ normal
+    lengths = np.linalg.norm(edges, axis=1)
+    return bool((turns >= -tolerance * (lengths + np.roll(lengths, 1))).all())
+
+
+def merge_coplanar_faces(
+    vertices: np.ndarray,
+    face_offsets: np.ndarray,
+    face_indices: np.ndarray,
+    tolerance: float = None,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Merge the adjacent coplanar faces into single polygons.
+
+    CAD exporters often triangulate the flat regions, and each generation of
+    the Chaikin3D algorithm multiplies all their vertices, while the groups
+    natively support n-gons. Two faces are merged when they share an edge
+    (used by those two faces only, in opposite directions) and the vertices
+    of each face are on the plane of the other (see 'matrix.PlaneBatch'). A
+    merged region must also stay on the plane of its first face (no drift
+    along slightly curved surfaces), be bounded by a single simple loop and
+    be convex (so that it is drawn as before), otherwise its faces are kept.
+    The vertices only used inside the merged regions are removed.
+
+    Args:
+        vertices     (np.ndarray): (N, 3) vertex positions.
+        face_offsets (np.ndarray): (F + 1,) face offsets.
+        face_indices (np.ndarray): Vertex indices of the faces.
+        tolerance    (float)     : Maximum distance of a vertex to the plane of
+                                   a merged face (default: matrix.EPSILON times
+                                   the bounding box diagonal).
+
+    Returns:
+        tuple[np.ndarray]:
+            (vertices, face_offsets, face_indices) of the merged mesh (the
+            merged polygons replace the first face of their region).
+
+    """
+
+    source = np.asarray(vertices).reshape(-1, 3)
+    vertices = source.astype(np.float64)
+    face_offsets = np.asarray(face_offsets, dtype=np.int64)
+    face_indices = np.asarray(face_indices, dtype=np.int64)
+    num_vertices, num_faces = len(vertices), len(face_offsets) - 1
+    if not num_faces:
+        return source, face_offsets, face_indices
+    if tolerance is None:
+        tolerance = matrix.EPSILON * float(np.linalg.norm(np.ptp(vertices, axis=0)))
+
+    face_sizes = np.diff(face_offsets)
+    face_of = np.repeat(np.arange(num_faces), face_sizes)
+    next_positions = np.arange(len(face_indices)) + 1
+    non_empty = face_sizes > 0
+    next_positions[face_offsets[1:][non_empty] - 1] = face_offsets[:-1][non_empty]
+    planes = _face_planes(vertices, face_offsets, face_indices, next_positions)
+    flat = planes.base() > 0
+
+    # half-edges (a -> b) and their twin (b -> a) on the edges used twice
+    a, b = face_indices, face_indices[next_positions]
+    keys = np.minimum(a, b) * num_vertices + np.maximum(a, b)
+    order = np.argsort(keys, kind="stable")
+    _, starts, counts = np.unique(keys[order], return_index=True, return_counts=True)
+    shared = starts[counts == 2]
+    first, second = order[shared], order[shared + 1]
+    twins = (a[first] == b[second]) & (a[first] != b[first])
+    first, second = first[twins], second[twins]
+    f, g = face_of[first], face_of[second]
+    candidates = (f != g) & flat[f] & flat[g]
+    f, g, first, second = f[candidates], g[candidates], first[candidates], second[candidates]
+
+    # coplanar couples of adjacent faces
+    coplanar = (
+        np.maximum(
+            _max_face_dist(planes, vertices, face_offsets, face_indices, g, f),
+            _max_face_dist(planes, vertices, face_offsets, face_indices, f, g),
+        )
+        <= tolerance
+    )
+    f, g, first, second = f[coplanar], g[coplanar], first[coplanar], second[coplanar]
+
+    # regions: the faces must stay on the plane of the first face of their region
+    all_faces = np.arange(num_faces)
+    while True:
+        labels = _connected_components(num_faces, f, g)
+        drifting = _max_face_dist(
+            planes, vertices, face_offsets, face_indices, all_faces, labels
+        ) > tolerance
+        if not drifting.any():
+            break
+        keep = ~(drifting[f] | drifting[g])
+        f, g, first, second = f[keep], g[keep], first[keep], second[keep]
+
+    # boundary half-edges of the regions: the half-edges without twin in the region
+    interior = np.zeros(len(face_indices), dtype=bool)
+    interior[first] = interior[second] = True
+    region_sizes = np.bincount(labels, minlength=num_faces)
+    boundary = np.flatnonzero(~interior & (region_sizes[labels[face_of]] > 1))
+    half_edges: dict[int, list[tuple[int, int]]] = dict()
+    for region, start, end in zip(
+        labels[face_of[boundary]].tolist(), a[boundary].tolist(), b[boundary].tolist()
+    ):
+        half_edges.setdefault(region, []).append((start, end))
+
+    merged: dict[int, list[int]] = dict()
+    for region, region_half_edges in half_edges.items():
+        loop = _boundary_loop(region_half_edges)
+        if loop is None or not _is_convex(
+            vertices[loop], planes.coefficients[region, :3], tolerance
+        ):
+            labels[labels == region] = np.flatnonzero(labels == region)
+            continue
+        merged[region] = loop
+
+    # new faces: the merged polygons replace the first face of their region
+    faces: list[np.ndarray] = []
+    for face in range(num_faces):
+        region = labels[face]
+        if region != face:
+            continue
+        if region in merged:
+            faces.append(np.array(merged[region], dtype=np.int64))
+        else:
+            faces.append(face_indices[face_offsets[face] : face_offsets[face + 1]])
+    new_sizes = np.fromiter(map(len, faces), dtype=np.int64, count=len(faces))
+    new_offsets = np.zeros(len(faces) + 1, dtype=np.int64)
+    np.cumsum(new_sizes, out=new_offsets[1:])
+    new_indices = np.concatenate(faces)
+
+    # remove the vertices left inside the merged regions
+    removed = np.zeros(num_vertices, dtype=bool)
+    removed[face_indices] = True
+    removed[new_indices] = False
+    kept = np.flatnonzero(~removed)
+    new_positions = np.full(num_vertices, -1, dtype=np.int64)
+    new_positions[kept] = np.arange(len(kept))
+    return source[kept], new_offsets, new_positions[new_indices]
+
+
+def face_components(num_vertices: int, face_offsets: np.ndarray, face_indices: np.ndarray) -> np.ndarray:
+    """
+    Returns the connected component of each face (the faces sharing a vertex
+    are connected).
+
+    Args:
+        num_vertices (int)       : Number of vertices.
+        face_offsets (np.ndarray): (F + 1,) face offsets.
+        face_indices (np.ndarray): Vertex indices of the faces.
+
+    Returns:
+        np.ndarray: (F,) component labels, numbered from 0 in the order of
+                    their first face.
+
+    """
+
+    face_offsets = np.asarray(face_offsets, dtype=np.int64)
+    face_indices = np.asarray(face_indices, dtype=np.int64)
+    face_sizes = np.diff(face_offsets)
+    if not len(face_sizes):
+        return np.empty(0, dtype=np.int64)
+    # each face-index is connected to the first vertex of its face
+    firsts = np.repeat(face_indices[face_offsets[:-1]], face_sizes)
+    vertex_labels = _connected_components(num_vertices, firsts, face_indices)
+    face_labels = vertex_labels[face_indices[face_offsets[:-1]]]
+    _, first_faces, inverse = np.unique(face_labels, return_index=True, return_inverse=True)
+    return np.argsort(np.argsort(first_faces))[inverse.reshape(-1)]
+
+
+def extract_faces(
+    vertices: np.ndarray, face_offsets: np.ndarray, face_indices: np.ndarray, faces: np.ndarray
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Returns the mesh made of some of the faces, with its own vertices.
+
+    Args:
+        vertices     (np.ndarray): (N, 3) vertex positions.
+        face_offsets (np.ndarray): (F + 1,) face offsets.
+        face_indices (np.ndarray): Vertex indices of the faces.
+        faces        (np.ndarray): Indices of the faces to extract.
+
+    Returns:
+        tuple[np.ndarray]:
+            (vertices, face_offsets, face_indices) of the extracted faces (the
+            used vertices keep their order).
+
+    """
+
+    face_offsets = np.asarray(face_offsets, dtype=np.int64)
+    faces = np.asarray(faces, dtype=np.int64)
+    sizes = face_offsets[faces + 1] - face_offsets[faces]
+    new_offsets = np.zeros(len(faces) + 1, dtype=np.int64)
+    np.cumsum(sizes, out=new_offsets[1:])
+    positions = np.arange(new_offsets[-1]) - np.repeat(new_offsets[:-1], sizes)
+    positions += np.repeat(face_offsets[faces], sizes)
+    indices = np.asarray(face_indices, dtype=np.int64)[positions]
+    used, new_indices = np.unique(indices, return_inverse=True)
+    return np.asarray(vertices)[used], new_offsets, new_indices.reshape(-1)
@@ -0,0 +1,187 @@
+# -*- coding: utf-8 -*-
+""" chaikin3d/scene.py """
+
+from __future__ import annotations
+from concurrent.futures import ProcessPoolExecutor
+import os
+
+import numpy as np
+
+from chaikin3d import validation
+from chaikin3d.polyhedron import ChaikinOptions, Polyhedron
+from chaikin3d.preprocessing import merge_coplanar_faces, weld_vertices
+
+
+__all__ = [
+    'SceneObject',
+    'subdivide_object',
+    'subdivide_objects',
+    'merge_objects',
+]
+
+
+class SceneObject:
+    """
+    One object of a scene (see 'WaveFrontReader.split'): its name, its mesh
+    and the error that stopped its subdivision (None if it was subdivided).
+
+    """
+
+    __slots__ = ("name", "vertices", "face_offsets", "face_indices", "error")
+
+    def __init__(
+        self,
+        name: str,
+        vertices: np.ndarray,
+        face_offsets: np.ndarray,
+        face_indices: np.ndarray,
+        error: str = None,
+    ):
+        self.name = name
+        self.vertices = vertices
+        self.face_offsets = face_offsets
+        self.face_indices = face_indices
+        self.error = error
+
+    def __repr__(self):
+        status = f"error={self.error!r}" if self.error else f"faces={len(self.face_offsets) - 1}"
+        return f"SceneObject({self.name!r}, vertices={len(self.vertices)}, {status})"
+
+
+def subdivide_object(
+    obj: SceneObject,
+    options: ChaikinOptions,
+    generations: int,
+    weld_tolerance: float = None,
+    repair: bool = False,
+    merge_coplanar: bool = False,
+    validate: bool = False,
+) -> SceneObject:
+    """
+    Prepare (weld, repair, merge the coplanar faces, validate) and subdivide
+    one object.
+
+    Any exception is caught and stored in the returned object, so that a
+    defect in one object does not stop the others.
+
+    Args:
+        obj            (SceneObject)   : Object of generation zero.
+        options        (ChaikinOptions): Chaikin options.
+        generations    (int)           : Number of chaikin generations.
+        weld_tolerance (float)         : Merge the vertices closer than this
+                                         tolerance (None: no welding).
+        repair         (bool)          : Repair the mesh (see 'validation.repair_mesh').
+        merge_coplanar (bool)          : Merge the coplanar faces (see
+                                         'preprocessing.merge_coplanar_faces').
+        validate       (bool)          : Validate the mesh (see 'validation.validate_mesh').
+
+    Returns:
+        SceneObject: Last generation (or the input object, with an error).
+
+    """
+
+    try:
+        arrays = (obj.vertices, obj.face_offsets, obj.face_indices)
+        if weld_tolerance is not None:
+            arrays = weld_vertices(*arrays, weld_tolerance)
+        if repair:
+            arrays = validation.repair_mesh(*arrays)
+        if merge_coplanar:
+            arrays = merge_coplanar_faces(*arrays)
+        if validate or repair:
+            report = validation.validate_mesh(*arrays, closed=options.order_edges != "none")
+            if not report.is_valid:
+                raise validation.MeshValidationError(f"Invalid mesh\n{report}")
+        vertices, face_offsets, face_indices = arrays
+        poly = Polyhedron.from_standard_vertex_lists(
+            list(vertices), np.split(face_indices, face_offsets[1:-1]), False
+        )
+        for _ in range(generations):
+            poly = poly.Chaikin3D(options)
+        return SceneObject(obj.name, poly.vertex_array(), *poly.face_arrays())
+    except Exception as error:
+        return SceneObject(
+            obj.name, obj.vertices, obj.face_offsets, obj.face_indices, f"{type(error).__name__}: {error}"
+        )
+
+
+def subdivide_objects(
+    objects: list[SceneObject], options: ChaikinOptions, generations: int, workers: int = None, **kwargs
+) -> list[SceneObject]:
+    """
+    Subdivide the objects of a scene independently, in worker processes (see
+    'subdivide_object').
+
+    The objects are sent to the workers by decreasing size, so that the
+    biggest ones do not start last.
+
+    Args:
+        objects     (list[SceneObject]): Objects of generation zero.
+        options     (ChaikinOptions)   : Chaikin options.
+        generations (int)              : Number of chaikin generations.
+        workers     (int)              : Number of worker processes (default:
+                                         number of CPUs, at most one per object).
+        kwargs                         : Preparation of the objects (see 'subdivide_object').
+
+    Returns:
+        list[SceneObject]: Last generation of each object, in the input order
+                           (the failed objects have an 'error').
+
+    """
+
+    workers = min(workers or os.cpu_count() or 1, len(objects))
+    if workers <= 1:
+        return [subdivide_object(obj, options, generations, **kwargs) for obj in objects]
+    order = sorted(range(len(objects)), key=lambda i: -len(objects[i].face_indices))
+    results: list[SceneObject] = [None] * len(objects)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(subdivide_object, objects[i], options, generations, **kwargs): i for i in order
+        }
+        for future, i in futures.items():
+            try:
+                results[i] = future.result()
+            except Exception as error:
+                # the worker process died (the other objects are not lost)
+                obj = objects[i]
+                results[i] = SceneObject(
+                    obj.name, obj.vertices, obj.face_offsets, obj.face_indices, f"{type(error).__name__}: {error}"
+                )
+    return results
+
+
+def merge_objects(
+    objects: list[SceneObject],
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, list[tuple[str, int]]]:
+    """
+    Returns the objects as a single mesh, with the first face of each object.
+
+    Args:
+        objects (list[SceneObject]): Objects.
+
+    Returns:
+        tuple:
+            (vertices, face_offsets, face_indices, objects): the mesh arrays
+            (see 'writers.write_obj') and the (name, index of the first face)
+            of each object.
+
+    """
+
+    if not objects:
+        return np.empty((0, 3)), np.zeros(1, dtype=np.int64), np.empty(0, dtype=np.int64), []
+    vertex_starts = np.cumsum([0] + [len(obj.vertices) for obj in objects])
+    face_starts = np.cumsum([0] + [len(obj.face_offsets) - 1 for obj in objects])
+    index_starts = np.cumsum([0] + [obj.face_offsets[-1] for obj in objects])
+    dtype = np.result_type(*(obj.vertices.dtype for obj in objects))
+    vertices = np.concatenate([np.asarray(obj.vertices, dtype=dtype).reshape(-1, 3) for obj in objects])
+    face_offsets = np.concatenate(
+        [[0]] + [obj.face_offsets[1:] + index_start for obj, index_start in zip(objects, index_starts)]
+    ).astype(np.int64)
+    face_indices = np.concatenate(
+        [
+            np.asarray(obj.face_indices, dtype=np.int64) + vertex_start
+            for obj, vertex_start in zip(objects, vertex_starts)
+        ]
+    )
+    names = [(obj.name, int(face_start)) for obj, face_start in zip(objects, face_starts)]
+    return vertices, face_offsets, face_indices, names
@@ -0,0 +1,563 @@
+# -*- coding: utf-8 -*-
+""" chaikin3d/server.py
+
+Long-running local subdivision service.
+
+The parsed meshes and the computed generations are kept in memory (LRU caches),
+so that repeated requests for the same assets do not re-parse the input file nor
+re-run the Chaikin3D algorithm. The CPU work runs in a process pool.
+
+Usage:
+    python -m chaikin3d.server --port 8765
+    python -m chaikin3d.server --unix /tmp/chaikin3d.sock
+
+    curl 'http://127.0.0.1:8765/subdivide?input=/abs/path/cube.obj&generations=3&format=glb' -o cube.glb
+    curl 'http://127.0.0.1:8765/metrics'
+
+Endpoints:
+    GET /subdivide : query parameters
+                     input       (required) path of a '.obj' or '.c3m' file, on the server side
+                     generations (int)      number of chaikin generations (default: 1)
+                     coef        (float)    chaikin coefficient (default: 4.0)
+                     order_edges (str)      "none", "first" or "all" (default: "none")
+                     rotate      (0/1)      invert the y and z axes (default: 0)
+                     format      (str)      see 'FORMATS' (default: "obj")
+    GET /metrics   : latency/throughput/cache metrics (JSON)
+    GET /health    : "ok"
+
+A request is cancelled when its client disconnects before the response is sent.
+The work shared with other pending requests keeps running; the work that no other
+request waits for is dropped (a worker process that already started computing a
+generation cannot be interrupted: it completes, but its result is discarded).
+"""
+
+from __future__ import annotations
+import argparse
+import asyncio
+import io
+import json
+import multiprocessing
+import os
+import signal
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from http import HTTPStatus
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+
+from chaikin3d import binary_mesh, writers
+from chaikin3d.arg_utils import INPUT_EXTENSIONS
+from chaikin3d.chaikin_groups import triangulate
+from chaikin3d.polyhedron import ChaikinOptions, chaikin_snapshot
+from chaikin3d.wavefront_reader import WaveFrontReader
+
+
+__all__ = [
+    'FORMATS',
+    'LRUCache',
+    'Metrics',
+    'ChaikinServer',
+    'main',
+]
+
+
+# output format -> content type
+FORMATS = {
+    "obj": "text/plain; charset=utf-8",
+    "c3m": "application/octet-stream",
+    "ply": "application/octet-stream",
+    "stl": "model/stl",
+    "glb": "model/gltf-binary",
+}
+ORDER_EDGES = ("none", "first", "all")
+# number of latency samples kept per endpoint
+LATENCY_SAMPLES = 1024
+# window of the throughput measure (in seconds)
+THROUGHPUT_WINDOW = 60.0
+MAX_HEADERS = 100
+
+
+class LRUCache:
+    """
+    Least-recently-used cache, bounded by the total size of its values.
+
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data: OrderedDict = OrderedDict()
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key) -> bool:
+        return key in self._data
+
+    def get(self, key):
+        """
+        Returns the cached value (None if missing) and marks it as recently used.
+
+        """
+
+        if key not in self._data:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._data.move_to_end(key)
+        return self._data[key][0]
+
+    def put(self, key, value, nbytes: int) -> None:
+        """
+        Cache a value, evicting the least recently used ones if needed.
+        Values larger than the whole cache are not cached.
+
+        """
+
+        if key in self._data:
+            self.nbytes -= self._data.pop(key)[1]
+        if nbytes > self.max_bytes:
+            return
+        self._data[key] = (value, nbytes)
+        self.nbytes += nbytes
+        while self.nbytes > self.max_bytes:
+            _, (_, evicted_nbytes) = self._data.popitem(last=False)
+            self.nbytes -= evicted_nbytes
+            self.evictions += 1
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._data),
+            "bytes": self.nbytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+class Metrics:
+    """
+    Request counters, latencies (per endpoint) and throughput.
+
+    """
+
+    def __init__(self):
+        self.start_time = time.monotonic()
+        self.requests = 0
+        self.in_flight = 0
+        self.cancelled = 0
+        self.statuses: dict[int, int] = dict()
+        self.latencies: dict[str, deque] = dict()
+        self._finished: deque = deque()
+
+    def record(self, endpoint: str, status: int, latency: float) -> None:
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+        self.latencies.setdefault(endpoint, deque(maxlen=LATENCY_SAMPLES)).append(latency)
+        now = time.monotonic()
+        self._finished.append(now)
+        while self._finished and self._finished[0] < now - THROUGHPUT_WINDOW:
+            self._finished.popleft()
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        uptime = now - self.start_time
+        recent = sum(1 for t in self._finished if t >= now - THROUGHPUT_WINDOW)
+        latencies = dict()
+        for endpoint, samples in self.latencies.items():
+            values = np.array(samples) * 1000
+            p50, p95, p99 = np.percentile(values, [50, 95, 99])
+            latencies[endpoint] = {
+                "count": len(values),
+                "mean_ms": float(values.mean()),
+                "p50_ms": float(p50),
+                "p95_ms": float(p95),
+                "p99_ms": float(p99),
+                "max_ms": float(values.max()),
+            }
+        return {
+            "uptime_s": uptime,
+            "requests": self.requests,
+            "in_flight": self.in_flight,
+            "cancelled": self.cancelled,
+            "statuses": {str(status): count for status, count in sorted(self.statuses.items())},
+            "throughput_rps": recent / min(uptime, THROUGHPUT_WINDOW) if uptime else 0.0,
+            "latency": latencies,
+        }
+
+
+class _HTTPError(Exception):
+    """
+    Error turned into an HTTP error response.
+
+    """
+
+    def __init__(self, status: HTTPStatus, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class _Job:
+    """
+    Work shared by all the requests waiting for it.
+
+    """
+
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+# worker functions (run in the process pool)
+def _load_snapshot(path: str, rotate: bool) -> dict:
+    if path.endswith(binary_mesh.EXTENSION):
+        poly = binary_mesh.load_polyhedron(path, rotate)
+    else:
+        poly = WaveFrontReader(path, True, rotate).to_polyhedron()
+    return poly.snapshot()
+
+
+def _encode_snapshot(snapshot: dict, format_: str) -> bytes:
+    vertices = snapshot["vertices"]
+    face_offsets, face_indices = snapshot["face_offsets"], snapshot["face_indices"]
+    stream = io.BytesIO()
+    if format_ == "obj":
+        text_stream = io.TextIOWrapper(stream, encoding="utf-8", newline="")
+        writers.write_obj(text_stream, vertices, face_offsets, face_indices)
+        text_stream.detach()
+    elif format_ == "c3m":
+        blocks = {
+            name: snapshot[name]
+            for name in binary_mesh.REQUIRED_BLOCKS + binary_mesh.OPTIONAL_BLOCKS
+        }
+        flags = binary_mesh.FLAG_EDGES_ORDERED if snapshot["edges_ordered"] else 0
+        binary_mesh.write_binary_mesh(stream, blocks, flags)
+    elif format_ == "ply":
+        writers.write_ply(stream, vertices, face_offsets, face_indices)
+    elif format_ == "stl":
+        writers.write_stl(stream, vertices, triangulate(face_offsets, face_indices))
+    elif format_ == "glb":
+        writers.write_glb(stream, [(vertices, triangulate(face_offsets, face_indices))])
+    else:
+        raise ValueError(f"Invalid format: {format_!r}")
+    return stream.getvalue()
+
+
+def _snapshot_nbytes(snapshot: dict) -> int:
+    return sum(value.nbytes for value in snapshot.values() if isinstance(value, np.ndarray))
+
+
+class ChaikinServer:
+    """
+    Asyncio HTTP server, running the Chaikin3D algorithm on local mesh files.
+
+    Usage:
+        server = ChaikinServer(workers=4, cache_bytes=512 << 20)
+        asyncio.run(server.serve(host="127.0.0.1", port=8765))
+
+    """
+
+    def __init__(
+        self,
+        workers: int = None,
+        cache_bytes: int = 512 << 20,
+        max_generations: int = 8,
+        verbose: bool = False,
+    ):
+        self.workers = workers
+        self.max_generations = max_generations
+        self.verbose = verbose
+        self.vprint = print if verbose else lambda *args, **kwargs: None
+        # generation key -> snapshot (generation zero: the parsed mesh)
+        self.generations = LRUCache(cache_bytes // 2)
+        # (generation key, format) -> encoded mesh
+        self.responses = LRUCache(cache_bytes // 2)
+        self.metrics = Metrics()
+        self.executor: ProcessPoolExecutor = None
+        self._jobs: dict[tuple, _Job] = dict()
+
+    # - work -
+    async def _run(self, function, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, function, *args)
+
+    async def _shared(self, key: tuple, coroutine_function, *args):
+        """
+        Await the job identified by 'key', starting it if no other request did.
+        The job is cancelled when none of the requests waits for it anymore.
+
+        """
+
+        job = self._jobs.get(key)
+        if job is None:
+            job = _Job(asyncio.ensure_future(coroutine_function(*args)))
+            self._jobs[key] = job
+            job.task.add_done_callback(lambda _: self._jobs.pop(key, None))
+        job.waiters += 1
+        try:
+            return await asyncio.shield(job.task)
+        finally:
+            job.waiters -= 1
+            if not job.waiters and not job.task.done():
+                job.task.cancel()
+
+    async def generation(self, mesh_key: tuple, generation: int, options: ChaikinOptions) -> dict:
+        """
+        Returns the snapshot of a generation of a mesh (see 'Polyhedron.snapshot'),
+        computing (and caching) the missing generations.
+
+        Args:
+            mesh_key   (tuple)         : (path, modification time, size, rotate)
+            generation (int)           : Generation number.
+            options    (ChaikinOptions): Chaikin options.
+
+        Returns:
+            dict: Snapshot of the generation.
+
+        """
+
+        key = self._generation_key(mesh_key, generation, options)
+        snapshot = self.generations.get(key)
+        if snapshot is not None:
+            return snapshot
+        return await self._shared(
+            ("generation", key), self._compute_generation, mesh_key, generation, options
+        )
+
+    async def _compute_generation(
+        self, mesh_key: tuple, generation: int, options: ChaikinOptions
+    ) -> dict:
+        if generation == 0:
+            path, _, _, rotate = mesh_key
+            snapshot = await self._run(_load_snapshot, path, rotate)
+        else:
+            previous = await self.generation(mesh_key, generation - 1, options)
+            snapshot = await self._run(chaikin_snapshot, previous, options)
+        self.vprint(f"Computed generation {generation} of {mesh_key[0]!r}")
+        self.generations.put(
+            self._generation_key(mesh_key, generation, options),
+            snapshot,
+            _snapshot_nbytes(snapshot),
+        )
+        return snapshot
+
+    @staticmethod
+    def _generation_key(mesh_key: tuple, generation: int, options: ChaikinOptions) -> tuple:
+        if generation == 0:
+            return (mesh_key, 0)
+        return (mesh_key, generation, options.chaikin_coef, options.order_edges)
+
+    async def subdivide(
+        self, mesh_key: tuple, generation: int, options: ChaikinOptions, format_: str
+    ) -> tuple[bytes, bool]:
+        """
+        Returns the encoded generation of a mesh.
+
+        Returns:
+            tuple[bytes, bool]: (encoded mesh, cache hit)
+
+        """
+
+        key = (self._generation_key(mesh_key, generation, options), format_)
+        data = self.responses.get(key)
+        if data is not None:
+            return data, True
+        data = await self._shared(
+            ("response", key), self._encode, key, mesh_key, generation, options
+        )
+        return data, False
+
+    async def _encode(
+        self, key: tuple, mesh_key: tuple, generation: int, options: ChaikinOptions
+    ) -> bytes:
+        snapshot = await self.generation(mesh_key, generation, options)
+        data = await self._run(_encode_snapshot, snapshot, key[1])
+        self.responses.put(key, data, len(data))
+        return data
+
+    # - HTTP -
+    def _parse_subdivide_query(self, query: dict) -> tuple:
+        def param(name: str, default: str = None) -> str:
+            values = query.get(name)
+            if not values:
+                if default is None:
+                    raise _HTTPError(HTTPStatus.BAD_REQUEST, f"Missing parameter: {name!r}")
+                return default
+            return values[-1]
+
+        path = os.path.realpath(param("input"))
+        if not path.endswith(INPUT_EXTENSIONS):
+            raise _HTTPError(
+                HTTPStatus.BAD_REQUEST, f"Input must be one of the formats: {INPUT_EXTENSIONS}"
+            )
+        try:
+            generation = int(param("generations", "1"))
+            coef = float(param("coef", "4.0"))
+        except ValueError as err:
+            raise _HTTPError(HTTPStatus.BAD_REQUEST, str(err)) from err
+        order_edges = param("order_edges", "none")
+        rotate = param("rotate", "0") not in ("0", "false", "")
+        format_ = param("format", "obj")
+        if not 0 <= generation <= self.max_generations:
+            raise _HTTPError(
+                HTTPStatus.BAD_REQUEST,
+                f"Number of generations must be in [0, {self.max_generations}] ({generation})",
+            )
+        if coef <= 2:
+            raise _HTTPError(HTTPStatus.BAD_REQUEST, f"Chaikin coefficient must be greater than 2 ({coef} > 2)")
+        if order_edges not in ORDER_EDGES:
+            raise _HTTPError(HTTPStatus.BAD_REQUEST, f'Invalid value for "order_edges": {order_edges}')
+        if format_ not in FORMATS:
+            raise _HTTPError(HTTPStatus.BAD_REQUEST, f"Format must be one of: {tuple(FORMATS)}")
+        try:
+            stat = os.stat(path)
+        except OSError as err:
+            raise _HTTPError(HTTPStatus.NOT_FOUND, f"Cannot read input: {path!r}") from err
+        # a modified file is a new mesh
+        mesh_key = (path, stat.st_mtime_ns, stat.st_size, rotate)
+        return mesh_key, generation, ChaikinOptions(coef, order_edges), format_
+
+    async def _respond(self, method: str, target: str) -> tuple[HTTPStatus, str, bytes, dict]:
+        url = urlsplit(target)
+        if method != "GET":
+            raise _HTTPError(HTTPStatus.METHOD_NOT_ALLOWED, f"Method not allowed: {method}")
+        if url.path == "/subdivide":
+            mesh_key, generation, options, format_ = self._parse_subdivide_query(parse_qs(url.query))
+            data, hit = await self.subdivide(mesh_key, generation, options, format_)
+            return HTTPStatus.OK, FORMATS[format_], data, {"X-Chaikin-Cache": "hit" if hit else "miss"}
+        if url.path == "/metrics":
+            stats = self.metrics.stats()
+            stats["jobs"] = len(self._jobs)
+            stats["generation_cache"] = self.generations.stats()
+            stats["response_cache"] = self.responses.stats()
+            return HTTPStatus.OK, "application/json", json.dumps(stats, indent=2).encode(), {}
+        if url.path == "/health":
+            return HTTPStatus.OK, "text/plain", b"ok", {}
+        raise _HTTPError(HTTPStatus.NOT_FOUND, f"Unknown endpoint: {url.path}")
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """
+        Handle one request (the connection is closed after the response).
+
+        """
+
+        start = time.perf_counter()
+        endpoint = "invalid"
+        self.metrics.requests += 1
+        self.metrics.in_flight += 1
+        try:
+            try:
+                request_line = (await reader.readline()).decode("latin-1").split()
+                if len(request_line) != 3:
+                    raise _HTTPError(HTTPStatus.BAD_REQUEST, "Invalid request line")
+                method, target, _ = request_line
+                for _ in range(MAX_HEADERS):
+                    if (await reader.readline()) in (b"\r\n", b"\n", b""):
+                        break
+                else:
+                    raise _HTTPError(HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE, "Too many headers")
+                endpoint = urlsplit(target).path
+                # cancel the request if the client disconnects
+                response = asyncio.ensure_future(self._respond(method, target))
+                disconnect = asyncio.ensure_future(reader.read())
+                await asyncio.wait((response, disconnect), return_when=asyncio.FIRST_COMPLETED)
+                if not response.done():
+                    response.cancel()
+                    self.metrics.cancelled += 1
+                    self.vprint(f"Cancelled: {target}")
+                    return
+                disconnect.cancel()
+                status, content_type, body, headers = response.result()
+            except _HTTPError as err:
+                status, content_type, body, headers = err.status, "text/plain", str(err).encode(), {}
+            except (ValueError, AssertionError) as err:
+                status, content_type, body, headers = HTTPStatus.BAD_REQUEST, "text/plain", str(err).encode(), {}
+            except Exception as err:
+                status, content_type, body, headers = (
+                    HTTPStatus.INTERNAL_SERVER_ERROR,
+                    "text/plain",
+                    f"{type(err).__name__}: {err}".encode(),
+                    {},
+                )
+            header_lines = "".join(f"{name}: {value}\r\n" for name, value in headers.items())
+            writer.write(
+                f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+                f"Content-Type: {content_type}\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"{header_lines}"
+                "Connection: close\r\n\r\n".encode("latin-1")
+            )
+            writer.write(body)
+            await writer.drain()
+            self.metrics.record(endpoint, status.value, time.perf_counter() - start)
+        except ConnectionError:
+            self.metrics.cancelled += 1
+        finally:
+            self.metrics.in_flight -= 1
+            writer.close()
+
+    async def serve(self, host: str = "127.0.0.1", port: int = 8765, unix_path: str = None) -> None:
+        """
+        Serve until SIGINT/SIGTERM (on a Unix socket if 'unix_path' is given).
+
+        """
+
+        # the workers are started on demand: forking them from this process would
+        # make them inherit the client sockets (which would never get closed)
+        start_method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+        self.executor = ProcessPoolExecutor(
+            self.workers, mp_context=multiprocessing.get_context(start_method)
+        )
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(signum, stop.set)
+            except NotImplementedError:  # Windows: KeyboardInterrupt
+                pass
+        try:
+            if unix_path:
+                server = await asyncio.start_unix_server(self._handle, path=unix_path)
+                address = unix_path
+            else:
+                server = await asyncio.start_server(self._handle, host=host, port=port)
+                address = "http://{}:{}".format(*server.sockets[0].getsockname()[:2])
+            print(f"Chaikin3D server listening on {address}")
+            async with server:
+                await stop.wait()
+        finally:
+            self.executor.shutdown(wait=True, cancel_futures=True)
+            if unix_path and os.path.exists(unix_path):
+                os.remove(unix_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Chaikin3D local subdivision service")
+    parser.add_argument("--host", type=str, default="127.0.0.1", help="host (default: localhost)")
+    parser.add_argument("--port", type=int, default=8765, help="TCP port")
+    parser.add_argument("--unix", type=str, default=None, help="Unix socket path (instead of TCP)")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="number of worker processes")
+    parser.add_argument(
+        "-cs", "--cache-size", type=int, default=512, help="size of the in-memory caches (in MB)"
+    )
+    parser.add_argument(
+        "-mg", "--max-generations", type=int, default=8, help="maximum number of chaikin generations"
+    )
+    parser.add_argument("-v", "--verbose", help="verbose mode", action="store_true")
+    args = parser.parse_args()
+
+    server = ChaikinServer(args.workers, args.cache_size << 20, args.max_generations, args.verbose)
+    try:
+        asyncio.run(server.serve(args.host, args.port, args.unix))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
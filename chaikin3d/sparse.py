@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+""" chaikin3d/sparse.py """
+
+from __future__ import annotations
+
+import numpy as np
+
+
+__all__ = [
+    'CSRMatrix',
+]
+
+
+class CSRMatrix:
+    """
+    Sparse matrix in the compressed sparse row format (numpy only).
+
+    The column indices and values of the i-th row are
+    indices[indptr[i]:indptr[i + 1]] and data[indptr[i]:indptr[i + 1]].
+
+    Usage:
+        new_vertices = operator @ vertices  # (M, N) @ (N, 3) -> (M, 3)
+        composed = second_operator @ first_operator
+
+    """
+
+    __slots__ = ("indptr", "indices", "data", "shape")
+
+    def __init__(self, indptr: np.ndarray, indices: np.ndarray, data: np.ndarray, shape: tuple[int, int]):
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.indices = np.asarray(indices, dtype=np.int64)
+        self.data = np.asarray(data, dtype=np.float64)
+        self.shape = (int(shape[0]), int(shape[1]))
+
+    def __repr__(self):
+        return f"CSRMatrix(shape={self.shape}, nnz={self.nnz})"
+
+    @property
+    def nnz(self) -> int:
+        return len(self.data)
+
+    @property
+    def nbytes(self) -> int:
+        return self.indptr.nbytes + self.indices.nbytes + self.data.nbytes
+
+    @staticmethod
+    def from_coo(
+        rows: np.ndarray, cols: np.ndarray, data: np.ndarray, shape: tuple[int, int]
+    ) -> CSRMatrix:
+        """
+        Returns the matrix with the values data[i] at (rows[i], cols[i]) (the
+        duplicate entries are summed).
+
+        Args:
+            rows  (np.ndarray): Row indices.
+            cols  (np.ndarray): Column indices.
+            data  (np.ndarray): Values.
+            shape (tuple)     : (number of rows, number of columns).
+
+        Returns:
+            CSRMatrix: Matrix, with sorted column indices in each row.
+
+        """
+
+        rows = np.asarray(rows, dtype=np.int64)
+        cols = np.asarray(cols, dtype=np.int64)
+        keys, inverse = np.unique(rows * shape[1] + cols, return_inverse=True)
+        summed = np.bincount(inverse.reshape(-1), weights=data, minlength=len(keys))
+        indptr = np.zeros(shape[0] + 1, dtype=np.int64)
+        np.cumsum(np.bincount(keys // shape[1], minlength=shape[0]), out=indptr[1:])
+        return CSRMatrix(indptr, keys % shape[1], summed, shape)
+
+    @staticmethod
+    def identity(size: int) -> CSRMatrix:
+        """
+        Returns the (size, size) identity matrix.
+
+        """
+
+        return CSRMatrix(np.arange(size + 1), np.arange(size), np.ones(size), (size, size))
+
+    def row_indices(self) -> np.ndarray:
+        """
+        Returns the row index of each stored value.
+
+        """
+
+        return np.repeat(np.arange(self.shape[0]), np.diff(self.indptr))
+
+    def matvec(self, x: np.ndarray) -> np.ndarray:
+        """
+        Returns the product of this matrix with 'x'.
+
+        Args:
+            x (np.ndarray): (N,) vector or (N, k) array (N: number of columns).
+
+        Returns:
+            np.ndarray: (M,) vector or (M, k) array (M: number of rows).
+
+        Raises:
+            ValueError: Incompatible shapes.
+
+        """
+
+        x = np.asarray(x)
+        if x.shape[0] != self.shape[1]:
+            raise ValueError(f"Incompatible shapes: {self.shape} @ {x.shape}")
+        rows = self.row_indices()
+        columns = x.reshape(x.shape[0], -1)[self.indices] * self.data[:, None]
+        result = np.stack(
+            [np.bincount(rows, column, self.shape[0]) for column in columns.T], axis=1
+        )
+        return result.reshape((self.shape[0],) + x.shape[1:])
+
+    def compose(self, other: CSRMatrix) -> CSRMatrix:
+        """
+        Returns the matrix product 'self @ other' (apply 'other', then 'self').
+
+        Args:
+            other (CSRMatrix): (N, K) matrix (N: number of columns of self).
+
+        Returns:
+            CSRMatrix: (M, K) matrix.
+
+        Raises:
+            ValueError: Incompatible shapes.
+
+        """
+
+        if other.shape[0] != self.shape[1]:
+            raise ValueError(f"Incompatible shapes: {self.shape} @ {other.shape}")
+        # each value (i, k) of self meets the values (k, j) of the k-th row of other
+        row_sizes = np.diff(other.indptr)[self.indices]
+        starts = other.indptr[self.indices]
+        entry_of = np.repeat(np.arange(self.nnz), row_sizes)
+        positions = np.arange(int(row_sizes.sum())) - np.repeat(np.cumsum(row_sizes) - row_sizes, row_sizes)
+        positions += starts[entry_of]
+        return CSRMatrix.from_coo(
+            self.row_indices()[entry_of],
+            other.indices[positions],
+            self.data[entry_of] * other.data[positions],
+            (self.shape[0], other.shape[1]),
+        )
+
+    def __add__(self, other: CSRMatrix) -> CSRMatrix:
+        if other.shape != self.shape:
+            raise ValueError(f"Incompatible shapes: {self.shape} + {other.shape}")
+        return CSRMatrix.from_coo(
+            np.concatenate((self.row_indices(), other.row_indices())),
+            np.concatenate((self.indices, other.indices)),
+            np.concatenate((self.data, other.data)),
+            self.shape,
+        )
+
+    def toarray(self) -> np.ndarray:
+        """
+        Returns the dense matrix.
+
+        """
+
+        dense = np.zeros(self.shape)
+        np.add.at(dense, (self.row_indices(), self.indices), self.data)
+        return dense
+
+    def __matmul__(self, other: CSRMatrix | np.ndarray) -> CSRMatrix | np.ndarray:
+        if isinstance(other, CSRMatrix):
+            return self.compose(other)
+        return self.matvec(other)
@@ -0,0 +1,172 @@
+# -*- coding: utf-8 -*-
+""" chaikin3d/sweep.py """
+
+from __future__ import annotations
+from concurrent.futures import ProcessPoolExecutor
+import os
+
+import numpy as np
+
+from chaikin3d.polyhedron import Polyhedron, chaikin_ratios
+
+
+__all__ = [
+    'sweep_positions',
+    'coef_sweep',
+    'coef_output_path',
+]
+
+
+def _sweep_generation(
+    parent_pairs: tuple[np.ndarray, ...], vertices: np.ndarray, coefs: np.ndarray
+) -> np.ndarray:
+    """
+    Returns the vertices of the next generation, for each chaikin coefficient.
+
+    Args:
+        parent_pairs (tuple[np.ndarray]): Parent pairs of the next generation
+                                          (see 'Polyhedron.parent_pairs').
+        vertices     (np.ndarray)       : (k, N, 3) vertices, one set per coefficient.
+        coefs        (np.ndarray)       : (k,) chaikin coefficients.
+
+    Returns:
+        np.ndarray: (k, M, 3) vertices.
+
+    """
+
+    rows, currents, partners, _ = parent_pairs
+    base_ratios, special_ratios = np.array([chaikin_ratios(coef) for coef in coefs]).T
+    new_vertices = np.zeros((len(coefs), len(rows), 3))
+    # the new partners were truncated once, with the special ratio
+    truncated = partners < 0
+    ratios = np.where(truncated, special_ratios[:, None], base_ratios[:, None])[:, :, None]
+    # the sub-nodes of the old partners first, then the ones whose partner sub-node is known
+    known = np.zeros(len(rows), dtype=bool)
+    computed = np.zeros(len(rows), dtype=bool)
+    pending = ~truncated
+    while pending.any():
+        partner_vertices = np.where(
+            truncated[pending][None, :, None],
+            new_vertices[:, np.maximum(-1 - partners[pending], 0)],
+            vertices[:, np.maximum(partners[pending], 0)],
+        )
+        new_vertices[:, rows[pending]] = (1 - ratios[:, pending]) * partner_vertices + ratios[
+            :, pending
+        ] * vertices[:, currents[pending]]
+        known[rows[pending]] = True
+        computed |= pending
+        pending = ~computed & truncated & known[np.maximum(-1 - partners, 0)]
+    if not computed.all():
+        raise ValueError("Invalid parent pairs (circular partners)")
+    return new_vertices
+
+
+def sweep_positions(
+    vertices: np.ndarray, parent_pairs_list: list[tuple[np.ndarray, ...]], coefs: np.ndarray
+) -> np.ndarray:
+    """
+    Returns the vertices of the last generation, for each chaikin coefficient.
+
+    Args:
+        vertices          (np.ndarray)       : (N, 3) vertices of generation zero.
+        parent_pairs_list (list[tuple])      : Parent pairs of each generation.
+        coefs             (np.ndarray)       : (k,) chaikin coefficients.
+
+    Returns:
+        np.ndarray: (k, M, 3) vertices.
+
+    """
+
+    coefs = np.asarray(coefs, dtype=np.float64)
+    positions = np.broadcast_to(np.asarray(vertices, dtype=np.float64), (len(coefs),) + np.shape(vertices))
+    for parent_pairs in parent_pairs_list:
+        positions = _sweep_generation(parent_pairs, positions, coefs)
+    return positions
+
+
+def coef_sweep(
+    poly: Polyhedron, a: A, coefs: list[float], generations: int, workers: int = None
+) -> list[Polyhedron]:
+    """
+    Apply the Chaikin3D Algorithm with several chaikin coefficients.
+
+    The connectivity of the generations does not depend on the chaikin
+    coefficient, only the positions of the new nodes do. So the generations
+    are only computed once (with 'a.chaikin_coef'), then the positions of all
+    the coefficients are evaluated from the parent pairs (see
+    'Polyhedron.parent_pairs'), in one vectorized batch per worker process.
+    The nodes of the surface groups are picked by distance (see
+    'Polyhedron.Chaikin3D'): around degenerate faces (repeated nodes, open
+    borders), a direct run with another coefficient may pick other nodes.
+
+    Args:
+        poly        (Polyhedron) : Polyhedron of generation zero.
+        a           (A)          : Chaikin options (see 'ChaikinOptions').
+        coefs       (list[float]): Chaikin coefficients (must be greater than 2).
+        generations (int)        : Number of chaikin generations.
+        workers     (int)        : Number of worker processes (default: number
+                                   of CPUs, at most one per coefficient).
+
+    Returns:
+        list[Polyhedron]: Last generation, for each coefficient.
+
+    Raises:
+        ValueError: Invalid chaikin coefficient.
+
+    """
+
+    for coef in coefs:
+        if coef <= 2:
+            raise ValueError(f"Chaikin coefficient must be greater than 2 ({coef} > 2)")
+    vertices = poly.vertex_array()
+    parent_pairs_list = []
+    for _ in range(generations):
+        poly = poly.Chaikin3D(a, parent_pairs=True)
+        parent_pairs_list.append(poly.parent_pairs)
+
+    workers = min(workers or os.cpu_count() or 1, len(coefs))
+    chunks = np.array_split(np.asarray(coefs, dtype=np.float64), workers)
+    if workers <= 1:
+        positions = [sweep_positions(vertices, parent_pairs_list, chunk) for chunk in chunks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            positions = list(
+                executor.map(
+                    sweep_positions,
+                    [vertices] * workers,
+                    [parent_pairs_list] * workers,
+                    chunks,
+                )
+            )
+
+    snapshot = poly.snapshot()
+    dtype = snapshot["vertices"].dtype
+    return [
+        Polyhedron.from_arrays(**{**snapshot, "vertices": coef_vertices.astype(dtype)})
+        for coef_vertices in np.concatenate(positions)
+    ]
+
+
+def coef_output_path(output: str, coef: float, extensions: tuple[str, ...]) -> str:
+    """
+    Returns the output path of a chaikin coefficient of a sweep.
+
+    Usage:
+        coef_output_path("out.obj.gz", 2.5, (".obj", ".obj.gz")) -> "out_cc2.5.obj.gz"
+
+    Args:
+        output     (str)       : Output path.
+        coef       (float)     : Chaikin coefficient.
+        extensions (tuple[str]): Known extensions (the longest matching one is kept).
+
+    Returns:
+        str: Output path, suffixed with the coefficient.
+
+    """
+
+    extension = max(
+        (extension for extension in extensions if output.endswith(extension)),
+        key=len,
+        default=os.path.splitext(output)[1],
+    )
+    return f"{output[: len(output) - len(extension)]}_cc{coef:g}{extension}"
@@ -0,0 +1,347 @@
+# -*- coding: utf-8 -*-
+""" chaikin3d/validation.py """
+
+from __future__ import annotations
+
+import numpy as np
+
+from chaikin3d.preprocessing import weld_vertices
+
+
+__all__ = [
+    'MeshValidationError',
+    'ValidationReport',
+    'validate_mesh',
+    'orient_faces',
+    'repair_mesh',
+]
+
+
+# faces with an area below AREA_EPSILON * (bounding box diagonal) ** 2 are degenerate
+AREA_EPSILON = 1e-12
+
+
+class MeshValidationError(Exception):
+    """
+    Simple class, representing a mesh that cannot be subdivided.
+
+    """
+
+
+class ValidationReport:
+    """
+    Defects found in a mesh (see 'validate_mesh').
+
+    The edges are (E, 2) arrays of vertex indices, the other attributes are
+    arrays of face or vertex indices.
+
+    """
+
+    __slots__ = (
+        "closed",
+        "num_vertices",
+        "num_faces",
+        "non_manifold_edges",
+        "boundary_edges",
+        "inconsistent_edges",
+        "degenerate_faces",
+        "duplicate_faces",
+        "non_cycle_faces",
+        "isolated_vertices",
+    )
+    # defects that break the Chaikin3D algorithm (the others are only reported)
+    ERRORS = ("non_manifold_edges", "degenerate_faces", "duplicate_faces", "non_cycle_faces")
+    WARNINGS = ("inconsistent_edges", "isolated_vertices", "boundary_edges")
+
+    def __init__(self, num_vertices: int, num_faces: int, closed: bool = False, **defects: np.ndarray):
+        self.closed = closed
+        self.num_vertices = num_vertices
+        self.num_faces = num_faces
+        for name in self.ERRORS + self.WARNINGS:
+            setattr(self, name, defects[name])
+
+    @property
+    def errors(self) -> tuple[str, ...]:
+        # the edges of the border nodes cannot be ordered (see 'Node.order_edges')
+        return self.ERRORS + (("boundary_edges",) if self.closed else ())
+
+    @property
+    def is_valid(self) -> bool:
+        return not any(len(getattr(self, name)) for name in self.errors)
+
+    def __str__(self) -> str:
+        lines = [
+            f"Mesh validation: {self.num_vertices} vertices, {self.num_faces} faces -> "
+            + ("valid" if self.is_valid else "INVALID")
+        ]
+        for name in self.ERRORS + self.WARNINGS:
+            found = getattr(self, name)
+            if len(found):
+                kind = "error" if name in self.errors else "warning"
+                examples = ", ".join(map(str, found[:5].tolist()))
+                more = ", ..." if len(found) > 5 else ""
+                lines.append(f" - {kind}: {len(found)} {name.replace('_', ' ')} ({examples}{more})")
+        return "\n".join(lines)
+
+
+def _face_structure(face_offsets: np.ndarray, face_indices: np.ndarray) -> tuple[np.ndarray, ...]:
+    """
+    Returns the face sizes, the face of each face-index and the position of the
+    next face-index in its (cyclic) face.
+
+    """
+
+    face_sizes = np.diff(face_offsets)
+    face_of = np.repeat(np.arange(len(face_sizes)), face_sizes)
+    next_positions = np.arange(len(face_indices)) + 1
+    non_empty = face_sizes > 0
+    next_positions[face_offsets[1:][non_empty] - 1] = face_offsets[:-1][non_empty]
+    return face_sizes, face_of, next_positions
+
+
+def _edge_uses(
+    num_vertices: int, face_indices: np.ndarray, next_positions: np.ndarray
+) -> tuple[np.ndarray, ...]:
+    """
+    Returns the directed edges (a, b) of the faces (self-loops excluded), with
+    the undirected edges they use: (a, b, edge index, unique edges, edge counts,
+    mask of the face-indices starting a directed edge).
+
+    """
+
+    a, b = face_indices, face_indices[next_positions]
+    valid = a != b
+    a, b = a[valid], b[valid]
+    keys = np.minimum(a, b) * num_vertices + np.maximum(a, b)
+    edge_keys, edge_index, edge_counts = np.unique(keys, return_inverse=True, return_counts=True)
+    edges = np.stack((edge_keys // num_vertices, edge_keys % num_vertices), axis=1)
+    return a, b, edge_index, edges, edge_counts, valid
+
+
+def _chord_faces(
+    face_offsets: np.ndarray, face_indices: np.ndarray, num_vertices: int, edge_keys: np.ndarray
+) -> np.ndarray:
+    """
+    Returns the faces with two non-consecutive vertices that are connected by
+    an edge (of another face): the face is not the only cycle of its vertices.
+
+    """
+
+    face_sizes = np.diff(face_offsets)
+    found = []
+    for size in np.unique(face_sizes[face_sizes >= 4]).tolist():
+        faces = np.flatnonzero(face_sizes == size)
+        rows = face_indices[face_offsets[faces][:, None] + np.arange(size)]
+        p, q = np.triu_indices(size, 2)
+        non_adjacent = q - p < size - 1
+        p, q = p[non_adjacent], q[non_adjacent]
+        lo = np.minimum(rows[:, p], rows[:, q])
+        hi = np.maximum(rows[:, p], rows[:, q])
+        chords = np.isin(lo * num_vertices + hi, edge_keys).any(axis=1)
+        found.append(faces[chords])
+    return np.sort(np.concatenate(found)) if found else np.empty(0, dtype=np.int64)
+
+
+def validate_mesh(
+    vertices: np.ndarray,
+    face_offsets: np.ndarray,
+    face_indices: np.ndarray,
+    closed: bool = False,
+) -> ValidationReport:
+    """
+    Find the defects of a mesh given as arrays (see 'Polyhedron.face_arrays').
+
+    As in the graph (see 'VirtualSet'), the vertices at the same position are
+    the same vertex. The following defects are reported:
+     * non-manifold edges: edges used by more than two faces
+     * degenerate faces: less than 3 distinct vertices, or no area
+     * duplicate faces: same vertices as a previous face
+     * non-cycle faces: the vertices of the face do not form a single cycle
+       (a vertex is visited twice, or two non-consecutive vertices are
+       connected by an edge), the face cannot be ordered (see 'Group.order')
+     * inconsistent edges: edges used twice in the same direction (the two
+       faces have an inconsistent winding)
+     * isolated vertices: vertices without faces
+     * boundary edges: edges used by a single face (open mesh), only an
+       error for the closed meshes
+
+    Args:
+        vertices     (np.ndarray): (N, 3) vertex positions.
+        face_offsets (np.ndarray): (F + 1,) face offsets.
+        face_indices (np.ndarray): Vertex indices of the faces.
+        closed       (bool)      : The mesh must be closed, as required to order
+                                   the edges (see 'Node.order_edges').
+
+    Returns:
+        ValidationReport: Defects found.
+
+    """
+
+    vertices = np.asarray(vertices, dtype=np.float64).reshape(-1, 3)
+    face_offsets = np.asarray(face_offsets, dtype=np.int64)
+    face_indices = np.asarray(face_indices, dtype=np.int64)
+    num_vertices, num_faces = len(vertices), len(face_offsets) - 1
+    face_sizes, face_of, next_positions = _face_structure(face_offsets, face_indices)
+
+    # vertices at the same position are the same vertex
+    _, first_vertices, position_ids = np.unique(
+        vertices, axis=0, return_index=True, return_inverse=True
+    )
+    position_ids = position_ids.reshape(-1)
+    positions = position_ids[face_indices]
+    num_positions = max(len(first_vertices), 1)
+
+    # edges
+    a, b, edge_index, edges, edge_counts, valid = _edge_uses(num_positions, positions, next_positions)
+    forward = np.bincount(edge_index, weights=a < b, minlength=len(edges))
+    non_manifold = edge_counts > 2
+    inconsistent = (edge_counts == 2) & (forward != 1)
+
+    # distinct vertices of each face (sorted by face, then by vertex)
+    order = np.lexsort((positions, face_of))
+    sorted_positions, sorted_faces = positions[order], face_of[order]
+    new_vertex = np.ones(len(order), dtype=bool)
+    new_vertex[1:] = (sorted_positions[1:] != sorted_positions[:-1]) | (sorted_faces[1:] != sorted_faces[:-1])
+    distinct = np.bincount(sorted_faces[new_vertex], minlength=num_faces)
+
+    # area (Newell's method)
+    normals = np.zeros((num_faces, 3))
+    np.add.at(
+        normals,
+        face_of,
+        np.cross(vertices[face_indices], vertices[face_indices[next_positions]]),
+    )
+    areas = np.linalg.norm(normals, axis=1) / 2
+    diagonal = np.ptp(vertices, axis=0) if num_vertices else np.zeros(3)
+    degenerate = (distinct < 3) | (areas <= AREA_EPSILON * float(diagonal @ diagonal))
+
+    # duplicate faces: same set of (distinct) vertices
+    duplicate = np.zeros(num_faces, dtype=bool)
+    unique_positions = sorted_positions[new_vertex]
+    unique_offsets = np.zeros(num_faces + 1, dtype=np.int64)
+    np.cumsum(distinct, out=unique_offsets[1:])
+    for size in np.unique(distinct[distinct >= 3]).tolist():
+        faces = np.flatnonzero(distinct == size)
+        rows = unique_positions[unique_offsets[faces][:, None] + np.arange(size)]
+        _, first_faces = np.unique(rows, axis=0, return_index=True)
+        duplicate[faces] = True
+        duplicate[faces[first_faces]] = False
+
+    # faces that are not a single cycle
+    non_cycle = (distinct < face_sizes) & ~degenerate
+    edge_keys = edges[:, 0] * num_positions + edges[:, 1]
+    non_cycle[_chord_faces(face_offsets, positions, num_positions, edge_keys)] = True
+
+    # vertices without faces (and their duplicates)
+    used = np.zeros(num_vertices, dtype=bool)
+    used[face_indices] = True
+
+    # edges as vertex indices
+    vertex_edges = first_vertices[edges] if len(edges) else edges
+    return ValidationReport(
+        num_vertices,
+        num_faces,
+        closed,
+        non_manifold_edges=vertex_edges[non_manifold],
+        boundary_edges=vertex_edges[edge_counts == 1],
+        inconsistent_edges=vertex_edges[inconsistent],
+        degenerate_faces=np.flatnonzero(degenerate),
+        duplicate_faces=np.flatnonzero(duplicate & ~degenerate),
+        non_cycle_faces=np.flatnonzero(non_cycle),
+        isolated_vertices=np.flatnonzero(~used),
+    )
+
+
+def orient_faces(
+    num_vertices: int, face_offsets: np.ndarray, face_indices: np.ndarray
+) -> np.ndarray:
+    """
+    Returns the faces to flip so that the faces sharing an edge use it in
+    opposite directions (the first face of each connected part keeps its winding).
+
+    """
+
+    num_faces = len(face_offsets) - 1
+    _, face_of, next_positions = _face_structure(face_offsets, face_indices)
+    a, b, edge_index, _, edge_counts, valid = _edge_uses(num_vertices, face_indices, next_positions)
+    faces = face_of[valid]
+    # the two uses of each manifold edge
+    shared = edge_counts[edge_index] == 2
+    order = np.argsort(edge_index[shared], kind="stable")
+    uses = np.flatnonzero(shared)[order].reshape(-1, 2)
+    face_pairs = faces[uses]
+    # same direction -> the two faces must have opposite windings
+    forward = a < b
+    same_direction = forward[uses[:, 0]] == forward[uses[:, 1]]
+
+    neighbors: list[list[tuple[int, bool]]] = [[] for _ in range(num_faces)]
+    for (f, g), flip in zip(face_pairs.tolist(), same_direction.tolist()):
+        neighbors[f].append((g, flip))
+        neighbors[g].append((f, flip))
+    flipped = [False] * num_faces
+    seen = [False] * num_faces
+    for start in range(num_faces):
+        if seen[start]:
+            continue
+        seen[start] = True
+        stack = [start]
+        while stack:
+            f = stack.pop()
+            for g, flip in neighbors[f]:
+                if not seen[g]:
+                    seen[g] = True
+                    flipped[g] = flipped[f] ^ flip
+                    stack.append(g)
+    return np.array(flipped, dtype=bool)
+
+
+def repair_mesh(
+    vertices: np.ndarray, face_offsets: np.ndarray, face_indices: np.ndarray
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Repair the defects of a mesh that can be fixed automatically.
+
+     * the vertices at the same position are merged (see 'weld_vertices'),
+       so that the repeated consecutive vertices of the faces are removed
+     * the degenerate and duplicate faces are dropped
+     * the faces are flipped to get a consistent winding
+     * the isolated vertices are removed
+
+    The non-manifold edges and the non-cycle faces are left as they are.
+
+    Args:
+        vertices     (np.ndarray): (N, 3) vertex positions.
+        face_offsets (np.ndarray): (F + 1,) face offsets.
+        face_indices (np.ndarray): Vertex indices of the faces.
+
+    Returns:
+        tuple[np.ndarray]: (vertices, face_offsets, face_indices) of the repaired mesh.
+
+    """
+
+    vertices, face_offsets, face_indices = weld_vertices(vertices, face_offsets, face_indices, 0.0)
+
+    # drop the degenerate and duplicate faces
+    report = validate_mesh(vertices, face_offsets, face_indices)
+    face_sizes = np.diff(face_offsets)
+    keep_faces = np.ones(len(face_sizes), dtype=bool)
+    keep_faces[report.degenerate_faces] = False
+    keep_faces[report.duplicate_faces] = False
+    face_of = np.repeat(np.arange(len(face_sizes)), face_sizes)
+    face_indices = face_indices[keep_faces[face_of]]
+    face_sizes = face_sizes[keep_faces]
+    face_offsets = np.zeros(len(face_sizes) + 1, dtype=np.int64)
+    np.cumsum(face_sizes, out=face_offsets[1:])
+
+    # consistent winding
+    flipped = orient_faces(len(vertices), face_offsets, face_indices)
+    face_of = np.repeat(np.arange(len(face_sizes)), face_sizes)
+    positions = np.arange(len(face_indices))
+    reversed_positions = face_offsets[face_of] + face_offsets[face_of + 1] - 1 - positions
+    face_indices = face_indices[np.where(flipped[face_of], reversed_positions, positions)]
+
+    # remove the isolated vertices
+    used = np.zeros(len(vertices), dtype=bool)
+    used[face_indices] = True
+    new_indices = np.cumsum(used) - 1
+    return vertices[used], face_offsets, new_indices[face_indices]
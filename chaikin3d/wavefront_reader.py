@@ -1,13 +1,79 @@
 #
 from __future__ import annotations
 from chaikin3d.polyhedron import Polyhedron
+from chaikin3d.preprocessing import extract_faces, face_components, merge_coplanar_faces, weld_vertices
+from chaikin3d.scene import SceneObject
+from typing import IO
+import gzip
+import lzma
 import numpy as np
 import os
+import re
+
+
+# wavefront files, optionally compressed
+OBJ_EXTENSIONS = (".obj", ".obj.gz", ".obj.xz")
+# number of bytes read (and parsed) at once
+READ_CHUNK_SIZE = 1 << 22
+# the texture/normal indices of the face vertices ('/vt/vn')
+_FACE_ATTRIBUTES = re.compile(rb"/\S*")
+
+
+def open_input(path: str) -> IO:
+    """
+    Open an input file as a binary stream, decompressed or not depending on
+    its extension (see 'writers.open_output').
+
+    Args:
+        path (str): File path. Paths ending with '.gz' or '.xz' are decompressed.
+
+    Returns:
+        IO: Opened binary stream.
+
+    """
+
+    if path.endswith(".gz"):
+        return gzip.open(path, "rb")
+    if path.endswith(".xz"):
+        return lzma.open(path, "rb")
+    return open(path, "rb")
+
+
+class _GrowingArray:
+    """
+    Typed array, extended by blocks (the capacity grows geometrically).
+
+    """
+
+    __slots__ = ("data", "size")
+
+    def __init__(self, dtype: np.dtype, width: int = None):
+        self.data = np.empty((1024, width) if width else 1024, dtype=dtype)
+        self.size = 0
+
+    def extend(self, values: np.ndarray) -> None:
+        needed = self.size + len(values)
+        if needed > len(self.data):
+            # in place when possible (no other reference to the data)
+            self.data.resize(
+                (max(needed, len(self.data) + len(self.data) // 2),) + self.data.shape[1:], refcheck=False
+            )
+        self.data[self.size : needed] = values
+        self.size = needed
+
+    def array(self) -> np.ndarray:
+        """
+        Returns the values (the unused capacity is released).
+
+        """
+
+        self.data.resize((self.size,) + self.data.shape[1:], refcheck=False)
+        return self.data
 
 
 class WaveFrontReader:
     """
-    Read WaveFront a file (.obj). And parse it into a Polyhedron instance.
+    Read WaveFront a file (.obj, .obj.gz or .obj.xz). And parse it into a Polyhedron instance.
 
     """
 
@@ -17,67 +83,258 @@ class WaveFrontReader:
         parse_on_load: bool = True,
         rotate: bool = False,
         verbose: bool = False,
+        weld_tolerance: float = None,
+        dtype: np.dtype = np.float32,
     ):
         # attributes
         self.path: str = os.path.abspath(path)
         assert os.path.isfile(self.path)
-        self.vertices: list[np.array] = []
-        self.vertex_indices: list[np.array] = []
+        # precision of the vertices (kept by the nodes, see 'Node.from_point')
+        self.dtype = np.dtype(dtype)
+        # parsed mesh (see 'arrays')
+        self._vertices = np.empty((0, 3), dtype=self.dtype)
+        self._face_offsets = np.zeros(1, dtype=np.int64)
+        self._face_indices = np.empty(0, dtype=np.int64)
+        # (name, index of the first face) of the objects ('o'/'g' statements)
+        self.objects: list[tuple[str, int]] = []
         # verbosity
         self.verbose = verbose
         # parse
         if parse_on_load:
             self.parse(rotate)
+            if weld_tolerance is not None:
+                self.weld(weld_tolerance)
+
+    @property
+    def vertices(self) -> list[np.ndarray]:
+        return list(self._vertices)
+
+    @property
+    def vertex_indices(self) -> list[np.ndarray]:
+        return np.split(self._face_indices, self._face_offsets[1:-1])
 
-    def parse(self, rotate: bool = False):
+    def parse(self, rotate: bool = False, chunk_size: int = READ_CHUNK_SIZE):
         """
         Parse the input file.
 
+        The file is read (and decompressed) one chunk of bytes at a time, and
+        the vertex and face lines of each chunk are converted in bulk into
+        growing typed arrays: the raw lines of the whole file are never kept
+        in memory.
+
         Args:
-            rotate  (bool): Invert the y and z axes.
+            rotate     (bool): Invert the y and z axes.
+            chunk_size (int) : Number of bytes read at once.
 
         Raises:
             AssertionError: Invalid number of vertices in a face.
 
         """
 
-        lines = open(self.path, "r").readlines()
-        vertices_str = []
-        vertex_indices_str = []
-        for line in lines:
-            # vertex line
-            if line.startswith("v "):
-                vertices_str.append(line[2:])
-            elif line.startswith("f "):
-                vertex_indices_str.append(line[2:])
+        vertices = _GrowingArray(self.dtype, 3)
+        face_sizes = _GrowingArray(np.int64)
+        face_indices = _GrowingArray(np.int64)
+        objects = [(self.default_object_name, 0)]
+        remainder = b""
+        with open_input(self.path) as stream:
+            while True:
+                chunk = stream.read(chunk_size)
+                if not chunk:
+                    # end of file: the remainder is the last line (no final newline)
+                    if remainder:
+                        self._parse_lines(
+                            [remainder],
+                            rotate,
+                            remainder.startswith((b"o ", b"g ")),
+                            vertices,
+                            face_sizes,
+                            face_indices,
+                            objects,
+                        )
+                    break
+                data = remainder + chunk
+                has_objects = data.startswith((b"o ", b"g ")) or b"\no " in data or b"\ng " in data
+                lines = data.split(b"\n")
+                # the last line may continue in the next chunk
+                remainder = lines.pop()
+                self._parse_lines(lines, rotate, has_objects, vertices, face_sizes, face_indices, objects)
+
+        self._vertices = vertices.array()
+        self._face_offsets = np.zeros(face_sizes.size + 1, dtype=np.int64)
+        np.cumsum(face_sizes.array(), out=self._face_offsets[1:])
+        self._face_indices = face_indices.array()
+        self.objects = objects
 
         if self.verbose:
-            print("obj file -> num vertices:", len(vertices_str))
-            print("obj file -> num groups:", len(vertex_indices_str))
-
-        for vertex_str in vertices_str:
-            raw_vert = list(filter(None, vertex_str.split()))
-            x, y, z = raw_vert[:3]
-            raw_vert = (
-                (x, z, y) if rotate else (x, y, z)
-            )  # needed, because there is some sort of rotatiton ?
-            # assert len(raw_vert) == 3 # could be 4 bc of w ( = 1.0)
-            self.vertices.append(np.fromiter(map(float, raw_vert), dtype=np.float32))
-
-        for vertex_index_str in vertex_indices_str:
-            raw_vert_index = list(filter(None, vertex_index_str.split()))
-            vertex_list = list(
-                map(lambda s: int(s.split("/")[0]) - 1, raw_vert_index)
-            )  # - 1 because indexes are starting at 1 in .obj files
-            num_vertices = len(raw_vert_index)
-            assert (
-                num_vertices > 2
-            ), f"Number of vertices are less than two: {num_vertices} > 2"  # >= 3
-            self.vertex_indices.append(
-                np.fromiter(
-                    (vertex_list[i] for i in range(num_vertices)), dtype=np.uint16
+            print("obj file -> num vertices:", len(self._vertices))
+            print("obj file -> num groups:", len(self._face_offsets) - 1)
+
+    def _parse_lines(
+        self,
+        lines: list[bytes],
+        rotate: bool,
+        has_objects: bool,
+        vertices: _GrowingArray,
+        face_sizes: _GrowingArray,
+        face_indices: _GrowingArray,
+        objects: list[tuple[str, int]],
+    ) -> None:
+        """
+        Parse complete lines, and append the vertices, faces and objects.
+
+        """
+
+        vertex_lines = [line[2:] for line in lines if line[:2] == b"v "]
+        face_lines = [line[2:] for line in lines if line[:2] == b"f "]
+        num_vertices = vertices.size
+
+        if has_objects:
+            num_faces = face_sizes.size
+            for line in lines:
+                if line[:2] == b"f ":
+                    num_faces += 1
+                elif line[:2] in (b"o ", b"g "):
+                    # an object without faces is replaced by the next one
+                    if objects[-1][1] == num_faces:
+                        objects.pop()
+                    name = line[2:].strip().decode(errors="replace")
+                    objects.append((name or self.default_object_name, num_faces))
+
+        if vertex_lines:
+            # parsed as float64 first (same rounding as float(str))
+            chunk_vertices = np.fromstring(b" ".join(vertex_lines), dtype=np.float64, sep=" ")
+            if len(chunk_vertices) != 3 * len(vertex_lines):
+                # optional w coordinate or vertex colors
+                tokens = [token for line in vertex_lines for token in line.split()[:3]]
+                chunk_vertices = np.array(tokens).astype(np.float64)
+            chunk_vertices = chunk_vertices.reshape(-1, 3)
+            if rotate:
+                # needed, because there is some sort of rotatiton ?
+                chunk_vertices = chunk_vertices[:, [0, 2, 1]]
+            vertices.extend(chunk_vertices)
+
+        if face_lines:
+            face_lines = [_FACE_ATTRIBUTES.sub(b"", line) for line in face_lines]
+            sizes = np.fromiter(map(len, map(bytes.split, face_lines)), dtype=np.int64, count=len(face_lines))
+            assert sizes.min() > 2, f"Number of vertices are less than two: {sizes.min()} > 2"  # >= 3
+            indices = np.fromstring(b" ".join(face_lines), dtype=np.int64, sep=" ")
+            # - 1 because indexes are starting at 1 in .obj files
+            indices -= 1
+            negative = indices < 0
+            if negative.any():
+                # relative indices: -1 is the last vertex defined before the face
+                line_vertices = np.cumsum([line[:2] == b"v " for line in lines if line[:2] in (b"v ", b"f ")])
+                is_face = np.array([line[:2] == b"f " for line in lines if line[:2] in (b"v ", b"f ")])
+                defined = num_vertices + np.repeat(line_vertices[is_face], sizes)
+                indices[negative] += defined[negative] + 1
+            face_sizes.extend(sizes)
+            face_indices.extend(indices)
+
+    def arrays(self) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Returns the parsed mesh as arrays.
+
+        Returns:
+            tuple[np.ndarray]:
+                (vertices, face_offsets, face_indices): the vertex indices of the
+                i-th face are face_indices[face_offsets[i]:face_offsets[i + 1]].
+
+        """
+
+        return self._vertices, self._face_offsets, self._face_indices
+
+    def set_arrays(
+        self, vertices: np.ndarray, face_offsets: np.ndarray, face_indices: np.ndarray
+    ) -> None:
+        """
+        Replace the parsed mesh (see 'arrays').
+
+        """
+
+        if self.verbose:
+            print(f"obj file -> num vertices: {len(self._vertices)} -> {len(vertices)}")
+            print(f"obj file -> num groups: {len(self._face_offsets) - 1} -> {len(face_offsets) - 1}")
+        if len(face_offsets) != len(self._face_offsets):
+            # the faces of the objects are not known anymore
+            self.objects = [(self.default_object_name, 0)]
+        self._vertices = np.asarray(vertices, dtype=self.dtype).reshape(-1, 3)
+        self._face_offsets = np.asarray(face_offsets, dtype=np.int64)
+        self._face_indices = np.asarray(face_indices, dtype=np.int64)
+
+    @property
+    def default_object_name(self) -> str:
+        """
+        Name of the faces that are not part of a named object (file name).
+
+        """
+
+        name = os.path.basename(self.path)
+        extension = next((extension for extension in OBJ_EXTENSIONS[::-1] if name.endswith(extension)), "")
+        return name[: len(name) - len(extension)] if extension else os.path.splitext(name)[0]
+
+    def split(self, by: str = "objects") -> list[SceneObject]:
+        """
+        Split the parsed mesh into objects, each one with its own vertices.
+
+        Args:
+            by (str): "objects": the 'o'/'g' statements of the file.
+                      "components": the connected components of each object
+                      (named '<object>.<k>' when an object has several components).
+
+        Returns:
+            list[SceneObject]: Objects with faces, in the order of the file.
+
+        Raises:
+            ValueError: Unknown split mode.
+
+        """
+
+        if by not in ("objects", "components"):
+            raise ValueError(f"Unknown split mode: {by}")
+        vertices, face_offsets, face_indices = self.arrays()
+        num_faces = len(face_offsets) - 1
+        starts = [first for _, first in self.objects] + [num_faces]
+        objects = []
+        for (name, first), last in zip(self.objects, starts[1:]):
+            if first == last:
+                continue
+            object_arrays = extract_faces(vertices, face_offsets, face_indices, np.arange(first, last))
+            if by == "objects":
+                objects.append(SceneObject(name, *object_arrays))
+                continue
+            labels = face_components(len(object_arrays[0]), *object_arrays[1:])
+            num_components = int(labels.max()) + 1
+            for label in range(num_components):
+                objects.append(
+                    SceneObject(
+                        f"{name}.{label}" if num_components > 1 else name,
+                        *extract_faces(*object_arrays, np.flatnonzero(labels == label)),
+                    )
                 )
-            )
+        return objects
+
+    def weld(self, tolerance: float = 0.0) -> None:
+        """
+        Merge the vertices closer than 'tolerance' (see 'preprocessing.weld_vertices').
+
+        Args:
+            tolerance (float): Maximum distance between merged vertices.
+
+        """
+
+        self.set_arrays(*weld_vertices(*self.arrays(), tolerance))
+
+    def merge_coplanar(self, tolerance: float = None) -> None:
+        """
+        Merge the adjacent coplanar faces into polygons (see 'preprocessing.merge_coplanar_faces').
+
+        Args:
+            tolerance (float): Maximum distance of a vertex to the plane of a
+                               merged face (None: relative to the mesh size).
+
+        """
+
+        self.set_arrays(*merge_coplanar_faces(*self.arrays(), tolerance))
 
     def to_polyhedron(self) -> Polyhedron:
         """
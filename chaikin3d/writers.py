@@ -0,0 +1,382 @@
+# -*- coding: utf-8 -*-
+""" chaikin3d/writers.py """
+
+from __future__ import annotations
+import gzip
+import json
+import lzma
+from typing import IO
+
+import numpy as np
+
+
+__all__ = [
+    'OBJ_HEADER',
+    'open_output',
+    'write_obj',
+    'write_ply',
+    'write_stl',
+    'write_glb',
+    'triangle_normals',
+    'vertex_normals',
+]
+
+
+OBJ_HEADER = "# Mesh file generated by https://github.com/Nicolas-Reyland/Chaikin3D\n"
+# number of vertices/faces formatted before each write to the stream
+CHUNK_SIZE = 1 << 16
+
+
+def open_output(path: str, mode: str = "w") -> IO:
+    """
+    Open an output file, compressed or not depending on its extension.
+
+    Args:
+        path (str): File path. Paths ending with '.gz' or '.xz' are compressed.
+        mode (str): 'w' for text streams, 'wb' for binary streams.
+
+    Returns:
+        IO: Opened stream.
+
+    """
+
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + ("t" if "b" not in mode else ""))
+    if path.endswith(".xz"):
+        return lzma.open(path, mode + ("t" if "b" not in mode else ""))
+    return open(path, mode)
+
+
+def _format_floats(values: np.ndarray) -> list[str] | list[float]:
+    """
+    Returns values that can be formatted with '%s', keeping the shortest
+    representation of each float for its own precision.
+
+    """
+
+    if values.dtype == np.float32:
+        return values.astype(str).tolist()
+    return values.astype(np.float64).tolist()
+
+
+def write_obj(
+    stream: IO,
+    vertices: np.ndarray,
+    face_offsets: np.ndarray,
+    face_indices: np.ndarray,
+    chunk_size: int = CHUNK_SIZE,
+    objects: list[tuple[str, int]] = None,
+) -> None:
+    """
+    Write a mesh to a text stream, using the wavefront '.obj' format.
+
+    The vertices and faces are formatted in bulk: each chunk of lines is built
+    with a single string-formatting operation, then written at once.
+
+    Args:
+        stream       (IO)        : Text stream.
+        vertices     (np.ndarray): (N, 3) array of vertex positions.
+        face_offsets (np.ndarray): (F + 1,) array, the vertex indices of the
+                                   i-th face are face_indices[face_offsets[i]:face_offsets[i + 1]].
+        face_indices (np.ndarray): Vertex indices of all the faces (starting at 0).
+        chunk_size   (int)       : Number of lines formatted per write.
+        objects      (list)      : (name, index of the first face) of each object,
+                                   written as 'o' statements (default: no object).
+
+    """
+
+    stream.write(OBJ_HEADER)
+
+    # write vertex positions
+    stream.write("\n")
+    for start in range(0, len(vertices), chunk_size):
+        chunk = vertices[start : start + chunk_size]
+        stream.write(("v %s %s %s\n" * len(chunk)) % tuple(_format_floats(chunk.ravel())))
+
+    # write faces (one block per object)
+    stream.write("\n")
+    num_faces = len(face_offsets) - 1
+    blocks = objects or [(None, 0)]
+    templates: dict[int, str] = dict()
+    for (name, first), (_, last) in zip(blocks, blocks[1:] + [(None, num_faces)]):
+        if name is not None:
+            stream.write(f"o {name}\n")
+        for start in range(first, last, chunk_size):
+            sizes = np.diff(face_offsets[start : min(start + chunk_size, last) + 1]).tolist()
+            for size in set(sizes).difference(templates):
+                templates[size] = "f" + " %d" * size + "\n"
+            indices = face_indices[face_offsets[start] : face_offsets[start + len(sizes)]] + 1
+            stream.write("".join(map(templates.__getitem__, sizes)) % tuple(indices.tolist()))
+
+
+def write_ply(
+    stream: IO,
+    vertices: np.ndarray,
+    face_offsets: np.ndarray,
+    face_indices: np.ndarray,
+    chunk_size: int = CHUNK_SIZE,
+) -> None:
+    """
+    Write a mesh to a binary stream, using the binary little-endian '.ply' format.
+
+    The polygonal faces are kept as they are (no triangulation). The vertex
+    block is written at once, and the face records (vertex count followed by
+    the vertex indices) are assembled in bulk, one chunk of faces at a time.
+
+    Args:
+        stream       (IO)        : Binary stream.
+        vertices     (np.ndarray): (N, 3) array of vertex positions (float32 or float64).
+        face_offsets (np.ndarray): (F + 1,) array of face offsets (see 'write_obj').
+        face_indices (np.ndarray): Vertex indices of all the faces (starting at 0).
+        chunk_size   (int)       : Number of faces assembled per write.
+
+    """
+
+    # the face sizes are computed one chunk at a time (the arrays may be memory-mapped)
+    total_faces = len(face_offsets) - 1
+    max_face_size = max(
+        (
+            int(np.diff(face_offsets[start : start + chunk_size + 1]).max())
+            for start in range(0, total_faces, chunk_size)
+        ),
+        default=0,
+    )
+    count_type, count_dtype = ("uchar", "<u1") if max_face_size < 1 << 8 else ("ushort", "<u2")
+    vertex_type, vertex_dtype = ("double", "<f8") if vertices.dtype == np.float64 else ("float", "<f4")
+    stream.write(
+        (
+            "ply\n"
+            "format binary_little_endian 1.0\n"
+            "comment Mesh file generated by https://github.com/Nicolas-Reyland/Chaikin3D\n"
+            f"element vertex {len(vertices)}\n"
+            f"property {vertex_type} x\n"
+            f"property {vertex_type} y\n"
+            f"property {vertex_type} z\n"
+            f"element face {total_faces}\n"
+            f"property list {count_type} int vertex_indices\n"
+            "end_header\n"
+        ).encode("ascii")
+    )
+
+    # vertices
+    stream.write(np.ascontiguousarray(vertices, dtype=vertex_dtype).data)
+
+    # faces: [count, index_0, ..., index_n] records, without padding
+    count_size = np.dtype(count_dtype).itemsize
+    for start in range(0, total_faces, chunk_size):
+        offsets = np.asarray(face_offsets[start : start + chunk_size + 1])
+        sizes = np.diff(offsets)
+        offsets = offsets - offsets[0]
+        indices = face_indices[face_offsets[start] : face_offsets[start + len(sizes)]]
+        num_faces = len(sizes)
+        # first byte of each record
+        record_starts = np.arange(num_faces) * count_size + offsets[:-1] * 4
+        buffer = np.empty(num_faces * count_size + len(indices) * 4, dtype=np.uint8)
+        buffer[record_starts[:, None] + np.arange(count_size)] = (
+            sizes.astype(count_dtype).view(np.uint8).reshape(num_faces, count_size)
+        )
+        index_starts = (
+            np.repeat(record_starts + count_size, sizes)
+            + (np.arange(len(indices)) - np.repeat(offsets[:-1], sizes)) * 4
+        )
+        buffer[index_starts[:, None] + np.arange(4)] = (
+            indices.astype("<i4").view(np.uint8).reshape(-1, 4)
+        )
+        stream.write(buffer.data)
+
+
+def triangle_normals(vertices: np.ndarray, triangles: np.ndarray) -> np.ndarray:
+    """
+    Returns the unit normals of the triangles (zero for degenerate triangles).
+
+    Args:
+        vertices  (np.ndarray): (N, 3) array of vertex positions.
+        triangles (np.ndarray): (T, 3) array of vertex indices.
+
+    Returns:
+        np.ndarray: (T, 3) array of normals.
+
+    """
+
+    corners = vertices[triangles]
+    normals = np.cross(corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0])
+    norms = np.linalg.norm(normals, axis=1, keepdims=True)
+    return np.divide(normals, norms, out=np.zeros_like(normals), where=norms > 0)
+
+
+def vertex_normals(vertices: np.ndarray, triangles: np.ndarray) -> np.ndarray:
+    """
+    Returns the unit normals of the vertices (area-weighted mean of the normals
+    of the triangles around each vertex).
+
+    Args:
+        vertices  (np.ndarray): (N, 3) array of vertex positions.
+        triangles (np.ndarray): (T, 3) array of vertex indices.
+
+    Returns:
+        np.ndarray: (N, 3) array of normals.
+
+    """
+
+    corners = vertices[triangles]
+    # not normalized: the norm of the cross product is twice the triangle area
+    face_normals = np.cross(corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0])
+    normals = np.zeros((len(vertices), 3), dtype=face_normals.dtype)
+    for i in range(3):
+        np.add.at(normals, triangles[:, i], face_normals)
+    norms = np.linalg.norm(normals, axis=1, keepdims=True)
+    return np.divide(normals, norms, out=np.zeros_like(normals), where=norms > 0)
+
+
+# one binary STL triangle record (50 bytes)
+STL_TRIANGLE_DTYPE = np.dtype(
+    [("normal", "<f4", (3,)), ("vertices", "<f4", (3, 3)), ("attribute", "<u2")]
+)
+
+
+def write_stl(
+    stream: IO,
+    vertices: np.ndarray,
+    triangles: np.ndarray,
+    chunk_size: int = CHUNK_SIZE,
+) -> None:
+    """
+    Write a triangulated mesh to a binary stream, using the binary '.stl' format.
+
+    Args:
+        stream     (IO)        : Binary stream.
+        vertices   (np.ndarray): (N, 3) array of vertex positions.
+        triangles  (np.ndarray): (T, 3) array of vertex indices.
+        chunk_size (int)       : Number of triangles written per write.
+
+    """
+
+    header = b"Mesh file generated by https://github.com/Nicolas-Reyland/Chaikin3D"
+    stream.write(header.ljust(80, b" "))
+    stream.write(np.uint32(len(triangles)).astype("<u4").tobytes())
+    for start in range(0, len(triangles), chunk_size):
+        chunk = triangles[start : start + chunk_size]
+        records = np.zeros(len(chunk), dtype=STL_TRIANGLE_DTYPE)
+        records["normal"] = triangle_normals(vertices, chunk)
+        records["vertices"] = vertices[chunk]
+        stream.write(records.data)
+
+
+# glTF constants
+GLTF_FLOAT = 5126
+GLTF_UNSIGNED_SHORT = 5123
+GLTF_UNSIGNED_INT = 5125
+GLTF_ARRAY_BUFFER = 34962
+GLTF_ELEMENT_ARRAY_BUFFER = 34963
+GLTF_TRIANGLES = 4
+
+
+def write_glb(
+    stream: IO,
+    meshes: list[tuple[np.ndarray, np.ndarray]],
+    names: list[str] = None,
+    normals: bool = False,
+) -> None:
+    """
+    Write triangulated meshes to a binary stream, using the binary glTF '.glb' format.
+
+    Each mesh becomes one mesh primitive (with its own node in the scene), so
+    that all the generations of an evolution can be stored in a single file.
+    All the vertex/index buffers are packed into the one binary chunk.
+
+    Args:
+        stream  (IO)                                 : Binary stream.
+        meshes  (list[tuple[np.ndarray, np.ndarray]]): (vertices (N, 3), triangles (T, 3)) couples.
+        names   (list[str])                          : Name of each mesh. Default: "mesh {i}".
+        normals (bool)                               : Compute and store the vertex normals.
+
+    """
+
+    if names is None:
+        names = [f"mesh {i}" for i in range(len(meshes))]
+    assert len(names) == len(meshes), f"{len(names)} != {len(meshes)}"
+
+    buffer_views: list[dict] = list()
+    accessors: list[dict] = list()
+    blobs: list[bytes] = list()
+    byte_length = 0
+
+    def add_accessor(array: np.ndarray, target: int, component_type: int, type_: str, **kwargs) -> int:
+        nonlocal byte_length
+        data = array.tobytes()
+        buffer_views.append(
+            {"buffer": 0, "byteOffset": byte_length, "byteLength": len(data), "target": target}
+        )
+        accessors.append(
+            {
+                "bufferView": len(buffer_views) - 1,
+                "componentType": component_type,
+                "count": len(array),
+                "type": type_,
+                **kwargs,
+            }
+        )
+        # each buffer view starts on a 4-byte boundary
+        padding = -len(data) % 4
+        blobs.append(data + b"\x00" * padding)
+        byte_length += len(data) + padding
+        return len(accessors) - 1
+
+    gltf_meshes: list[dict] = list()
+    for vertices, triangles in meshes:
+        positions = np.ascontiguousarray(vertices, dtype="<f4")
+        attributes = {
+            "POSITION": add_accessor(
+                positions,
+                GLTF_ARRAY_BUFFER,
+                GLTF_FLOAT,
+                "VEC3",
+                min=positions.min(axis=0).tolist() if len(positions) else [0.0] * 3,
+                max=positions.max(axis=0).tolist() if len(positions) else [0.0] * 3,
+            )
+        }
+        if normals:
+            attributes["NORMAL"] = add_accessor(
+                vertex_normals(positions, triangles).astype("<f4"),
+                GLTF_ARRAY_BUFFER,
+                GLTF_FLOAT,
+                "VEC3",
+            )
+        if len(vertices) < 1 << 16:
+            index_dtype, index_type = "<u2", GLTF_UNSIGNED_SHORT
+        else:
+            index_dtype, index_type = "<u4", GLTF_UNSIGNED_INT
+        indices = add_accessor(
+            np.ascontiguousarray(triangles, dtype=index_dtype).ravel(),
+            GLTF_ELEMENT_ARRAY_BUFFER,
+            index_type,
+            "SCALAR",
+        )
+        gltf_meshes.append(
+            {"primitives": [{"attributes": attributes, "indices": indices, "mode": GLTF_TRIANGLES}]}
+        )
+
+    gltf = {
+        "asset": {"version": "2.0", "generator": "https://github.com/Nicolas-Reyland/Chaikin3D"},
+        "scene": 0,
+        "scenes": [{"nodes": list(range(len(meshes)))}],
+        "nodes": [{"mesh": i, "name": name} for i, name in enumerate(names)],
+        "meshes": [{**mesh, "name": name} for mesh, name in zip(gltf_meshes, names)],
+        "accessors": accessors,
+        "bufferViews": buffer_views,
+        "buffers": [{"byteLength": byte_length}],
+    }
+    json_chunk = json.dumps(gltf, separators=(",", ":")).encode()
+    json_chunk += b" " * (-len(json_chunk) % 4)
+
+    # header, JSON chunk, then binary chunk
+    stream.write(
+        np.array(
+            [0x46546C67, 2, 12 + 8 + len(json_chunk) + 8 + byte_length], dtype="<u4"
+        ).tobytes()
+    )
+    stream.write(np.array([len(json_chunk), 0x4E4F534A], dtype="<u4").tobytes())
+    stream.write(json_chunk)
+    stream.write(np.array([byte_length, 0x004E4942], dtype="<u4").tobytes())
+    for blob in blobs:
+        stream.write(blob)
@@ -0,0 +1,28 @@
+# -*- coding: utf-8 -*-
+""" tests/conftest.py """
+
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from chaikin3d.polyhedron import Polyhedron
+from chaikin3d.wavefront_reader import WaveFrontReader
+
+
+EXAMPLE_MESHES = Path(__file__).resolve().parents[1] / "example-meshes"
+
+
+@pytest.fixture(scope="session")
+def girl_top_arrays() -> tuple[np.ndarray, list[np.ndarray]]:
+    # some sub-nodes of girl's "Top" object are at the same position as
+    # another sub-node of their group (merged sub-nodes)
+    reader = WaveFrontReader(str(EXAMPLE_MESHES / "girl.obj"), True, False, 0, None)
+    (top,) = [obj for obj in reader.split("objects") if obj.name.startswith("Top")]
+    return top.vertices, np.split(top.face_indices, top.face_offsets[1:-1])
+
+
+@pytest.fixture
+def girl_top(girl_top_arrays) -> Polyhedron:
+    vertices, faces = girl_top_arrays
+    return Polyhedron.from_standard_vertex_lists(list(vertices), faces, False)
@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+""" tests/test_api.py """
+
+import subprocess
+import sys
+from pathlib import Path
+
+import numpy as np
+
+from chaikin3d import api
+
+
+def test_subdivision_operator_of_a_mesh_with_merged_sub_nodes(girl_top_arrays):
+    vertices, faces = girl_top_arrays
+    vertices = vertices.astype(np.float64)
+
+    operator, operator_faces = api.subdivision_operator(vertices, faces, generations=2)
+    expected_vertices, expected_faces = api.subdivide(vertices, faces, generations=2)
+
+    np.testing.assert_allclose(operator @ vertices, expected_vertices, atol=1e-9)
+    assert len(operator_faces) == len(expected_faces)
+    for face, expected_face in zip(operator_faces, expected_faces):
+        np.testing.assert_array_equal(face, expected_face)
+
+
+def test_importing_the_package_does_not_import_the_api():
+    code = (
+        "import sys, chaikin3d; "
+        "assert 'chaikin3d.api' not in sys.modules and 'chaikin3d.instrumentation' not in sys.modules; "
+        "chaikin3d.subdivide; "
+        "assert 'chaikin3d.api' in sys.modules"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True, cwd=Path(__file__).resolve().parents[1])
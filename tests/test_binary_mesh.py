@@ -0,0 +1,22 @@
+# -*- coding: utf-8 -*-
+""" tests/test_binary_mesh.py """
+
+import numpy as np
+
+from chaikin3d import binary_mesh
+from chaikin3d.polyhedron import ChaikinOptions
+
+
+def test_round_trip_of_a_generation_with_merged_sub_nodes(girl_top, tmp_path):
+    poly = girl_top.Chaikin3D(ChaikinOptions())
+    path = tmp_path / f"top{binary_mesh.EXTENSION}"
+
+    binary_mesh.save_polyhedron(poly, str(path))
+    loaded = binary_mesh.load_polyhedron(str(path))
+
+    expected = poly.snapshot()
+    snapshot = loaded.snapshot()
+    for name in ("vertices", "face_offsets", "face_indices", "edges", "edge_types",
+                 "edge_order_offsets", "edge_order_indices"):
+        np.testing.assert_array_equal(snapshot[name], expected[name], err_msg=name)
+    assert snapshot["edges_ordered"] == expected["edges_ordered"]
@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+""" tests/test_managers.py """
+
+import pytest
+
+from chaikin3d.managers import ChaikinMGR
+from chaikin3d.validation import MeshValidationError
+
+from conftest import EXAMPLE_MESHES
+
+
+@pytest.mark.parametrize("mode", ["-ooc {tmp_path}/generations", "-ls 4"])
+def test_inconsistently_oriented_meshes_are_repaired(mode, tmp_path):
+    # the faces of the cube are not consistently oriented
+    output = tmp_path / "cube.ply"
+    mode = mode.format(tmp_path=tmp_path)
+
+    ChaikinMGR(cmd_args=f"-i {EXAMPLE_MESHES / 'cube.obj'} -cg 1 -p none {mode} -o {output}")(plot=True)
+
+    assert output.stat().st_size > 0
+
+
+@pytest.mark.parametrize("mode", ["-ooc {tmp_path}/generations", "-ls 4"])
+def test_non_manifold_meshes_are_rejected(mode, tmp_path):
+    # the deer has non-manifold edges, which cannot be repaired
+    mode = mode.format(tmp_path=tmp_path)
+    manager = ChaikinMGR(cmd_args=f"-i {EXAMPLE_MESHES / 'deer.obj'} -cg 1 -p none {mode}")
+
+    with pytest.raises(MeshValidationError, match="manifold"):
+        manager(plot=True)
+    assert not (tmp_path / "generations").exists()
@@ -0,0 +1,21 @@
+# -*- coding: utf-8 -*-
+""" tests/test_plotly_renderer.py """
+
+import numpy as np
+
+from chaikin3d.plotly_renderer import Renderer
+from chaikin3d.polyhedron import ChaikinOptions
+
+
+def test_edges_draw_data_of_a_generation_with_merged_sub_nodes(girl_top):
+    poly = girl_top.Chaikin3D(ChaikinOptions())
+    edges = list(poly.get_edges("main"))
+
+    (scatter,) = Renderer().get_edges_draw_data(poly, type_="main")
+
+    # A, B and a gap (NaN) per edge
+    points = np.column_stack((scatter.x, scatter.y, scatter.z)).reshape(-1, 3, 3)
+    assert len(points) == len(edges)
+    np.testing.assert_array_equal(points[:, 0], [edge.A.coords for edge in edges])
+    np.testing.assert_array_equal(points[:, 1], [edge.B.coords for edge in edges])
+    assert np.isnan(points[:, 2]).all()
@@ -0,0 +1,28 @@
+# -*- coding: utf-8 -*-
+""" tests/test_plotting.py """
+
+import numpy as np
+
+from chaikin3d import plotting
+from chaikin3d.arg_utils import gen_arg_parser, read_args
+from chaikin3d.plotly_renderer import Renderer
+from chaikin3d.polyhedron import ChaikinOptions
+
+from conftest import EXAMPLE_MESHES
+
+
+def test_pipelined_evolution_of_a_mesh_with_merged_sub_nodes(girl_top):
+    a = read_args(
+        gen_arg_parser(), cmd_args=f"-i {EXAMPLE_MESHES / 'girl.obj'} -cg 1 -p evolution -pe"
+    )
+    renderer = Renderer()
+    renderer.init_subplots(1, 2)
+    generations = []
+
+    plotting._draw_pipelined_evolution(renderer, girl_top, a, generations)
+
+    assert len(generations) == 2
+    expected = girl_top.Chaikin3D(ChaikinOptions())
+    np.testing.assert_allclose(generations[1][0], expected.vertex_array())
+    # the faces and the main edges of both generations were drawn
+    assert len(renderer.subplot_fig.data) == 2 * 2
@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+""" tests/test_polyhedron.py """
+
+import threading
+
+import numpy as np
+
+from chaikin3d.polyhedron import ChaikinOptions, Polyhedron
+
+
+CUBE_VERTICES = [
+    np.array([x, y, z], dtype=np.float64) for x in (0, 1) for y in (0, 1) for z in (0, 1)
+]
+CUBE_FACES = [
+    np.array(face)
+    for face in ([0, 1, 3, 2], [4, 6, 7, 5], [0, 4, 5, 1], [2, 3, 7, 6], [0, 2, 6, 4], [1, 5, 7, 3])
+]
+
+
+def test_merged_sub_nodes_keep_the_generation_operator(girl_top):
+    # the parent pairs must still resolve, also in the next generation (whose
+    # main edges end at the nodes the merged sub-nodes were merged into)
+    poly = girl_top
+    for _ in range(2):
+        new_poly = poly.Chaikin3D(ChaikinOptions(), parent_pairs=True)
+
+        vertices = new_poly.generation_operator() @ poly.vertex_array().astype(np.float64)
+        np.testing.assert_allclose(vertices, new_poly.vertex_array(), atol=1e-5)
+        poly = new_poly
+
+
+def test_merged_sub_nodes_leave_no_edge_outside_of_the_polyhedron(girl_top):
+    poly = girl_top.Chaikin3D(ChaikinOptions())
+
+    node_ids = {id(node) for node in poly.nodes}
+    for edge in poly.get_edges("any"):
+        assert id(edge.A) in node_ids and id(edge.B) in node_ids
+        assert edge.A is not edge.B
+
+
+def test_concurrent_subdivisions_leave_the_polyhedron_unchanged():
+    poly = Polyhedron.from_standard_vertex_lists(CUBE_VERTICES, CUBE_FACES, False)
+    # the groups of a polyhedron built by hand are not necessarily ordered
+    for group in poly.groups:
+        group.ordered = False
+    vertices = poly.vertex_array()
+    edge_ids = [[id(edge) for edge in node.edge_list] for node in poly.nodes]
+    options = ChaikinOptions(order_edges="first")
+    expected = poly.Chaikin3D(options).vertex_array()
+    results = [[], []]
+
+    def subdivide(results: list) -> None:
+        for _ in range(5):
+            results.append(poly.Chaikin3D(options).vertex_array())
+
+    threads = [threading.Thread(target=subdivide, args=(result,)) for result in results]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    for new_vertices in results[0] + results[1]:
+        np.testing.assert_array_equal(new_vertices, expected)
+    np.testing.assert_array_equal(poly.vertex_array(), vertices)
+    assert [[id(edge) for edge in node.edge_list] for node in poly.nodes] == edge_ids
+    assert not any(group.ordered for group in poly.groups)
@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+""" tests/test_server.py """
+
+import asyncio
+import os
+
+import numpy as np
+
+from chaikin3d import binary_mesh
+from chaikin3d.polyhedron import ChaikinOptions
+from chaikin3d.server import ChaikinServer
+from chaikin3d.wavefront_reader import WaveFrontReader
+
+
+# two triangles, the vertices 3 and 5 are at the same position: the sub-nodes
+# of vertex 1 towards them are merged
+SQUARE = """o square
+v 0 0 0
+v 1 0 0
+v 1 1 0
+v 0 1 0
+v 1 1 0
+f 1 5 4
+f 1 2 3
+"""
+
+
+def test_subdivide_a_mesh_with_merged_sub_nodes(tmp_path):
+    path = tmp_path / "square.obj"
+    path.write_text(SQUARE)
+    stat = os.stat(path)
+    mesh_key = (str(path), stat.st_mtime_ns, stat.st_size, False)
+    server = ChaikinServer()
+
+    data, hit = asyncio.run(server.subdivide(mesh_key, 2, ChaikinOptions(), "c3m"))
+    assert not hit
+    data_again, hit = asyncio.run(server.subdivide(mesh_key, 2, ChaikinOptions(), "c3m"))
+    assert hit and data_again == data
+
+    output = tmp_path / f"square{binary_mesh.EXTENSION}"
+    output.write_bytes(data)
+    blocks, _ = binary_mesh.load_binary_mesh(str(output), use_mmap=False)
+    poly = WaveFrontReader(str(path), True, False).to_polyhedron()
+    for _ in range(2):
+        poly = poly.Chaikin3D(ChaikinOptions())
+    np.testing.assert_allclose(blocks["vertices"], poly.vertex_array())
@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+""" tests/test_sweep.py """
+
+import numpy as np
+
+from chaikin3d import sweep
+from chaikin3d.polyhedron import ChaikinOptions
+
+
+def test_sweep_of_a_generation_with_merged_sub_nodes(girl_top):
+    coefs = [3.0, 5.0]
+
+    polyhedra = sweep.coef_sweep(girl_top, ChaikinOptions(), coefs, 1, workers=1)
+
+    assert len(polyhedra) == len(coefs)
+    for coef, poly in zip(coefs, polyhedra):
+        expected = girl_top.Chaikin3D(ChaikinOptions(coef))
+        np.testing.assert_allclose(poly.vertex_array(), expected.vertex_array(), atol=1e-5)
+
@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+""" tests/test_wavefront_reader.py """
+
+import numpy as np
+
+from chaikin3d.wavefront_reader import WaveFrontReader
+
+
+TETRAHEDRON = b"""o tetrahedron
+v 1.0 1.0 1.0
+v 1.0 -1.0 -1.0
+v -1.0 1.0 -1.0
+v -1.0 -1.0 1.0
+f 1 2 3
+f 1 4 2
+f 1 3 4
+f 2 4 3
+"""
+VERTICES = [[1, 1, 1], [1, -1, -1], [-1, 1, -1], [-1, -1, 1]]
+FACES = [[0, 1, 2], [0, 3, 1], [0, 2, 3], [1, 3, 2]]
+
+
+def _read(tmp_path, data: bytes, chunk_size: int = None) -> WaveFrontReader:
+    path = tmp_path / "tetrahedron.obj"
+    path.write_bytes(data)
+    reader = WaveFrontReader(str(path), parse_on_load=False)
+    if chunk_size is None:
+        reader.parse()
+    else:
+        reader.parse(chunk_size=chunk_size)
+    return reader
+
+
+def _assert_tetrahedron(reader: WaveFrontReader) -> None:
+    np.testing.assert_array_equal(reader.vertices, VERTICES)
+    assert [face.tolist() for face in reader.vertex_indices] == FACES
+    assert [name for name, _ in reader.objects] == ["tetrahedron"]
+
+
+def test_parse_without_final_newline(tmp_path):
+    _assert_tetrahedron(_read(tmp_path, TETRAHEDRON.rstrip(b"\n")))
+
+
+def test_parse_crlf(tmp_path):
+    _assert_tetrahedron(_read(tmp_path, TETRAHEDRON.replace(b"\n", b"\r\n")))
+
+
+def test_parse_chunk_boundary_inside_a_line(tmp_path):
+    # every chunk boundary falls inside a line
+    for chunk_size in (5, 7, 16):
+        _assert_tetrahedron(_read(tmp_path, TETRAHEDRON, chunk_size))
+        _assert_tetrahedron(_read(tmp_path, TETRAHEDRON.rstrip(b"\n"), chunk_size))